@@ -0,0 +1,80 @@
+#
+# Aho-Corasick automaton over DNA samples.
+#
+# The automaton finds all the samples occurring in a sequence with a single pass over the sequence,
+# whatever the number of samples. The trie of the samples is completed into a deterministic automaton
+# (one transition per DNA base for each state), so scanning a base is a single table lookup.
+#
+
+from collections import deque
+
+from dna_utilities import DNA_BASES
+
+# Translation of the (uppercase) DNA bases into their code, used as the transition index.
+_BASE_CODES = bytes.maketrans(DNA_BASES.encode(), bytes(range(len(DNA_BASES))))
+
+
+class AhoCorasick:
+
+    # Build the automaton.
+    #
+    # Params:
+    # - samples: the uppercase DNA samples to search for
+    def __init__(self, samples):
+        self.samples = list(samples)
+        base_count = len(DNA_BASES)
+
+        # Build the trie. A transition to state 0 (the root) means "no child" until the automaton is completed.
+        transitions = [0] * base_count
+        outputs = [set()]
+        for (index, sample) in enumerate(self.samples):
+            state = 0
+            for code in sample.encode().translate(_BASE_CODES):
+                next_state = transitions[state * base_count + code]
+                if next_state == 0:
+                    next_state = len(outputs)
+                    transitions[state * base_count + code] = next_state
+                    transitions.extend([0] * base_count)
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(index)
+
+        # Complete the automaton breadth first: a missing transition follows the failure link of the state,
+        # and each state also reports the samples of its failure state (its longest proper suffix in the trie).
+        failures = [0] * len(outputs)
+        queue = deque()
+        for code in range(base_count):
+            child = transitions[code]
+            if child:
+                queue.append(child)
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[failures[state]]
+            for code in range(base_count):
+                child = transitions[state * base_count + code]
+                fallback = transitions[failures[state] * base_count + code]
+                if child:
+                    failures[child] = fallback
+                    queue.append(child)
+                else:
+                    transitions[state * base_count + code] = fallback
+
+        self._transitions = transitions
+        self._outputs = [tuple(output) for output in outputs]
+
+    # Find the samples occurring in a sequence.
+    #
+    # Params:
+    # - sequence: the uppercase DNA sequence to scan
+    # Returns the set of indexes (in "samples") of the samples found.
+    def search(self, sequence):
+        transitions = self._transitions
+        outputs = self._outputs
+        base_count = len(DNA_BASES)
+        found = set()
+        state = 0
+        for code in sequence.encode().translate(_BASE_CODES):
+            state = transitions[state * base_count + code]
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
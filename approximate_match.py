@@ -0,0 +1,140 @@
+#
+# Approximate (error-tolerant) matching of DNA samples.
+#
+# Both searches are bit-parallel: the states of all the positions of the sample are kept in the bits of a single
+# integer, so each base of the sequence is processed with a few integer operations whatever the sample length.
+# - Hamming distance (mismatches only): the "bitap" (shift-and) algorithm with one state per number of mismatches.
+# - Edit distance (mismatches, insertions and deletions): the bit-vector algorithm of Myers (1999), which computes
+#   a column of the edit distance matrix per base of the sequence.
+#
+# A match with at most d errors contains at least one of d + 1 disjoint pieces of the sample without any error
+# (pigeonhole principle): the pieces are used to discard the sequences which can't match before running the
+# bit-parallel searches (see "seed_pieces").
+#
+
+from dna_utilities import DNA_BASES
+
+
+# Split a sample into the pieces of which at least one appears, exactly, in any approximate match.
+#
+# Params:
+# - sample: the uppercase DNA sample
+# - errors: the maximum number of errors of a match
+# Returns the list of the errors + 1 disjoint pieces (empty pieces when the sample is too short, as anything
+# can then match).
+def seed_pieces(sample, errors):
+    count = errors + 1
+    length = len(sample) // count
+    return [sample[index * length:(index + 1) * length] for index in range(count)]
+
+
+# Build the bit masks of the positions of each base in a sample (bit i is set when sample[i] is that base).
+def _base_masks(sample):
+    masks = dict.fromkeys(DNA_BASES, 0)
+    for (index, base) in enumerate(sample):
+        masks[base] |= 1 << index
+    return masks
+
+
+# Find the best match of a sample in a sequence, allowing mismatches only.
+#
+# Params:
+# - sequence: the uppercase DNA sequence
+# - sample: the uppercase DNA sample
+# - max_mismatches: the maximum number of mismatches
+# Returns a tuple (<start position of the match>, <number of mismatches>) for the match with the fewest
+# mismatches (the leftmost one on a tie), or None if there is no match.
+def hamming_search(sequence, sample, max_mismatches):
+    length = len(sample)
+    if length > len(sequence):
+        return None
+    masks = _base_masks(sample)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    # states[j]: bit i is set when sample[:i + 1] matches the sequence up to the current base with at most j mismatches.
+    states = [0] * (max_mismatches + 1)
+    best = None
+    for (position, base) in enumerate(sequence):
+        mask = masks.get(base, 0)
+        previous = states[0]
+        states[0] = ((previous << 1) | 1) & mask
+        for errors in range(1, len(states)):
+            current = states[errors]
+            states[errors] = ((((current << 1) | 1) & mask) | ((previous << 1) | 1)) & full
+            previous = current
+        if states[-1] & last:
+            distance = next(errors for errors in range(len(states)) if states[errors] & last)
+            if best is None or distance < best[1]:
+                best = (position - length + 1, distance)
+                if distance == 0:
+                    break
+                # Only a better match is still of interest.
+                del states[distance:]
+    return best
+
+
+# Find the best match of a sample in a sequence, allowing mismatches, insertions and deletions.
+#
+# Params:
+# - sequence: the uppercase DNA sequence
+# - sample: the uppercase DNA sample
+# - max_edits: the maximum edit distance
+# Returns a tuple (<start position of the match>, <edit distance>) for the match with the smallest distance
+# (the leftmost one on a tie, and the shortest one ending there), or None if there is no match.
+def edit_search(sequence, sample, max_edits):
+    length = len(sample)
+    masks = _base_masks(sample)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    (positive, negative) = (full, 0)
+    score = length
+    # Deleting the whole sample is a match (ending before the first base) when the sample is short enough.
+    best = (-1, length) if length <= max_edits else None
+    for (position, base) in enumerate(sequence):
+        mask = masks.get(base, 0)
+        vertical = mask | negative
+        horizontal = ((((mask & positive) + positive) & full) ^ positive) | mask
+        horizontal_positive = (negative | ~(horizontal | positive)) & full
+        horizontal_negative = positive & horizontal
+        if horizontal_positive & last:
+            score += 1
+        elif horizontal_negative & last:
+            score -= 1
+        horizontal_positive = (horizontal_positive << 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = (horizontal_negative | ~(vertical | horizontal_positive)) & full
+        negative = horizontal_positive & vertical
+        if score <= max_edits and (best is None or score < best[1]):
+            best = (position, score)
+            if score == 0:
+                break
+    if best is None:
+        return None
+    return _edit_distance_at(sequence, sample, best[0] + 1, best[1])
+
+
+# Find where the best match ending before a position starts, with the (small) dynamic programming
+# matrix of the sample against the end of the sequence, both reversed.
+#
+# Params:
+# - sequence: the uppercase DNA sequence
+# - sample: the uppercase DNA sample
+# - end: the position following the end of the match
+# - distance: the edit distance of the best match ending there
+# Returns a tuple (<start position of the match>, <edit distance>).
+def _edit_distance_at(sequence, sample, end, distance):
+    window = sequence[max(0, end - 2 * len(sample) - 1):end][::-1]
+    reversed_sample = sample[::-1]
+    # row[j]: the edit distance between the sample read so far and the last j bases of the window.
+    row = list(range(len(window) + 1))
+    for (index, sample_base) in enumerate(reversed_sample, 1):
+        previous_row = row
+        row = [index]
+        for (j, base) in enumerate(window, 1):
+            row.append(min(
+                previous_row[j - 1] + (sample_base != base),
+                previous_row[j] + 1,
+                row[j - 1] + 1
+            ))
+    used = row.index(distance)
+    return (end - used, distance)
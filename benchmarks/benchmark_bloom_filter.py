@@ -0,0 +1,66 @@
+#
+# Bloom filter prefilter benchmark.
+# Compares "find" with and without the per-sequence Bloom filters, on text and packed storages, with samples
+# taken from the sequences (few matches, most sequences rejected by their filter), and reports the memory of
+# the filters and the effectiveness of the prefilter.
+#
+#     > python -m benchmarks.benchmark_bloom_filter [count] [length] [max bits per base]
+#
+
+import random
+import sys
+
+from benchmarks.common import random_sequences, timed
+from bloom_filter import BloomPrefilter
+from sequence_db import SequenceDb
+from sequence_storage import PackedStorage
+
+SAMPLE_LENGTH = 24
+SAMPLE_COUNT = 200
+
+
+# Take samples from the sequences.
+def samples_of(sequences):
+    generator = random.Random(5)
+    samples = []
+    for sequence in generator.choices(sequences, k=SAMPLE_COUNT):
+        start = generator.randrange(len(sequence) - SAMPLE_LENGTH + 1)
+        samples.append(sequence[start:start + SAMPLE_LENGTH])
+    return samples
+
+
+def find_all(db, samples):
+    return [db.find(sample) for sample in samples]
+
+
+def main(count=2_000, length=20_000, max_bits_per_base=None):
+    sequences = random_sequences(count, length)
+    samples = samples_of(sequences)
+    databases = [
+        ("text", SequenceDb()),
+        ("text + bloom", SequenceDb(prefilter=BloomPrefilter(max_bits_per_base=max_bits_per_base))),
+        ("packed", SequenceDb(PackedStorage())),
+        ("packed + bloom", SequenceDb(PackedStorage(), prefilter=BloomPrefilter(max_bits_per_base=max_bits_per_base)))
+    ]
+
+    print(f"{'database':>15} {'insert s':>9} {'find ms':>9} {'filters MB':>11} {'rejected':>9} {'false pos.':>11}")
+    expected = None
+    for (name, db) in databases:
+        (_, insert_seconds) = timed(db.insert_many, sequences)
+        (found, find_seconds) = timed(find_all, db, samples)
+        expected = found if expected is None else expected
+        assert found == expected
+        stats = db.prefilter_stats()
+        (memory, rejected, false_positives) = ("-", "-", "-")
+        if stats is not None:
+            memory = f"{stats.memory_size / 1024 / 1024:.1f}"
+            rejected = f"{stats.rejected / stats.checked:.2%}"
+            false_positives = f"{stats.false_positives}"
+        print(
+            f"{name:>15} {insert_seconds:>9.2f} {find_seconds * 1000:>9.1f} {memory:>11} {rejected:>9}"
+            f" {false_positives:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
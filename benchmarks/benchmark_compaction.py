@@ -0,0 +1,61 @@
+#
+# Deletion and compaction benchmark.
+# Deletes and replaces part of the sequences of a packed database with a k-mer index, then compares the size
+# of the storage and the duration of "find" before and after "compact".
+#
+#     > python -m benchmarks.benchmark_compaction [count] [length]
+#
+
+import random
+import sys
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+from sequence_storage import PackedStorage
+
+SAMPLES = ["ACGTACGTAC", "TTGACCA", "GATTACA", "CCGGAATT"]
+
+
+def delete_all(db, ids):
+    for id in ids:
+        db.delete(id)
+
+
+def replace_all(db, ids, sequences):
+    for (id, sequence) in zip(ids, sequences):
+        db.replace(id, sequence)
+
+
+def find_all(db):
+    return [db.find(sample) for sample in SAMPLES]
+
+
+def main(count=100_000, length=200):
+    sequences = random_sequences(count, length)
+    replacements = random_sequences(count // 4, length, seed=7)
+    for kmer_size in (None, 8):
+        print(f"k-mer index: {kmer_size or 'none'}")
+        db = SequenceDb(PackedStorage(), kmer_size=kmer_size)
+        ids = [id for (_, id) in db.insert_many(sequences)]
+        changed = random.Random(3).sample(ids, count // 2)
+        (deleted, replaced) = (changed[:count // 4], changed[count // 4:])
+
+        (_, delete_seconds) = timed(delete_all, db, deleted)
+        (_, replace_seconds) = timed(replace_all, db, replaced, replacements)
+        print(f"  delete:  {delete_seconds * 1_000_000 / len(deleted):.1f} us/sequence")
+        print(f"  replace: {replace_seconds * 1_000_000 / len(replaced):.1f} us/sequence")
+
+        (expected, before_seconds) = timed(find_all, db)
+        before_size = db.database.memory_size()
+        dead_size = db.database.dead_size()
+        (_, compact_seconds) = timed(db.compact)
+        (found, after_seconds) = timed(find_all, db)
+        assert expected == found
+        print(f"  compact: {compact_seconds * 1000:.1f} ms")
+        print(f"  storage: {before_size / 1_000_000:.1f} MB ({dead_size / 1_000_000:.1f} MB dead) -> "
+              f"{db.database.memory_size() / 1_000_000:.1f} MB")
+        print(f"  find:    {before_seconds * 1000:.1f} ms -> {after_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,75 @@
+#
+# Concurrency benchmark.
+# Measures the throughput of reader threads (alternating "get" and "find") on a thread-safe database,
+# without writers and then while writer threads keep inserting new sequences.
+#
+#     > python -m benchmarks.benchmark_concurrency [count] [length] [seconds]
+#
+
+import sys
+import threading
+import time
+
+from benchmarks.common import random_sequences
+from sequence_db import SequenceDb
+
+READER_COUNTS = [1, 2, 4, 8]
+WRITER_COUNTS = [0, 1, 2]
+SAMPLE_LENGTH = 12
+
+
+def reader(db, ids, samples, stop, counts):
+    operations = 0
+    while not stop.is_set():
+        db.get(ids[operations % len(ids)])
+        db.find(samples[operations % len(samples)])
+        operations += 2
+    counts.append(operations)
+
+
+def writer(db, sequences, stop, counts):
+    inserts = 0
+    for sequence in sequences:
+        if stop.is_set():
+            break
+        db.insert(sequence)
+        inserts += 1
+    counts.append(inserts)
+
+
+# Run readers and writers for a while.
+# Returns a tuple (<read operations per second>, <inserts per second>).
+def run(db, ids, samples, reader_count, writer_count, seconds):
+    stop = threading.Event()
+    (read_counts, write_counts) = ([], [])
+    threads = [
+        threading.Thread(target=reader, args=(db, ids, samples, stop, read_counts))
+        for _ in range(reader_count)
+    ]
+    threads += [
+        threading.Thread(target=writer, args=(db, random_sequences(100_000, 50, seed=seed), stop, write_counts))
+        for seed in range(len(threads), len(threads) + writer_count)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return (sum(read_counts) / seconds, sum(write_counts) / seconds)
+
+
+def main(count=10_000, length=200, seconds=1):
+    db = SequenceDb(kmer_size=8, thread_safe=True)
+    ids = [sequence_id for (_, sequence_id) in db.insert_many(random_sequences(count, length))]
+    samples = random_sequences(100, SAMPLE_LENGTH, seed=1)
+
+    print(f"{'readers':>8} {'writers':>8} {'reads/s':>10} {'inserts/s':>10}")
+    for writer_count in WRITER_COUNTS:
+        for reader_count in READER_COUNTS:
+            (reads, inserts) = run(db, ids, samples, reader_count, writer_count, seconds)
+            print(f"{reader_count:>8} {writer_count:>8} {reads:>10.0f} {inserts:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,35 @@
+#
+# Durability benchmark.
+# Compares the insert throughput of a durable database for each fsync policy, and the recovery time.
+#
+#     > python -m benchmarks.benchmark_durability [count] [length]
+#
+
+import sys
+import tempfile
+
+from benchmarks.common import random_sequences, timed
+from durability import open_durable_db
+from write_ahead_log import FsyncPolicy
+
+
+def insert_all(db, sequences):
+    for sequence in sequences:
+        db.insert(sequence)
+
+
+def main(count=20_000, length=150):
+    sequences = random_sequences(count, length)
+    print(f"{'policy':>8} {'inserts/s':>10} {'recovery ms':>12}")
+    for fsync_policy in FsyncPolicy:
+        with tempfile.TemporaryDirectory() as directory:
+            db = open_durable_db(directory, fsync_policy, checkpoint_interval=None)
+            (_, insert_seconds) = timed(insert_all, db, sequences)
+            db.close()
+            (db, recovery_seconds) = timed(lambda: open_durable_db(directory, fsync_policy, checkpoint_interval=None))
+            db.close()
+        print(f"{fsync_policy.value:>8} {count / insert_seconds:>10.0f} {recovery_seconds * 1000:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
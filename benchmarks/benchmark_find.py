@@ -0,0 +1,38 @@
+#
+# Find benchmark.
+# Compares the duration of "find" with and without the k-mer index for different sample lengths.
+#
+#     > python -m benchmarks.benchmark_find [count] [length] [kmer_size]
+#
+
+import sys
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+SAMPLE_LENGTHS = [4, 8, 12, 16, 32, 64]
+
+
+def load(db, sequences):
+    for sequence in sequences:
+        db.insert(sequence)
+    return db
+
+
+def main(count=20_000, length=200, kmer_size=8):
+    sequences = random_sequences(count, length)
+    (scan_db, _) = timed(load, SequenceDb(), sequences)
+    (indexed_db, load_seconds) = timed(load, SequenceDb(kmer_size=kmer_size), sequences)
+    print(f"k-mer index built in {load_seconds:.1f} s")
+
+    print(f"{'sample length':>14} {'scan ms':>9} {'k-mer ms':>9} {'matches':>8}")
+    for sample_length in SAMPLE_LENGTHS:
+        sample = sequences[count // 2][50:50 + sample_length]
+        (scan_ids, scan_seconds) = timed(scan_db.find, sample)
+        (indexed_ids, indexed_seconds) = timed(indexed_db.find, sample)
+        assert scan_ids == indexed_ids
+        print(f"{sample_length:>14} {scan_seconds * 1000:>9.2f} {indexed_seconds * 1000:>9.2f} {len(scan_ids):>8}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
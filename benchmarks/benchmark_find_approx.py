@@ -0,0 +1,69 @@
+#
+# Approximate find benchmark.
+# Compares "find_approx" (pigeonhole filtering, with and without the k-mer index) with running the bit-parallel
+# search on every sequence, for reads with a few sequencing errors.
+#
+#     > python -m benchmarks.benchmark_find_approx [count] [length]
+#
+
+import random
+import sys
+
+from approximate_match import edit_search, hamming_search
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+SAMPLE_LENGTH = 32
+SAMPLE_COUNT = 10
+ERRORS = [0, 1, 2, 3]
+
+
+# Take samples from the sequences and introduce substitutions in them.
+def noisy_samples(sequences, errors):
+    generator = random.Random(errors)
+    samples = []
+    for sequence in generator.sample(sequences, SAMPLE_COUNT):
+        start = generator.randrange(len(sequence) - SAMPLE_LENGTH + 1)
+        bases = list(sequence[start:start + SAMPLE_LENGTH])
+        for position in generator.sample(range(SAMPLE_LENGTH), errors):
+            bases[position] = generator.choice("ACGT".replace(bases[position], ""))
+        samples.append("".join(bases))
+    return samples
+
+
+def search_all(db, samples, errors, edits):
+    search = edit_search if edits else hamming_search
+    return [
+        [id for (id, seq) in db.database.items() if search(seq, sample, errors) is not None]
+        for sample in samples
+    ]
+
+
+def find_all(db, samples, errors, edits):
+    return [
+        [match.sequence_id for match in db.find_approx(sample, errors, errors if edits else None)]
+        for sample in samples
+    ]
+
+
+def main(count=2_000, length=200):
+    sequences = random_sequences(count, length)
+    db = SequenceDb()
+    db.insert_many(sequences)
+    indexed_db = SequenceDb(kmer_size=8)
+    indexed_db.insert_many(sequences)
+
+    print(f"{'distance':>9} {'errors':>7} {'all ms':>9} {'filtered ms':>12} {'k-mer ms':>9}")
+    for edits in (False, True):
+        for errors in ERRORS:
+            samples = noisy_samples(sequences, errors)
+            (expected, all_seconds) = timed(search_all, db, samples, errors, edits)
+            (found, filtered_seconds) = timed(find_all, db, samples, errors, edits)
+            (indexed, indexed_seconds) = timed(find_all, indexed_db, samples, errors, edits)
+            assert expected == found == indexed
+            print(f"{'edit' if edits else 'hamming':>9} {errors:>7} {all_seconds * 1000:>9.1f} "
+                  f"{filtered_seconds * 1000:>12.1f} {indexed_seconds * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,36 @@
+#
+# Multi-sample find benchmark.
+# Compares "find_many" (a single Aho-Corasick scan) with one "find" call per sample.
+#
+#     > python -m benchmarks.benchmark_find_many [count] [length]
+#
+
+import sys
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+SAMPLE_COUNTS = [1, 10, 100, 500]
+SAMPLE_LENGTH = 20
+
+
+def find_each(db, samples):
+    return {sample: db.find(sample) for sample in samples}
+
+
+def main(count=5_000, length=200):
+    db = SequenceDb()
+    for sequence in random_sequences(count, length):
+        db.insert(sequence)
+
+    print(f"{'samples':>8} {'find ms':>9} {'find_many ms':>13}")
+    for sample_count in SAMPLE_COUNTS:
+        samples = random_sequences(sample_count, SAMPLE_LENGTH, seed=sample_count)
+        (expected, find_seconds) = timed(find_each, db, samples)
+        ((matches, _), find_many_seconds) = timed(db.find_many, samples)
+        assert matches == expected
+        print(f"{sample_count:>8} {find_seconds * 1000:>9.1f} {find_many_seconds * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
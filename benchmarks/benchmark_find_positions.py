@@ -0,0 +1,62 @@
+#
+# Match position benchmark.
+# Compares locating every occurrence of samples with "find" followed by a second search of each matching
+# sequence (what callers did before "find_positions"), with "find_positions" and with "count", on text and
+# packed storages and with the full-text index.
+#
+#     > python -m benchmarks.benchmark_find_positions [count] [length]
+#
+
+import sys
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+from sequence_storage import PackedStorage
+
+# Short samples occur many times, and overlap themselves ("AAAA").
+SAMPLES = ["ACGT", "AAAA", "GATTACA", "ACGTACGTAC"]
+
+
+# Locate the occurrences with "find", then search each matching sequence again.
+def find_then_locate(db, samples):
+    occurrences = []
+    for sample in samples:
+        for sequence_id in db.find(sample):
+            sequence = db.get(sequence_id)
+            start = sequence.find(sample)
+            while start != -1:
+                occurrences.append((sequence_id, start))
+                start = sequence.find(sample, start + 1)
+    return occurrences
+
+
+def find_positions(db, samples):
+    return [tuple(occurrence) for sample in samples for occurrence in db.find_positions(sample)]
+
+
+def count(db, samples):
+    return sum(db.count(sample) for sample in samples)
+
+
+def main(count_=20_000, length=200):
+    sequences = random_sequences(count_, length)
+    databases = [("text", SequenceDb()), ("packed", SequenceDb(PackedStorage())), ("suffix index", SequenceDb())]
+
+    print(f"{'database':>13} {'find + locate ms':>17} {'find_positions ms':>18} {'count ms':>9} {'occurrences':>12}")
+    for (name, db) in databases:
+        db.insert_many(sequences)
+        if name == "suffix index":
+            db.build_index()
+        (expected, locate_seconds) = timed(find_then_locate, db, SAMPLES)
+        (occurrences, positions_seconds) = timed(find_positions, db, SAMPLES)
+        (total, count_seconds) = timed(count, db, SAMPLES)
+        assert occurrences == expected
+        assert total == len(expected)
+        print(
+            f"{name:>13} {locate_seconds * 1000:>17.1f} {positions_seconds * 1000:>18.1f}"
+            f" {count_seconds * 1000:>9.1f} {total:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,36 @@
+#
+# Insert throughput benchmark.
+# Inserts sequences in consecutive batches and reports the throughput of each batch.
+# With the hash index, the throughput should stay flat as the database grows.
+#
+#     > python -m benchmarks.benchmark_insert [total] [batch]
+#
+
+import sys
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+SEQUENCE_LENGTH = 50
+
+
+def insert_all(db, sequences):
+    for sequence in sequences:
+        db.insert(sequence)
+
+
+def main(total=200_000, batch=20_000):
+    db = SequenceDb()
+    sequences = random_sequences(total, SEQUENCE_LENGTH)
+
+    print(f"{'database size':>14} {'inserts/s':>12} {'duplicates/s':>13}")
+    for start in range(0, total, batch):
+        chunk = sequences[start:start + batch]
+        (_, insert_seconds) = timed(insert_all, db, chunk)
+        # Inserting the same chunk again only exercises the duplicate detection.
+        (_, duplicate_seconds) = timed(insert_all, db, chunk)
+        print(f"{len(db):>14} {len(chunk) / insert_seconds:>12.0f} {len(chunk) / duplicate_seconds:>13.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,49 @@
+#
+# Instrumentation overhead benchmark.
+# Compares the duration of cheap operations ("get" and "insert" of duplicates) and of "find" on databases
+# without and with instrumentation.
+#
+#     > python -m benchmarks.benchmark_instrumentation [count] [length]
+#
+
+import sys
+
+from benchmarks.common import random_sequences, timed
+from instrumentation import Instrumentation
+from sequence_db import SequenceDb
+
+SAMPLE_LENGTH = 12
+
+
+def get_all(db, ids):
+    for sequence_id in ids:
+        db.get(sequence_id)
+
+
+def insert_all(db, sequences):
+    for sequence in sequences:
+        db.insert(sequence)
+
+
+def find_all(db, samples):
+    for sample in samples:
+        db.find(sample)
+
+
+def main(count=100_000, length=50):
+    sequences = random_sequences(count, length)
+    samples = random_sequences(20, SAMPLE_LENGTH, seed=1)
+
+    print(f"{'instrumentation':>16} {'get ms':>8} {'duplicate ms':>13} {'find ms':>8}")
+    for instrumentation in [None, Instrumentation(), Instrumentation(slow_query_threshold=0.1)]:
+        db = SequenceDb(instrumentation=instrumentation)
+        ids = [sequence_id for (_, sequence_id) in db.insert_many(sequences)]
+        (_, get_seconds) = timed(get_all, db, ids)
+        (_, insert_seconds) = timed(insert_all, db, sequences)
+        (_, find_seconds) = timed(find_all, db, samples)
+        label = "none" if instrumentation is None else "slow query log" if instrumentation.slow_query_threshold else "on"
+        print(f"{label:>16} {get_seconds * 1000:>8.1f} {insert_seconds * 1000:>13.1f} {find_seconds * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,44 @@
+#
+# Streaming find benchmark.
+# Compares the time to the first page of results of "iter_find" with the time of "find", for a short sample
+# matching most of the database, and the time of "find_count" with counting the results of "find".
+#
+#     > python -m benchmarks.benchmark_iter_find [count] [length]
+#
+
+import sys
+from itertools import islice
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+SAMPLE = "ACG"
+PAGE_SIZE = 10
+
+
+def first_page(db):
+    return list(islice(db.iter_find(SAMPLE), PAGE_SIZE))
+
+
+def count_found(db):
+    return len(db.find(SAMPLE))
+
+
+def main(count=100_000, length=200):
+    db = SequenceDb()
+    db.insert_many(random_sequences(count, length))
+
+    (page, page_seconds) = timed(first_page, db)
+    (found, find_seconds) = timed(db.find, SAMPLE)
+    assert page == found[:PAGE_SIZE]
+    print(f"first {PAGE_SIZE} of {len(found)} matches: iter_find {page_seconds * 1000:.1f} ms, "
+          f"find {find_seconds * 1000:.1f} ms")
+
+    (matches, count_seconds) = timed(db.find_count, SAMPLE)
+    (expected, len_seconds) = timed(count_found, db)
+    assert matches == expected
+    print(f"count: find_count {count_seconds * 1000:.1f} ms, len(find) {len_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,45 @@
+#
+# Bulk loader benchmark.
+# Writes a FASTA file (plain and gzip compressed) and reports the load throughput
+# in sequences per second and bases per second.
+#
+#     > python -m benchmarks.benchmark_loader [count] [length] [batch_size]
+#
+
+import gzip
+import os
+import sys
+import tempfile
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+from sequence_loader import load_file
+
+LINE_LENGTH = 60
+
+
+def write_fasta(file, sequences):
+    for (index, sequence) in enumerate(sequences):
+        file.write(f">read{index}\n")
+        for start in range(0, len(sequence), LINE_LENGTH):
+            file.write(sequence[start:start + LINE_LENGTH] + "\n")
+
+
+def main(count=200_000, length=150, batch_size=10_000):
+    sequences = random_sequences(count, length)
+    with tempfile.TemporaryDirectory() as directory:
+        plain_path = os.path.join(directory, "reads.fasta")
+        gzip_path = plain_path + ".gz"
+        with open(plain_path, "w") as file:
+            write_fasta(file, sequences)
+        with gzip.open(gzip_path, "wt") as file:
+            write_fasta(file, sequences)
+
+        print(f"{'file':>12} {'sequences/s':>12} {'Mbases/s':>9}")
+        for (name, path) in (("FASTA", plain_path), ("FASTA.gz", gzip_path)):
+            (summary, seconds) = timed(load_file, SequenceDb(), path, None, batch_size)
+            print(f"{name:>12} {summary.inserted / seconds:>12.0f} {summary.bases / seconds / 1_000_000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
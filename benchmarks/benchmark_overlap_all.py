@@ -0,0 +1,35 @@
+#
+# Database-wide overlap benchmark.
+# Compares "overlap_all" with and without the prefix/suffix overlap index.
+#
+#     > python -m benchmarks.benchmark_overlap_all [count] [length] [index_size]
+#
+
+import sys
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+MINIMUM_OVERLAPS = [4, 8, 16, 32]
+
+
+def main(count=20_000, length=200, index_size=16):
+    sequences = random_sequences(count, length)
+    scan_db = SequenceDb()
+    indexed_db = SequenceDb(overlap_index_size=index_size)
+    for sequence in sequences:
+        scan_db.insert(sequence)
+        indexed_db.insert(sequence)
+
+    # The sample overlaps the end of a sequence and the start of another.
+    sample = sequences[1][-40:] + sequences[2][:40]
+    print(f"{'minimum overlap':>16} {'scan ms':>9} {'index ms':>9} {'overlaps':>9}")
+    for minimum_overlap in MINIMUM_OVERLAPS:
+        (expected, scan_seconds) = timed(scan_db.overlap_all, sample, minimum_overlap)
+        (overlaps, indexed_seconds) = timed(indexed_db.overlap_all, sample, minimum_overlap)
+        assert overlaps == expected
+        print(f"{minimum_overlap:>16} {scan_seconds * 1000:>9.1f} {indexed_seconds * 1000:>9.2f} {len(overlaps):>9}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
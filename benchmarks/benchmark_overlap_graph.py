@@ -0,0 +1,70 @@
+#
+# Overlap graph and greedy assembly benchmark.
+# Reads are sampled from a random genome, then the overlap graph of all the reads is built and assembled.
+# The graph is compared with the time it would take to check every pair of reads with "overlap", estimated
+# from a sample of pairs.
+#
+#     > python -m benchmarks.benchmark_overlap_graph [read count...]
+#
+
+import random
+import sys
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+READ_LENGTH = 100
+COVERAGE = 5
+MINIMUM_OVERLAP = 30
+READ_COUNTS = [10_000, 100_000, 1_000_000]
+SAMPLED_PAIRS = 2_000
+
+
+# Sample reads from a random genome.
+def sample_reads(count):
+    [genome] = random_sequences(1, count * READ_LENGTH // COVERAGE)
+    generator = random.Random(7)
+    starts = (generator.randrange(len(genome) - READ_LENGTH + 1) for _ in range(count))
+    return [genome[start:start + READ_LENGTH] for start in starts]
+
+
+def check_pairs(db, pairs):
+    return [db.overlap(sample, sequence_id, MINIMUM_OVERLAP) for (sample, sequence_id) in pairs]
+
+
+# Get the length of the shortest contig of the longest contigs holding half of the assembled bases.
+def n50(contigs):
+    lengths = sorted((len(contig.sequence) for contig in contigs), reverse=True)
+    (half, total) = (sum(lengths) / 2, 0)
+    for length in lengths:
+        total += length
+        if total >= half:
+            return length
+    return 0
+
+
+def main(*counts):
+    print(
+        f"{'reads':>9} {'graph s':>8} {'edges':>10} {'graph MB':>9} {'assembly s':>11} {'contigs':>8} {'N50':>6}"
+        f" {'all pairs s (est.)':>19}"
+    )
+    for count in counts or READ_COUNTS:
+        db = SequenceDb()
+        db.insert_many(sample_reads(count))
+        (graph, graph_seconds) = timed(db.build_overlap_graph, MINIMUM_OVERLAP)
+        (contigs, assembly_seconds) = timed(db.assemble, graph)
+
+        generator = random.Random(11)
+        ids = list(db.database)
+        pairs = [(db.get(generator.choice(ids)), generator.choice(ids)) for _ in range(SAMPLED_PAIRS)]
+        (_, pairs_seconds) = timed(check_pairs, db, pairs)
+        all_pairs_seconds = pairs_seconds / SAMPLED_PAIRS * len(ids) * len(ids)
+
+        print(
+            f"{len(ids):>9} {graph_seconds:>8.1f} {graph.edge_count():>10} {graph.memory_size() / 1024 / 1024:>9.1f}"
+            f" {assembly_seconds:>11.1f} {len(contigs):>8} {n50(contigs):>6} {all_pairs_seconds:>19.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,45 @@
+#
+# Multi-process find benchmark.
+# Measures the speedup of the "ParallelFinder" over "SequenceDb.find" for an increasing number of worker processes.
+#
+#     > python -m benchmarks.benchmark_parallel_find [count] [length] [chunk_size]
+#
+
+import os
+import sys
+
+from benchmarks.common import random_sequences, timed
+from parallel_find import ParallelFinder
+from sequence_db import SequenceDb
+
+SAMPLE_LENGTH = 12
+REPEATS = 5
+
+
+def find_repeatedly(find, samples):
+    for sample in samples:
+        find(sample)
+
+
+def main(count=100_000, length=200, chunk_size=5_000):
+    db = SequenceDb()
+    for sequence in random_sequences(count, length):
+        db.insert(sequence)
+    samples = random_sequences(REPEATS, SAMPLE_LENGTH, seed=1)
+
+    (_, scan_seconds) = timed(find_repeatedly, db.find, samples)
+    print(f"{'workers':>8} {'ms/find':>9} {'speedup':>8}")
+    print(f"{'scan':>8} {scan_seconds * 1000 / REPEATS:>9.1f} {1:>8.2f}")
+
+    workers = 1
+    while workers <= os.cpu_count():
+        with ParallelFinder(db, workers=workers, chunk_size=chunk_size) as finder:
+            # Warm up the worker processes.
+            finder.find(samples[0])
+            (_, seconds) = timed(find_repeatedly, finder.find, samples)
+        print(f"{workers:>8} {seconds * 1000 / REPEATS:>9.1f} {scan_seconds / seconds:>8.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
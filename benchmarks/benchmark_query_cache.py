@@ -0,0 +1,44 @@
+#
+# Query cache benchmark.
+# Repeatedly searches a small set of samples (like common primers) while new sequences are inserted,
+# with and without the query caches.
+#
+#     > python -m benchmarks.benchmark_query_cache [count] [length] [queries]
+#
+
+import sys
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+SAMPLE_COUNT = 50
+SAMPLE_LENGTH = 10
+# One insertion every INSERT_INTERVAL queries.
+INSERT_INTERVAL = 10
+
+
+def workload(db, samples, new_sequences, queries):
+    for query in range(queries):
+        if query % INSERT_INTERVAL == 0:
+            db.insert(new_sequences[query // INSERT_INTERVAL])
+        db.find(samples[query % len(samples)])
+        db.overlap(samples[query % len(samples)], "1")
+
+
+def main(count=10_000, length=200, queries=2_000):
+    sequences = random_sequences(count, length)
+    samples = random_sequences(SAMPLE_COUNT, SAMPLE_LENGTH, seed=1)
+    new_sequences = random_sequences(queries // INSERT_INTERVAL + 1, length, seed=2)
+
+    print(f"{'cache size':>10} {'seconds':>8} {'find hits':>10} {'find misses':>12}")
+    for cache_size in [None, 10, SAMPLE_COUNT]:
+        db = SequenceDb(cache_size=cache_size)
+        db.insert_many(sequences)
+        (_, seconds) = timed(workload, db, samples, new_sequences, queries)
+        stats = db.cache_stats()
+        (hits, misses) = (stats["find"].hits, stats["find"].misses) if stats else (0, queries)
+        print(f"{cache_size or 0:>10} {seconds:>8.2f} {hits:>10} {misses:>12}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,63 @@
+#
+# Server load generator benchmark.
+# Clients connected to an in-process server send pipelined "find" requests, and the throughput is compared
+# with and without the coalescing of the concurrent finds into batches, without index and with a k-mer index
+# (whose samples are looked up one by one instead of being scanned together).
+#
+#     > python -m benchmarks.benchmark_server [count] [length] [requests]
+#
+
+import asyncio
+import sys
+import time
+
+from benchmarks.common import random_sequences
+from sequence_db import SequenceDb
+from sequence_db_client import SequenceDbClient
+from sequence_db_server import SequenceDbServer
+
+CLIENT_COUNTS = [1, 4, 16]
+PIPELINE_DEPTH = 32
+SAMPLE_LENGTH = 6
+
+
+# Send requests from a client, keeping up to PIPELINE_DEPTH requests in flight.
+async def load(client, samples):
+    for first in range(0, len(samples), PIPELINE_DEPTH):
+        await asyncio.gather(*(client.find(sample) for sample in samples[first:first + PIPELINE_DEPTH]))
+
+
+# Returns a tuple (<requests per second>, <number of scans>).
+async def run(db, max_batch_size, client_count, requests):
+    server = SequenceDbServer(db, max_batch_size=max_batch_size)
+    port = await server.start(port=0)
+    clients = [await SequenceDbClient.connect(port=port) for _ in range(client_count)]
+    # Each client searches its own samples.
+    samples = [random_sequences(requests // client_count, SAMPLE_LENGTH, seed=seed) for seed in range(client_count)]
+    start = time.perf_counter()
+    await asyncio.gather(*(load(client, client_samples) for (client, client_samples) in zip(clients, samples)))
+    seconds = time.perf_counter() - start
+    for client in clients:
+        await client.close()
+    await server.close()
+    return (sum(len(client_samples) for client_samples in samples) / seconds, server.finds.scan_count)
+
+
+def main(count=5_000, length=200, requests=2_000):
+    sequences = random_sequences(count, length)
+    databases = [
+        ("scan", SequenceDb(thread_safe=True)),
+        ("k-mer", SequenceDb(kmer_size=SAMPLE_LENGTH, thread_safe=True))
+    ]
+
+    print(f"{'index':>6} {'clients':>8} {'unbatched req/s':>16} {'batched req/s':>14} {'scans':>6}")
+    for (name, db) in databases:
+        db.insert_many(sequences)
+        for client_count in CLIENT_COUNTS:
+            (unbatched, _) = asyncio.run(run(db, 1, client_count, requests))
+            (batched, scans) = asyncio.run(run(db, 1024, client_count, requests))
+            print(f"{name:>6} {client_count:>8} {unbatched:>16.0f} {batched:>14.0f} {scans:>6}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
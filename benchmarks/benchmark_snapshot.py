@@ -0,0 +1,45 @@
+#
+# Snapshot benchmark.
+# Compares the startup time of a database re-inserting all its sequences with the time to open a snapshot,
+# and the duration of "find" on the opened snapshot.
+#
+#     > python -m benchmarks.benchmark_snapshot [count] [length]
+#
+
+import os
+import sys
+import tempfile
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+SAMPLE_LENGTH = 12
+
+
+def insert_all(sequences):
+    db = SequenceDb()
+    for sequence in sequences:
+        db.insert(sequence)
+    return db
+
+
+def main(count=100_000, length=200):
+    sequences = random_sequences(count, length)
+    (db, insert_seconds) = timed(insert_all, sequences)
+    sample = sequences[count // 2][:SAMPLE_LENGTH]
+    print(f"re-insert all sequences: {insert_seconds * 1000:.0f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for packed in (False, True):
+            path = os.path.join(directory, f"db-{packed}.snapshot")
+            (_, save_seconds) = timed(db.save, path, packed)
+            (opened_db, open_seconds) = timed(SequenceDb.open, path)
+            (_, find_seconds) = timed(opened_db.find, sample)
+            print(f"{'packed' if packed else 'text'} snapshot: {os.path.getsize(path) / 1_000_000:.1f} MB, "
+                  f"save {save_seconds * 1000:.0f} ms, open {open_seconds * 1000:.2f} ms, "
+                  f"find {find_seconds * 1000:.1f} ms")
+            opened_db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,42 @@
+#
+# Storage engine benchmark.
+# Compares the memory used by the string and the packed storage engines, and the duration of "find" on each.
+#
+#     > python -m benchmarks.benchmark_storage [count] [length]
+#
+
+import sys
+import tracemalloc
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+from sequence_storage import PackedStorage, StringStorage
+
+SAMPLE_LENGTHS = [4, 8, 16, 32]
+
+
+def load(storage, sequences):
+    tracemalloc.start()
+    db = SequenceDb(storage)
+    for sequence in sequences:
+        db.insert(sequence)
+    (memory, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (db, memory)
+
+
+def main(count=20_000, length=200):
+    sequences = random_sequences(count, length)
+    bases = count * length
+    samples = [sequence[10:10 + sample_length] for sequence in sequences[:1] for sample_length in SAMPLE_LENGTHS]
+
+    for storage_type in (StringStorage, PackedStorage):
+        (db, memory) = load(storage_type(), sequences)
+        print(f"{storage_type.__name__}: {memory / 1_000_000:.1f} MB ({memory / bases:.2f} bytes/base)")
+        for sample in samples:
+            (_, seconds) = timed(db.find, sample)
+            print(f"  find sample length {len(sample):>3}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
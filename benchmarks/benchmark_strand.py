@@ -0,0 +1,62 @@
+#
+# Reverse complement find benchmark.
+# Compares searching both strands of samples with two "find" (the sample and its reverse complement) and
+# with a single "find" on both strands, without index and with forward or canonical k-mer indexes (the candidates
+# of the packed storage being verified in the packed bytes).
+#
+#     > python -m benchmarks.benchmark_strand [count] [length]
+#
+
+import random
+import sys
+
+from benchmarks.common import random_sequences, timed
+from dna_utilities import reverse_complement
+from sequence_db import SequenceDb, Strand
+from sequence_storage import PackedStorage
+
+SAMPLE_LENGTH = 12
+SAMPLE_COUNT = 200
+
+
+# Take samples from the sequences, half of them from the opposite strand.
+def samples_of(sequences):
+    generator = random.Random(5)
+    samples = []
+    for (index, sequence) in enumerate(generator.sample(sequences, SAMPLE_COUNT)):
+        start = generator.randrange(len(sequence) - SAMPLE_LENGTH + 1)
+        sample = sequence[start:start + SAMPLE_LENGTH]
+        samples.append(reverse_complement(sample) if index % 2 else sample)
+    return samples
+
+
+def find_twice(db, samples):
+    return [set(db.find(sample)) | set(db.find(reverse_complement(sample))) for sample in samples]
+
+
+def find_both(db, samples):
+    return [{match.sequence_id for match in db.find(sample, Strand.BOTH)} for sample in samples]
+
+
+def main(count=20_000, length=200):
+    sequences = random_sequences(count, length)
+    samples = samples_of(sequences)
+    databases = [
+        ("scan", SequenceDb()),
+        ("k-mer", SequenceDb(kmer_size=8)),
+        ("canonical k-mer", SequenceDb(kmer_size=8, canonical_kmers=True)),
+        ("packed canonical", SequenceDb(PackedStorage(), kmer_size=8, canonical_kmers=True))
+    ]
+
+    print(f"{'index':>16} {'k-mers':>9} {'2 finds ms':>11} {'both ms':>9}")
+    for (name, db) in databases:
+        db.insert_many(sequences)
+        (expected, twice_seconds) = timed(find_twice, db, samples)
+        (found, both_seconds) = timed(find_both, db, samples)
+        assert expected == found
+        kmer_count = len(db._kmer_index) if db._kmer_index is not None else 0
+        print(f"{name:>16} {kmer_count:>9} {twice_seconds * 1000:>11.1f} {both_seconds * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
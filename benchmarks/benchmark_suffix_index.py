@@ -0,0 +1,38 @@
+#
+# Full-text index benchmark.
+# Reports the build time and memory footprint of the suffix array index, and compares
+# the duration of "find" with and without the index for different sample lengths.
+#
+#     > python -m benchmarks.benchmark_suffix_index [count] [length]
+#
+
+import sys
+
+from benchmarks.common import random_sequences, timed
+from sequence_db import SequenceDb
+
+SAMPLE_LENGTHS = [4, 8, 16, 32, 64, 128]
+
+
+def main(count=5_000, length=200):
+    sequences = random_sequences(count, length)
+    scan_db = SequenceDb()
+    indexed_db = SequenceDb()
+    for sequence in sequences:
+        scan_db.insert(sequence)
+        indexed_db.insert(sequence)
+
+    (index, build_seconds) = timed(indexed_db.build_index)
+    print(f"index built in {build_seconds:.1f} s, {index.memory_size() / 1_000_000:.1f} MB")
+
+    print(f"{'sample length':>14} {'scan ms':>9} {'index ms':>9} {'matches':>8}")
+    for sample_length in SAMPLE_LENGTHS:
+        sample = sequences[count // 2][:sample_length]
+        (scan_ids, scan_seconds) = timed(scan_db.find, sample)
+        (indexed_ids, indexed_seconds) = timed(indexed_db.find, sample)
+        assert scan_ids == indexed_ids
+        print(f"{sample_length:>14} {scan_seconds * 1000:>9.2f} {indexed_seconds * 1000:>9.2f} {len(scan_ids):>8}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,40 @@
+#
+# Sequence validation benchmark.
+# Compares "is_valid_sequence" with the previous character by character validation, for growing sequences.
+#
+#     > python -m benchmarks.benchmark_validation [count]
+#
+
+import sys
+
+from benchmarks.common import random_sequences, timed
+from dna_utilities import DNA_BASES, is_valid_sequence, validate_sequences
+
+LENGTHS = [100, 10_000, 1_000_000]
+
+
+# The validation used before "is_valid_sequence" translated the encoded sequence.
+def is_valid_sequence_per_character(sequence):
+    if not sequence or not isinstance(sequence, str):
+        return False
+    return all(c in DNA_BASES for c in sequence.upper())
+
+
+def validate_each(validate, sequences):
+    return [validate(sequence) for sequence in sequences]
+
+
+def main(count=100):
+    print(f"{'length':>10} {'per char ms':>12} {'translate ms':>13} {'batch ms':>9}")
+    for length in LENGTHS:
+        sequences = random_sequences(max(1, count * 100 // length), length)
+        (expected, per_character_seconds) = timed(validate_each, is_valid_sequence_per_character, sequences)
+        (results, translate_seconds) = timed(validate_each, is_valid_sequence, sequences)
+        (positions, batch_seconds) = timed(validate_sequences, sequences)
+        assert results == expected == [position is None for position in positions]
+        print(f"{length:>10} {per_character_seconds * 1000:>12.2f} {translate_seconds * 1000:>13.2f} "
+              f"{batch_seconds * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,36 @@
+#
+# Helpers shared by the benchmark scripts.
+# The benchmarks are executed from the repository root, for example:
+#
+#     > python -m benchmarks.benchmark_insert
+#
+
+import random
+import time
+
+from dna_utilities import DNA_BASES
+
+
+# Generate random DNA sequences.
+# The generator is seeded so that every run uses the same sequences.
+#
+# Params:
+# - count: the number of sequences to generate
+# - length: the length of each sequence
+# - seed: the seed of the random generator
+# Returns a list of uppercase DNA sequences.
+def random_sequences(count, length, seed=42):
+    generator = random.Random(seed)
+    return ["".join(generator.choices(DNA_BASES, k=length)) for _ in range(count)]
+
+
+# Execute a function and measure its duration.
+#
+# Params:
+# - function: the function to execute
+# - args: the arguments passed to the function
+# Returns a tuple (<function result>, <elapsed seconds>).
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return (result, time.perf_counter() - start)
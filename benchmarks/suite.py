@@ -0,0 +1,180 @@
+#
+# Benchmark suite of the DNA sequence database.
+#
+# Runs a fixed set of scenarios (insert, duplicate insert, get, find, overlap) on seeded workloads of random
+# and repetitive sequences (see "workload.py"), and writes the results as JSON. Each scenario is run several
+# times and its shortest duration is kept (like "timeit", the other runs being slowed down by noise). Given the
+# results of a previous run, the scenarios which got slower than a threshold are flagged as regressions, and the
+# exit status is 1.
+#
+#     > python -m benchmarks.suite --output results.json
+#     > python -m benchmarks.suite --baseline results.json
+#
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from benchmarks.workload import KINDS, WorkloadGenerator
+from sequence_db import SequenceDb
+from sharded_sequence_db import ShardedSequenceDb
+
+FIND_SAMPLE_LENGTHS = [4, 8, 16, 32]
+OVERLAP_SAMPLE_LENGTH = 20
+
+# By default, a scenario at least 20% slower than its baseline is a regression.
+DEFAULT_THRESHOLD = 0.2
+
+
+# The operations of a scenario, applied to a database prepared beforehand.
+class Scenario:
+
+    # Params:
+    # - name: the name of the scenario
+    # - setup: a function returning the database the operations are applied to
+    # - operation: a function applied to the database and one argument
+    # - arguments: the arguments of each operation
+    def __init__(self, name, setup, operation, arguments):
+        self.name = name
+        self.setup = setup
+        self.operation = operation
+        self.arguments = arguments
+
+    # Run the scenario.
+    # Returns a tuple (<elapsed seconds>, <list of the results of the operations>).
+    def run(self):
+        db = self.setup()
+        operation = self.operation
+        start = time.perf_counter()
+        results = [operation(db, argument) for argument in self.arguments]
+        return (time.perf_counter() - start, results)
+
+
+# Build the scenarios of a workload.
+#
+# Params:
+# - kind: the kind of sequences (see "workload.py")
+# - arguments: the parsed command line arguments
+# Returns a list of Scenario.
+def scenarios(kind, arguments):
+    generator = WorkloadGenerator(arguments.seed)
+    sequences = generator.sequences(kind, arguments.count, arguments.length)
+
+    def new_db():
+        if arguments.shard_prefix_length:
+            return ShardedSequenceDb(arguments.shard_prefix_length, kmer_size=arguments.kmer_size)
+        return SequenceDb(kmer_size=arguments.kmer_size)
+
+    loaded_db = new_db()
+    ids = [sequence_id for (_, sequence_id) in loaded_db.insert_many(sequences)]
+    loaded = lambda: loaded_db
+
+    result = [
+        Scenario(f"{kind}/insert", new_db, lambda db, sequence: db.insert(sequence), sequences),
+        Scenario(f"{kind}/insert_duplicate", loaded, lambda db, sequence: db.insert(sequence), sequences),
+        Scenario(f"{kind}/get", loaded, lambda db, sequence_id: db.get(sequence_id), ids),
+    ]
+    for sample_length in FIND_SAMPLE_LENGTHS:
+        samples = generator.samples(sequences, arguments.queries, sample_length)
+        result.append(Scenario(f"{kind}/find_{sample_length}", loaded, lambda db, sample: db.find(sample), samples))
+    overlap_samples = generator.overlap_samples(list(zip(ids, sequences)), arguments.queries, OVERLAP_SAMPLE_LENGTH)
+    result.append(Scenario(
+        f"{kind}/overlap", loaded, lambda db, sample: db.overlap(*sample), overlap_samples
+    ))
+    return result
+
+
+# Run all the scenarios.
+# Returns a dictionary associating each scenario name to its results.
+def run_all(arguments):
+    results = {}
+    for kind in arguments.kinds:
+        for scenario in scenarios(kind, arguments):
+            durations = []
+            for _ in range(arguments.repeat):
+                (seconds, outputs) = scenario.run()
+                durations.append(seconds)
+            seconds = min(durations)
+            results[scenario.name] = {
+                "operations": len(scenario.arguments),
+                "seconds": seconds,
+                "operations_per_second": len(scenario.arguments) / seconds if seconds else None
+            }
+            if scenario.name.split("/")[1].startswith("find"):
+                # The fraction of the database matched by each sample, on average.
+                matched = sum(len(output) for output in outputs) / len(outputs)
+                results[scenario.name]["selectivity"] = matched / arguments.count
+            print(f"{scenario.name:<30} {seconds * 1000:>10.1f} ms", file=sys.stderr)
+    return results
+
+
+# Compare results with a baseline.
+#
+# Params:
+# - results: the results of the current run
+# - baseline: the results of the baseline run
+# - threshold: the relative slowdown flagged as a regression
+# Returns the list of (<scenario name>, <duration ratio with the baseline>) tuples of the regressions.
+def regressions(results, baseline, threshold):
+    slower = []
+    print(f"{'scenario':<30} {'baseline ms':>12} {'current ms':>11} {'ratio':>6}")
+    for (name, result) in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["seconds"] / baseline[name]["seconds"]
+        flag = ""
+        if ratio > 1 + threshold:
+            slower.append((name, ratio))
+            flag = " REGRESSION"
+        print(f"{name:<30} {baseline[name]['seconds'] * 1000:>12.1f} {result['seconds'] * 1000:>11.1f} "
+              f"{ratio:>6.2f}{flag}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DNA sequence database benchmark suite")
+    parser.add_argument("--count", type=int, default=10_000, help="the number of sequences")
+    parser.add_argument("--length", type=int, default=200, help="the length of the sequences")
+    parser.add_argument("--queries", type=int, default=200, help="the number of samples per find/overlap scenario")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS, help="the kinds of sequences")
+    parser.add_argument("--kmer-size", type=int, help="the length of the indexed k-mers (no k-mer index if omitted)")
+    parser.add_argument("--shard-prefix-length", type=int, default=0,
+                        help="shard the database on the first bases of the sequences (no sharding if 0)")
+    parser.add_argument("--seed", type=int, default=42, help="the seed of the workload generator")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of runs of each scenario")
+    parser.add_argument("--output", help="the JSON file receiving the results (standard output if omitted)")
+    parser.add_argument("--baseline", help="the JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="the relative slowdown flagged as a regression")
+    arguments = parser.parse_args()
+
+    report = {
+        "config": {
+            name: getattr(arguments, name) for name in (
+                "count", "length", "queries", "kinds", "kmer_size", "shard_prefix_length", "seed"
+            )
+        },
+        "python": platform.python_version(),
+        "results": run_all(arguments)
+    }
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=2)
+    elif not arguments.baseline:
+        print(json.dumps(report, indent=2))
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)
+        if baseline["config"] != report["config"]:
+            print("WARNING - The baseline was run with a different configuration", file=sys.stderr)
+        slower = regressions(report["results"], baseline["results"], arguments.threshold)
+        if slower:
+            print(f"{len(slower)} regression(s) above {arguments.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
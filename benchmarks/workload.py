@@ -0,0 +1,120 @@
+#
+# Seeded workload generator for the benchmarks.
+#
+# Two kinds of sequences are generated:
+# - "random": independent, uniformly random sequences (see "common.random_sequences").
+# - "repetitive": reads sampled from a synthetic genome made of random regions, tandem repeats of short motifs,
+#   homopolymer runs and mutated copies of a few interspersed repeat elements. Like real reads, they share
+#   low-complexity regions and overlap each other.
+#
+# The same seed always generates the same workload.
+#
+
+import random
+
+from dna_utilities import DNA_BASES
+
+# The kinds of sequences generated.
+RANDOM = "random"
+REPETITIVE = "repetitive"
+KINDS = [RANDOM, REPETITIVE]
+
+# Genome coverage of the repetitive reads.
+COVERAGE = 2
+
+# Number and length of the interspersed repeat elements, and the fraction of bases mutated in each copy.
+REPEAT_ELEMENT_COUNT = 5
+REPEAT_ELEMENT_LENGTH = 300
+REPEAT_MUTATION_RATE = 0.02
+
+
+class WorkloadGenerator:
+
+    # Params:
+    # - seed: the seed of the random generator
+    def __init__(self, seed=42):
+        self.seed = seed
+        self._random = random.Random(seed)
+
+    def _bases(self, length):
+        return "".join(self._random.choices(DNA_BASES, k=length))
+
+    # Generate sequences.
+    #
+    # Params:
+    # - kind: RANDOM or REPETITIVE
+    # - count: the number of sequences
+    # - length: the length of each sequence
+    # Returns a list of uppercase DNA sequences.
+    def sequences(self, kind, count, length):
+        if kind == RANDOM:
+            return [self._bases(length) for _ in range(count)]
+        if kind == REPETITIVE:
+            genome = self.genome(max(length, count * length // COVERAGE))
+            starts = [self._random.randrange(len(genome) - length + 1) for _ in range(count)]
+            return [genome[start:start + length] for start in starts]
+        raise ValueError(f"Invalid workload kind: [{kind}]")
+
+    # Generate a synthetic genome with repeats and low-complexity regions.
+    #
+    # Params:
+    # - length: the length of the genome
+    # Returns the genome.
+    def genome(self, length):
+        elements = [self._bases(REPEAT_ELEMENT_LENGTH) for _ in range(REPEAT_ELEMENT_COUNT)]
+        parts = []
+        size = 0
+        while size < length:
+            choice = self._random.random()
+            if choice < 0.5:
+                part = self._bases(self._random.randint(50, 500))
+            elif choice < 0.7:
+                motif = self._bases(self._random.randint(1, 6))
+                part = motif * (self._random.randint(20, 200) // len(motif))
+            elif choice < 0.8:
+                part = self._random.choice(DNA_BASES) * self._random.randint(10, 60)
+            else:
+                part = self._mutate(self._random.choice(elements))
+            parts.append(part)
+            size += len(part)
+        return "".join(parts)[:length]
+
+    def _mutate(self, sequence):
+        bases = list(sequence)
+        for _ in range(int(len(bases) * REPEAT_MUTATION_RATE)):
+            bases[self._random.randrange(len(bases))] = self._random.choice(DNA_BASES)
+        return "".join(bases)
+
+    # Draw samples from sequences.
+    #
+    # Params:
+    # - sequences: the sequences to sample from
+    # - count: the number of samples
+    # - length: the length of each sample (at most the length of the sequences)
+    # Returns a list of samples, each one a substring of one of the sequences.
+    def samples(self, sequences, count, length):
+        samples = []
+        for _ in range(count):
+            sequence = self._random.choice(sequences)
+            start = self._random.randint(0, max(0, len(sequence) - length))
+            samples.append(sequence[start:start + length])
+        return samples
+
+    # Draw samples overlapping the ends of sequences.
+    #
+    # Params:
+    # - sequences: a list of (<sequence ID>, <sequence>) tuples
+    # - count: the number of samples
+    # - length: the length of each sample
+    # Returns a list of (<sample>, <sequence ID>) tuples, half of them overlapping the prefix of the sequence,
+    # half of them its suffix.
+    def overlap_samples(self, sequences, count, length):
+        samples = []
+        for index in range(count):
+            (sequence_id, sequence) = self._random.choice(sequences)
+            overlap = self._random.randint(1, min(length, len(sequence)))
+            if index % 2:
+                samples.append((self._bases(length - overlap) + sequence[:overlap], sequence_id))
+            else:
+                samples.append((sequence[-overlap:] + self._bases(length - overlap), sequence_id))
+        return samples
@@ -0,0 +1,185 @@
+#
+# Per-sequence Bloom filters prefiltering the sequences searched by "find".
+#
+# The k-mers of every stored sequence are hashed into a Bloom filter, a bit array of "m" bits where each k-mer
+# sets "h" bits. A sequence can only contain a sample if it contains every k-mer of the sample, so if one of the
+# bits of the sample's k-mers is not set in the filter of a sequence, the sequence is rejected without scanning it.
+#
+# The filter of a sequence is kept as a Python integer. The bits of all the k-mers of a sample are combined once
+# into a mask, so checking a sequence is a single "filter & mask == mask" whatever the length of the sample.
+# The size of a filter is a power of two (a mask is built for each size in use), large enough for the false
+# positive rate of a single k-mer lookup to stay below the requested rate, unless it exceeds the memory budget.
+#
+# The filters pay off the most for long sequences: a filter holds a few bits per base, so checking it costs much
+# less than scanning the sequence. Building them costs a few hashes per k-mer at insert time.
+#
+
+import math
+import threading
+from collections import namedtuple
+
+from kmer_index import kmers
+
+# The default length of the hashed k-mers.
+DEFAULT_KMER_SIZE = 12
+
+# The default false positive rate of a k-mer lookup in a filter.
+# A sample is only accepted if all its k-mers are found, so the false positive rate of a sample is much lower
+# (a sample of 20 bases has 9 k-mers of 12 bases), while each halving of the rate costs one more hash per k-mer.
+DEFAULT_FALSE_POSITIVE_RATE = 0.1
+
+# The size (in bits) of the smallest filter.
+MIN_FILTER_BITS = 64
+
+# The statistics of a prefilter:
+# - queries: the number of prefiltered searches
+# - checked: the number of sequences checked against their filter
+# - rejected: the number of sequences rejected by their filter
+# - false_positives: the number of sequences accepted by their filter that didn't contain the sample
+# - filters: the number of filters (one per sequence)
+# - memory_size: the number of bytes of the filters
+PrefilterStats = namedtuple(
+    "PrefilterStats", ["queries", "checked", "rejected", "false_positives", "filters", "memory_size"]
+)
+
+
+# Hash k-mers into a Bloom filter, with double hashing: the i-th bit of a k-mer is (a + i * b) mod m,
+# where a and b are the two halves of the hash of the k-mer.
+#
+# Params:
+# - kmers: the k-mers to hash
+# - size: the number of bits of the filter (a power of two)
+# - hashes: the number of bits set by each k-mer
+# Returns the bits of the filter, as an integer.
+def bloom_bits(kmers, size, hashes):
+    mask = size - 1
+    bits = bytearray(size // 8)
+    for kmer in kmers:
+        value = hash(kmer)
+        (first, step) = (value & 0xFFFFFFFF, (value >> 32) | 1)
+        for index in range(hashes):
+            position = (first + index * step) & mask
+            bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+class BloomPrefilter:
+
+    # Params:
+    # - k: the length of the hashed k-mers
+    # - false_positive_rate: the target false positive rate of a k-mer lookup in a filter
+    # - max_bits_per_base: the memory budget of a filter, in bits per base of its sequence (no budget if None).
+    #   A filter over budget is shrunk, at the cost of a higher false positive rate.
+    def __init__(self, k=DEFAULT_KMER_SIZE, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE, max_bits_per_base=None):
+        if k < 1:
+            raise ValueError(f"Invalid k-mer size: [{k}]")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"Invalid false positive rate: [{false_positive_rate}]")
+        if max_bits_per_base is not None and max_bits_per_base <= 0:
+            raise ValueError(f"Invalid memory budget: [{max_bits_per_base}]")
+        self.k = k
+        self.false_positive_rate = false_positive_rate
+        self.max_bits_per_base = max_bits_per_base
+        # The optimal number of bits set by each k-mer for the false positive rate.
+        self.hashes = max(1, round(-math.log2(false_positive_rate)))
+        # The (<size>, <bits>) filter of each sequence.
+        self._filters = {}
+        self._memory_size = 0
+        self.queries = 0
+        self.checked = 0
+        self.rejected = 0
+        self.false_positives = 0
+        # The counters are updated by the readers of a thread-safe database, which run concurrently.
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._filters)
+
+    # Get the size of the filter of a sequence: the smallest power of two giving the target false positive rate,
+    # within the memory budget.
+    #
+    # Params:
+    # - length: the length of the sequence
+    # - kmer_count: the number of distinct k-mers of the sequence
+    # Returns the number of bits of the filter.
+    def filter_size(self, length, kmer_count):
+        needed = math.ceil(kmer_count * self.hashes / math.log(2))
+        size = max(MIN_FILTER_BITS, 1 << max(0, needed - 1).bit_length())
+        if self.max_bits_per_base is not None:
+            budget = self.max_bits_per_base * length
+            if size > budget:
+                size = max(MIN_FILTER_BITS, 1 << (max(1, int(budget)).bit_length() - 1))
+        return size
+
+    # Build the filter of a sequence.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the uppercase DNA sequence
+    def add(self, sequence_id, sequence):
+        sequence_kmers = kmers(sequence, self.k)
+        size = self.filter_size(len(sequence), len(sequence_kmers))
+        self.remove(sequence_id)
+        self._filters[sequence_id] = (size, bloom_bits(sequence_kmers, size, self.hashes))
+        self._memory_size += size // 8
+
+    # Drop the filter of a sequence.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    def remove(self, sequence_id):
+        removed = self._filters.pop(sequence_id, None)
+        if removed is not None:
+            self._memory_size -= removed[0] // 8
+
+    # Keep the sequences that may contain one of the samples, according to their filters.
+    #
+    # Params:
+    # - samples: the uppercase DNA samples
+    # - ids: the IDs of the sequences to check, in insertion order
+    # Returns the list of the IDs of the sequences that may contain a sample, in the same order,
+    # or None if a sample is too short to be looked up in the filters.
+    def filter(self, samples, ids):
+        if any(len(sample) < self.k for sample in samples):
+            return None
+        sample_kmers = [kmers(sample, self.k) for sample in samples]
+        # The masks of the samples, for each filter size.
+        masks = {}
+        filters = self._filters
+        passed = []
+        checked = 0
+        for id in ids:
+            (size, bits) = filters[id]
+            sample_masks = masks.get(size)
+            if sample_masks is None:
+                sample_masks = masks[size] = [bloom_bits(kmer_set, size, self.hashes) for kmer_set in sample_kmers]
+            checked += 1
+            for mask in sample_masks:
+                if bits & mask == mask:
+                    passed.append(id)
+                    break
+        with self._lock:
+            self.queries += 1
+            self.checked += checked
+            self.rejected += checked - len(passed)
+        return passed
+
+    # Record the sequences accepted by their filter that didn't contain the sample.
+    #
+    # Params:
+    # - count: the number of false positives
+    def record_false_positives(self, count):
+        with self._lock:
+            self.false_positives += count
+
+    # Get the number of bytes of the filters.
+    def memory_size(self):
+        return self._memory_size
+
+    # Get the statistics of the prefilter.
+    # Returns the PrefilterStats.
+    def stats(self):
+        with self._lock:
+            return PrefilterStats(
+                self.queries, self.checked, self.rejected, self.false_positives, len(self._filters), self._memory_size
+            )
@@ -5,9 +5,20 @@
 # The DNA bases
 DNA_BASES = "ACGT"
 
+# The characters accepted in a sequence, in any case.
+# No other character becomes a DNA base once uppercased, so checking these characters is the same as checking
+# the uppercased sequence against "DNA_BASES".
+_VALID_CHARACTERS = DNA_BASES + DNA_BASES.lower()
+_VALID_BYTES = _VALID_CHARACTERS.encode()
+
+# Translation table marking the invalid bytes of an ASCII sequence with a 1 (and the valid ones with a 0).
+_INVALID_BYTES = bytes(0 if byte in _VALID_BYTES else 1 for byte in range(256))
+
 # Determine if a sequence is valid.
 # A valid sequence is a string that contains at least one character and only consists of 
 # characters among "DNA_BASES".
+# The valid bytes are deleted from the encoded sequence in a single native pass ("bytes.translate"),
+# leaving nothing only for a valid sequence.
 #
 # Params:
 # - sequence: the DNA sequence to validate
@@ -16,12 +27,121 @@ def is_valid_sequence(sequence):
     if not sequence or not isinstance(sequence, str):
         return False
 
-    return all(c in DNA_BASES for c in sequence.upper())
+    return sequence.isascii() and not sequence.encode().translate(None, _VALID_BYTES)
+
+
+# Find the first invalid base of a sequence.
+#
+# Params:
+# - sequence: the DNA sequence to validate
+# Returns the position of the first invalid base, 0 for an empty sequence or a value which is not a string,
+# or None if the sequence is valid.
+def first_invalid_position(sequence):
+    if not sequence or not isinstance(sequence, str):
+        return 0
+
+    if sequence.isascii():
+        position = sequence.encode().translate(_INVALID_BYTES).find(1)
+    else:
+        position = len(sequence) - len(sequence.lstrip(_VALID_CHARACTERS))
+    return None if position in (-1, len(sequence)) else position
+
+
+# Validate many sequences at once.
+#
+# Params:
+# - sequences: an iterable of DNA sequences to validate
+# Returns a list with, for each sequence in the same order, the position of its first invalid base
+# (see "first_invalid_position"), or None if the sequence is valid.
+def validate_sequences(sequences):
+    return [first_invalid_position(sequence) for sequence in sequences]
+
+
+# Translation table complementing the bases (in any case).
+_COMPLEMENTS = str.maketrans("ACGTacgt", "TGCAtgca")
+
+
+# Get the reverse complement of a sequence: the sequence of the opposite DNA strand, read in the same direction.
+# The bases are complemented by a single translation and reversed by slicing, both done natively.
+#
+# Params:
+# - sequence: the DNA sequence
+# Returns the reverse complement, in the same case as the sequence.
+def reverse_complement(sequence):
+    return sequence.translate(_COMPLEMENTS)[::-1]
+
+
+# Compute the prefix function (KMP failure function) of a string.
+# For each position i, the value is the length of the longest proper prefix of string[:i + 1]
+# that is also a suffix of string[:i + 1].
+#
+# Params:
+# - string: the string to process
+# Returns the list of prefix function values.
+def prefix_function(string):
+    values = [0] * len(string)
+    length = 0
+    for i in range(1, len(string)):
+        while length and string[i] != string[length]:
+            length = values[length - 1]
+        if string[i] == string[length]:
+            length += 1
+        values[i] = length
+    return values
+
+
+# Get the smallest period of a string: the smallest shift at which the string matches itself.
+# Two occurrences of a sample in a sequence are always at least this far apart.
+#
+# Params:
+# - string: the string to process
+# Returns the smallest period (the length of the string when it doesn't overlap itself).
+def smallest_period(string):
+    if not string:
+        return 0
+    return len(string) - prefix_function(string)[-1]
+
+
+# Find the lengths of all the overlaps between a suffix of the sample and a prefix of the sequence, in linear time.
+# The prefix function of "<sequence prefix>\0<sample>" gives the longest prefix of the sequence ending the sample,
+# and the shorter overlaps are the borders of that prefix, read from the same prefix function.
+#
+# Params:
+# - sample: the sample to test against the sequence
+# - sequence: the DNA sequence
+# - minimum_overlap: - the minimum length of an accepted overlap sequence
+# Returns the list of overlap lengths, from the longest to the shortest.
+def overlap_prefix_lengths(sample, sequence, minimum_overlap=2):
+    if not sample or not sequence:
+        return []
+
+    # An overlap can't be longer than the sample, nor than the sequence.
+    pattern = sequence[:len(sample)]
+    values = prefix_function(pattern + "\0" + sample[-len(pattern):])
+    lengths = []
+    length = values[-1]
+    while length >= max(minimum_overlap, 1):
+        lengths.append(length)
+        length = values[length - 1]
+    return lengths
+
+
+# Find the lengths of all the overlaps between a prefix of the sample and a suffix of the sequence, in linear time.
+#
+# Params:
+# - sample: the sample to test against the sequence
+# - sequence: the DNA sequence
+# - minimum_overlap: - the minimum length of an accepted overlap sequence
+# Returns the list of overlap lengths, from the longest to the shortest.
+def overlap_suffix_lengths(sample, sequence, minimum_overlap=2):
+    # The suffix of the sequence must match the prefix of the sample: swap their roles.
+    return overlap_prefix_lengths(sequence, sample, minimum_overlap)
 
 
 # Determine if a suffix of the sample (or the whole sample) overlaps 
 # the prefix of the provided sequence (or the whole sequence).
 # This overlap must be at least "minimum_overlap" bases long.
+# When several overlaps exist, the longest one is returned.
 #
 # Params:
 # - sample: the sample to test against the sequence
@@ -29,38 +149,20 @@ def is_valid_sequence(sequence):
 # - minimum_overlap: - the minimum lenght of an accepted overlap sequence
 # Returns the overlap sequence if found, None otherwise.
 def overlap_prefix(sample, sequence, minimum_overlap=2):
-    if not sample or not sequence:
-        return None
-
-    prefix_end = minimum_overlap
-
-    while prefix_end <= len(sample) and prefix_end <= len(sequence):
-        sequence_prefix = sequence[:prefix_end]
-        if sample.endswith(sequence_prefix):
-            return sequence_prefix
-        prefix_end += 1
-
-    return None
+    lengths = overlap_prefix_lengths(sample, sequence, minimum_overlap)
+    return sequence[:lengths[0]] if lengths else None
 
 
 # Determine if a prefix of the sample (or the whole sample) overlaps 
 # the suffix of the provided sequence (or the whole sequence).
 # This overlap must be at least "minimum_overlap" bases long.
+# When several overlaps exist, the longest one is returned.
+#
 # Params:
 # - sample: the sample to test against the sequence
 # - sequence: the DNA sequence
 # - minimum_overlap: - the minimum lenght of an accepted overlap sequence
 # Returns the overlap sequence if found, None otherwise.
 def overlap_suffix(sample, sequence, minimum_overlap=2):
-    if not sample or not sequence:
-        return None
-
-    prefix_end = minimum_overlap
-
-    while prefix_end <= len(sample) and prefix_end <= len(sequence):
-        sequence_prefix = sequence[-prefix_end:]
-        if sample.startswith(sequence_prefix):
-            return sequence_prefix
-        prefix_end += 1
-
-    return None
+    lengths = overlap_suffix_lengths(sample, sequence, minimum_overlap)
+    return sequence[-lengths[0]:] if lengths else None
@@ -0,0 +1,200 @@
+#
+# Durable DNA sequence database.
+#
+# A durable database lives in a directory holding:
+# - "sequences.snapshot": the last checkpoint of the database (see "snapshot.py"),
+# - "sequences.wal": the write-ahead log of the changes made since that checkpoint (see "write_ahead_log.py"),
+# - "sequences.wal.old": while a checkpoint is in progress, the log being merged into the new snapshot.
+#
+# On startup, the snapshot is opened and the logs are replayed on top of it. Replaying a record already in the
+# snapshot has no effect, so a crash at any point of a checkpoint is recovered.
+# A background thread periodically checkpoints the database once the log is large enough, which bounds the
+# recovery time. A checkpoint streams the previous snapshot, with the records of the log applied, into the new
+# snapshot: the sequences are neither collected in memory nor read from the database, whose changes are only
+# blocked while the log is rotated. The database then reads its sequences from the new snapshot, which frees the
+# memory of the sequences stored since the previous one, and closes the mapped file of the previous one.
+#
+
+import os
+import threading
+
+from sequence_db import SequenceDb
+from snapshot import (
+    MappedStorage,
+    write_snapshot
+)
+from write_ahead_log import (
+    DEFAULT_GROUP_SIZE,
+    DEFAULT_MAX_DELAY,
+    FsyncPolicy,
+    LogOperation,
+    WriteAheadLog,
+    read_log
+)
+
+SNAPSHOT_FILE = "sequences.snapshot"
+LOG_FILE = "sequences.wal"
+OLD_LOG_FILE = "sequences.wal.old"
+
+# By default, the log is checkpointed once it reaches 64 MB, checking every 10 seconds.
+DEFAULT_CHECKPOINT_LOG_SIZE = 64 * 1024 * 1024
+DEFAULT_CHECKPOINT_INTERVAL = 10.0
+
+
+# Apply the records of a log to the sequences of a snapshot, with the semantics of "SequenceDb.replay".
+#
+# Params:
+# - storage: the MappedStorage of the snapshot (None if there is no snapshot yet)
+# - records: the list of (LogOperation, sequence ID, sequence) tuples of the log
+# Returns a generator of (<sequence ID>, <uppercase sequence>) tuples, in insertion order.
+def merged_items(storage, records):
+    # The deleted (None) and replaced sequences of the snapshot, and the sequences inserted by the log.
+    changed = {}
+    inserted = {}
+    for (operation, sequence_id, sequence) in records:
+        if sequence_id in inserted:
+            present = True
+        elif sequence_id in changed:
+            present = changed[sequence_id] is not None
+        else:
+            present = storage is not None and sequence_id in storage
+
+        if operation == LogOperation.INSERT and not present:
+            inserted[sequence_id] = sequence
+        elif operation == LogOperation.DELETE and present:
+            if sequence_id in inserted:
+                del inserted[sequence_id]
+            else:
+                changed[sequence_id] = None
+        elif operation == LogOperation.REPLACE and present:
+            if sequence_id in inserted:
+                inserted[sequence_id] = sequence
+            else:
+                changed[sequence_id] = sequence
+
+    if storage is not None:
+        for (sequence_id, sequence) in storage.items():
+            if sequence_id not in changed:
+                yield (sequence_id, sequence)
+            elif changed[sequence_id] is not None:
+                yield (sequence_id, changed[sequence_id])
+    yield from inserted.items()
+
+
+# Merges the write-ahead log of a database into its snapshot.
+class Checkpointer:
+
+    # Params:
+    # - db: the sequence database
+    # - wal: the WriteAheadLog of the database
+    # - directory: the directory of the database
+    # - log_size: the size of the log (in bytes) triggering a checkpoint
+    # - interval: the number of seconds between two checks of the log size (no background checkpoints if None)
+    def __init__(self, db, wal, directory, log_size=DEFAULT_CHECKPOINT_LOG_SIZE,
+                 interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.db = db
+        self.wal = wal
+        self.directory = directory
+        self.log_size = log_size
+        self.interval = interval
+        self._checkpoint_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        if interval is not None:
+            self._thread = threading.Thread(target=self._run, name="checkpointer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            if self.wal.size() >= self.log_size:
+                self.checkpoint()
+
+    # Stop the background checkpoints.
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    # Merge the log into a new snapshot, and switch the database to it.
+    # The database changes are only blocked while the log is rotated, and while the records logged during the
+    # checkpoint are applied to the new snapshot.
+    def checkpoint(self):
+        with self._checkpoint_lock:
+            snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+            old_log_path = os.path.join(self.directory, OLD_LOG_FILE)
+            # The previous snapshot, with the rotated log applied, holds the sequences of the database at the
+            # rotation. It is only replaced by this checkpoint.
+            previous = MappedStorage(snapshot_path) if os.path.exists(snapshot_path) else None
+            try:
+                with self.wal.lock:
+                    last_id = self.db.sequence_id
+                    self.wal.rotate(old_log_path)
+                (records, _) = read_log(old_log_path)
+                write_snapshot(snapshot_path, merged_items(previous, records), last_id)
+            finally:
+                if previous is not None:
+                    previous.close()
+            os.remove(old_log_path)
+            self.db.swap_storage(lambda: self._reopen(snapshot_path))
+
+    # Open the new snapshot, with the records logged since the rotation applied.
+    # Called while the database changes are blocked, the lock of the log included (see "SequenceDb.swap_storage").
+    def _reopen(self, snapshot_path):
+        storage = MappedStorage(snapshot_path)
+        (records, _) = read_log(self.wal.path)
+        for (operation, sequence_id, sequence) in records:
+            if operation == LogOperation.INSERT and sequence_id not in storage:
+                storage[sequence_id] = sequence
+            elif operation == LogOperation.DELETE and sequence_id in storage:
+                del storage[sequence_id]
+            elif operation == LogOperation.REPLACE and sequence_id in storage:
+                storage[sequence_id] = sequence
+        return storage
+
+
+# Open (or create) a durable database.
+#
+# Params:
+# - directory: the directory of the database (created if needed)
+# - fsync_policy: the FsyncPolicy of the write-ahead log
+# - group_size: the number of records written between two "fsync" with the GROUP policy
+# - max_sync_delay: the number of seconds a record can wait for its "fsync" with the GROUP policy
+# - checkpoint_log_size: the size of the log (in bytes) triggering a checkpoint
+# - checkpoint_interval: the number of seconds between two checks of the log size (no background checkpoints if None)
+# - options: the options of the "SequenceDb" (for example "kmer_size")
+# Returns the opened SequenceDb. It must be closed with "close". With background checkpoints, the database is
+# always thread safe: the checkpoints switch its storage while it is used.
+def open_durable_db(directory, fsync_policy=FsyncPolicy.GROUP, group_size=DEFAULT_GROUP_SIZE,
+                    max_sync_delay=DEFAULT_MAX_DELAY, checkpoint_log_size=DEFAULT_CHECKPOINT_LOG_SIZE,
+                    checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, **options):
+    os.makedirs(directory, exist_ok=True)
+    if checkpoint_interval is not None:
+        options["thread_safe"] = True
+    snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+    if os.path.exists(snapshot_path):
+        db = SequenceDb.open(snapshot_path, **options)
+    else:
+        db = SequenceDb(**options)
+
+    # A log left by an interrupted checkpoint is older than the current log.
+    log_paths = [os.path.join(directory, log_file) for log_file in (OLD_LOG_FILE, LOG_FILE)]
+    log_paths = [log_path for log_path in log_paths if os.path.exists(log_path)]
+    replayed = False
+    for log_path in log_paths:
+        (records, _) = read_log(log_path)
+        for (operation, sequence_id, sequence) in records:
+            db.replay(operation, sequence_id, sequence)
+        replayed = replayed or bool(records)
+
+    # Merge the recovered changes into the snapshot right away, so that the interrupted checkpoint
+    # is completed before a new one can start. After a clean close, the empty log is just removed.
+    if replayed or os.path.exists(os.path.join(directory, OLD_LOG_FILE)):
+        write_snapshot(snapshot_path, db.database.items(), db.sequence_id)
+        db.swap_storage(lambda: MappedStorage(snapshot_path))
+    for log_path in log_paths:
+        os.remove(log_path)
+
+    wal = WriteAheadLog(os.path.join(directory, LOG_FILE), fsync_policy, group_size, max_sync_delay)
+    checkpointer = Checkpointer(db, wal, directory, checkpoint_log_size, checkpoint_interval)
+    db.attach_log(wal, checkpointer)
+    return db
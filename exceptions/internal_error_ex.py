@@ -0,0 +1,6 @@
+# Exception to indicate an unexpected error of the database server while executing a request.
+class InternalError(Exception):
+    def __init__(self, error):
+        self.error = error
+    def __str__(self):
+        return f"ERROR - Internal error: [{self.error}]"
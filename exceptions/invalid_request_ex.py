@@ -0,0 +1,6 @@
+# Exception to indicate an invalid request sent to the database server.
+class InvalidRequest(Exception):
+    def __init__(self, request):            
+        self.request = request
+    def __str__(self):
+        return f"ERROR - Invalid request: [{self.request}]"
@@ -0,0 +1,340 @@
+#
+# Instrumentation of the DNA sequence database.
+#
+# An "Instrumentation" attached to a database (see "SequenceDb") records, for each instrumented operation,
+# the number of calls and errors and a latency histogram, plus the bases scanned by "find" and the index used
+# to answer it. The calls slower than a threshold are kept in a slow query log, and hooks (for example
+# "cProfile" or "tracemalloc") can be run around the calls of specific operations.
+#
+# The operations of an instrumented database are wrapped when it is created: a database created without
+# instrumentation runs the original, unwrapped, methods.
+#
+
+import threading
+from bisect import bisect_left
+import time
+import tracemalloc
+from collections import deque, namedtuple
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+# The instrumented operations of the database.
+OPERATIONS = [
+    "insert", "insert_many", "get", "find", "find_many", "find_positions", "count", "overlap", "delete", "replace"
+]
+
+# The upper bounds (in seconds) of the latency histogram buckets: from 1 microsecond to about 1 minute,
+# doubling at each bucket. Slower calls fall in a last, unbounded, bucket.
+LATENCY_BUCKETS = [0.000001 * 2 ** index for index in range(27)]
+
+# The ways "find" can be answered, see "SequenceDb.find".
+FIND_PATHS = ["suffix_index", "kmer_index", "bloom_filter", "scan"]
+
+DEFAULT_SLOW_QUERY_LOG_SIZE = 100
+
+# The longest argument kept in the slow query log (longer arguments are truncated).
+MAX_LOGGED_ARGUMENT_LENGTH = 100
+
+# A call slower than the slow query threshold:
+# - operation: the name of the operation
+# - argument: the first argument of the call (truncated)
+# - seconds: the duration of the call
+# - timestamp: when the call ended (seconds since the epoch)
+SlowQuery = namedtuple("SlowQuery", ["operation", "argument", "seconds", "timestamp"])
+
+
+class LatencyHistogram:
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    # Record the duration of a call.
+    def record(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    # Get a percentile of the recorded durations.
+    # The percentile is estimated by the upper bound of its bucket (at most the longest duration).
+    #
+    # Params:
+    # - percent: the percentile (between 0 and 100)
+    # Returns the estimated duration in seconds, or None if nothing was recorded.
+    def percentile(self, percent):
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        cumulative = 0
+        for (index, count) in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and cumulative:
+                return min(LATENCY_BUCKETS[index], self.maximum) if index < len(LATENCY_BUCKETS) else self.maximum
+        return self.maximum
+
+
+# Hook running "cProfile" around the calls of an operation.
+#
+# Params:
+# - profiler: the "cProfile.Profile" collecting the statistics
+# Returns the hook (see "Instrumentation.add_hook").
+def cprofile_hook(profiler):
+    @contextmanager
+    def hook():
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+    return hook
+
+
+# Hook measuring the memory allocated by the calls of an operation with "tracemalloc".
+# The peak of traced memory of each call is kept in "peaks".
+class TracemallocHook:
+
+    def __init__(self):
+        self.peaks = []
+
+    @contextmanager
+    def __call__(self):
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        (start, _) = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            (_, peak) = tracemalloc.get_traced_memory()
+            self.peaks.append(peak - start)
+            if started:
+                tracemalloc.stop()
+
+
+class Instrumentation:
+
+    # Params:
+    # - slow_query_threshold: the duration (in seconds) above which a call is logged as a slow query
+    #   (no slow query log if None)
+    # - slow_query_log_size: the number of most recent slow queries kept
+    def __init__(self, slow_query_threshold=None, slow_query_log_size=DEFAULT_SLOW_QUERY_LOG_SIZE):
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_queries = deque(maxlen=slow_query_log_size)
+        self.histograms = {operation: LatencyHistogram() for operation in OPERATIONS}
+        self.errors = dict.fromkeys(OPERATIONS, 0)
+        self.find_paths = dict.fromkeys(FIND_PATHS, 0)
+        self.bases_scanned = 0
+        self._hooks = {}
+        # The same instrumentation can be shared by the threads (and the shards) of a database.
+        self._lock = threading.Lock()
+
+    # Run a hook around every call of an operation.
+    #
+    # Params:
+    # - operation: the name of the operation (see "OPERATIONS")
+    # - hook: a function returning a context manager, entered before each call and exited after it
+    def add_hook(self, operation, hook):
+        if operation not in OPERATIONS:
+            raise ValueError(f"Invalid operation: [{operation}]")
+        self._hooks.setdefault(operation, []).append(hook)
+
+    # Remove all the hooks of an operation.
+    def remove_hooks(self, operation):
+        self._hooks.pop(operation, None)
+
+    # Wrap a method of the database to record its calls.
+    #
+    # Params:
+    # - operation: the name of the operation
+    # - method: the bound method
+    # Returns the instrumented method.
+    def wrap(self, operation, method):
+        @wraps(method)
+        def instrumented(*args, **kwargs):
+            hooks = self._hooks.get(operation)
+            failed = True
+            start = time.perf_counter()
+            try:
+                if hooks:
+                    with ExitStack() as stack:
+                        for hook in hooks:
+                            stack.enter_context(hook())
+                        result = method(*args, **kwargs)
+                else:
+                    result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.record(operation, time.perf_counter() - start, args[0] if args else None, failed)
+        return instrumented
+
+    # Record a call of an operation.
+    #
+    # Params:
+    # - operation: the name of the operation
+    # - seconds: the duration of the call
+    # - argument: the first argument of the call
+    # - failed: True if the call raised an exception
+    def record(self, operation, seconds, argument=None, failed=False):
+        with self._lock:
+            self.histograms[operation].record(seconds)
+            if failed:
+                self.errors[operation] += 1
+            if self.slow_query_threshold is not None and seconds >= self.slow_query_threshold:
+                argument = argument if isinstance(argument, str) else repr(argument)
+                self.slow_queries.append(
+                    SlowQuery(operation, argument[:MAX_LOGGED_ARGUMENT_LENGTH], seconds, time.time())
+                )
+
+    # Record how a "find" was answered.
+    #
+    # Params:
+    # - path: the way it was answered (see "FIND_PATHS")
+    # - bases: the number of bases scanned
+    def record_find(self, path, bases):
+        with self._lock:
+            self.find_paths[path] += 1
+            self.bases_scanned += bases
+
+    # Get the recorded statistics.
+    #
+    # Params:
+    # - cache_stats: the statistics of the query caches of the database (see "SequenceDb.cache_stats")
+    # - prefilter_stats: the statistics of the Bloom filter prefilter of the database
+    #   (see "SequenceDb.prefilter_stats")
+    # Returns a dictionary with:
+    # - "operations": for each operation, its number of calls and errors, and its latencies (in seconds)
+    # - "find": the number of "find" answered by each path, the rate of them answered by an index,
+    #   and the bases scanned (in total and per "find" that wasn't answered by a cache)
+    # - "caches": for each query cache, its hits, misses and hit rate (None without caches)
+    # - "prefilter": the sequences checked against their Bloom filter, the rate of them rejected, the false
+    #   positives (the sequences accepted that didn't match) and the memory of the filters (None without prefilter)
+    # - "slow_queries": the most recent slow queries (SlowQuery)
+    def stats(self, cache_stats=None, prefilter_stats=None):
+        with self._lock:
+            operations = {}
+            for (operation, histogram) in self.histograms.items():
+                operations[operation] = {
+                    "count": histogram.count,
+                    "errors": self.errors[operation],
+                    "total_seconds": histogram.total,
+                    "mean": histogram.total / histogram.count if histogram.count else None,
+                    "p50": histogram.percentile(50),
+                    "p90": histogram.percentile(90),
+                    "p99": histogram.percentile(99),
+                    "max": histogram.maximum,
+                    "buckets": list(zip(LATENCY_BUCKETS + [float("inf")], histogram.counts))
+                }
+            searches = sum(self.find_paths.values())
+            indexed = searches - self.find_paths["scan"]
+            find = {
+                "paths": dict(self.find_paths),
+                "index_hit_rate": indexed / searches if searches else None,
+                "bases_scanned": self.bases_scanned,
+                "bases_scanned_per_query": self.bases_scanned / searches if searches else None
+            }
+            slow_queries = list(self.slow_queries)
+
+        caches = None
+        if cache_stats is not None:
+            caches = {
+                name: {
+                    "hits": stats.hits,
+                    "misses": stats.misses,
+                    "hit_rate": stats.hits / (stats.hits + stats.misses) if stats.hits + stats.misses else None
+                }
+                for (name, stats) in cache_stats.items()
+            }
+
+        prefilter = None
+        if prefilter_stats is not None:
+            (checked, rejected) = (prefilter_stats.checked, prefilter_stats.rejected)
+            accepted = checked - rejected
+            prefilter = {
+                "queries": prefilter_stats.queries,
+                "checked": checked,
+                "rejected": rejected,
+                "rejection_rate": rejected / checked if checked else None,
+                "false_positives": prefilter_stats.false_positives,
+                "false_positive_rate": prefilter_stats.false_positives / accepted if accepted else None,
+                "filters": prefilter_stats.filters,
+                "memory_size": prefilter_stats.memory_size
+            }
+        return {
+            "operations": operations, "find": find, "caches": caches, "prefilter": prefilter,
+            "slow_queries": slow_queries
+        }
+
+
+# Format statistics in the Prometheus text exposition format.
+#
+# Params:
+# - stats: the statistics returned by "SequenceDb.stats" (or "Instrumentation.stats")
+# - prefix: the prefix of the metric names
+# Returns the text of the metrics.
+def prometheus_text(stats, prefix="sequence_db"):
+    lines = [
+        f"# HELP {prefix}_operations_total Number of calls of each operation.",
+        f"# TYPE {prefix}_operations_total counter"
+    ]
+    for (operation, values) in stats["operations"].items():
+        lines.append(f'{prefix}_operations_total{{operation="{operation}"}} {values["count"]}')
+    lines += [
+        f"# HELP {prefix}_operation_errors_total Number of calls of each operation that raised an exception.",
+        f"# TYPE {prefix}_operation_errors_total counter"
+    ]
+    for (operation, values) in stats["operations"].items():
+        lines.append(f'{prefix}_operation_errors_total{{operation="{operation}"}} {values["errors"]}')
+    lines += [
+        f"# HELP {prefix}_operation_seconds Latency of each operation.",
+        f"# TYPE {prefix}_operation_seconds histogram"
+    ]
+    for (operation, values) in stats["operations"].items():
+        cumulative = 0
+        for (bound, count) in values["buckets"]:
+            cumulative += count
+            bound = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{prefix}_operation_seconds_bucket{{operation="{operation}",le="{bound}"}} {cumulative}')
+        lines.append(f'{prefix}_operation_seconds_sum{{operation="{operation}"}} {values["total_seconds"]}')
+        lines.append(f'{prefix}_operation_seconds_count{{operation="{operation}"}} {values["count"]}')
+    lines += [
+        f"# HELP {prefix}_find_paths_total Number of finds answered by each index, or by a scan.",
+        f"# TYPE {prefix}_find_paths_total counter"
+    ]
+    for (path, count) in stats["find"]["paths"].items():
+        lines.append(f'{prefix}_find_paths_total{{path="{path}"}} {count}')
+    lines += [
+        f"# HELP {prefix}_bases_scanned_total Number of bases scanned by the finds.",
+        f"# TYPE {prefix}_bases_scanned_total counter",
+        f"{prefix}_bases_scanned_total {stats['find']['bases_scanned']}"
+    ]
+    if stats["caches"]:
+        for (metric, key) in (("cache_hits_total", "hits"), ("cache_misses_total", "misses")):
+            lines += [
+                f"# HELP {prefix}_{metric} Number of {key} of each query cache.",
+                f"# TYPE {prefix}_{metric} counter"
+            ]
+            for (name, values) in stats["caches"].items():
+                lines.append(f'{prefix}_{metric}{{cache="{name}"}} {values[key]}')
+    if stats.get("prefilter"):
+        for (metric, key, description) in (
+            ("prefilter_checked_total", "checked", "Number of sequences checked against their Bloom filter."),
+            ("prefilter_rejected_total", "rejected", "Number of sequences rejected by their Bloom filter."),
+            ("prefilter_false_positives_total", "false_positives",
+             "Number of sequences accepted by their Bloom filter that didn't match.")
+        ):
+            lines += [
+                f"# HELP {prefix}_{metric} {description}",
+                f"# TYPE {prefix}_{metric} counter",
+                f"{prefix}_{metric} {stats['prefilter'][key]}"
+            ]
+        lines += [
+            f"# HELP {prefix}_prefilter_memory_bytes Memory of the Bloom filters.",
+            f"# TYPE {prefix}_prefilter_memory_bytes gauge",
+            f"{prefix}_prefilter_memory_bytes {stats['prefilter']['memory_size']}"
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,114 @@
+#
+# K-mer inverted index for the DNA sequence database.
+#
+# The index maps every k-mer (substring of length k) found in the stored sequences to the IDs of the
+# sequences containing it. A sequence can only contain a sample if it contains every k-mer of the sample,
+# so intersecting the posting lists of the sample's k-mers gives a small set of candidate sequences.
+#
+# A "canonical" index stores each k-mer under the smallest of the k-mer and its reverse complement, so a
+# sequence and its reverse complement have the same k-mers: the candidates of a sample are then the candidates
+# of both its strands, for the size of an index of a single strand.
+#
+
+from dna_utilities import reverse_complement
+
+# The default length of the indexed k-mers.
+DEFAULT_KMER_SIZE = 8
+
+
+# Get the distinct k-mers of a sequence.
+#
+# Params:
+# - sequence: the DNA sequence
+# - k: the length of the k-mers
+# Returns a set of k-mers (empty if the sequence is shorter than k).
+def kmers(sequence, k):
+    return {sequence[i:i + k] for i in range(len(sequence) - k + 1)}
+
+
+# Get the distinct canonical k-mers of a sequence (the smallest of each k-mer and its reverse complement).
+#
+# Params:
+# - sequence: the uppercase DNA sequence
+# - k: the length of the k-mers
+# Returns a set of k-mers (empty if the sequence is shorter than k).
+def canonical_kmers(sequence, k):
+    # The reverse complement of the k-mer at i is at len(sequence) - i - k in the reverse complement of the sequence.
+    reverse = reverse_complement(sequence)
+    end = len(sequence) - k
+    return {min(sequence[i:i + k], reverse[end - i:end - i + k]) for i in range(end + 1)}
+
+
+class KmerIndex:
+
+    # Params:
+    # - k: the length of the indexed k-mers
+    # - canonical: True to index the canonical k-mers, so that the candidates cover both strands of a sample
+    def __init__(self, k=DEFAULT_KMER_SIZE, canonical=False):
+        if k < 1:
+            raise ValueError(f"Invalid k-mer size: [{k}]")
+        self.k = k
+        self.canonical = canonical
+        self._kmers = canonical_kmers if canonical else kmers
+        # Each posting list is a dictionary used as an ordered set, so the IDs stay in insertion order.
+        self._postings = {}
+
+    # Get the number of distinct indexed k-mers.
+    def __len__(self):
+        return len(self._postings)
+
+    # Index a sequence.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the uppercase DNA sequence
+    def add(self, sequence_id, sequence):
+        for kmer in self._kmers(sequence, self.k):
+            posting = self._postings.get(kmer)
+            if posting is None:
+                self._postings[kmer] = {sequence_id: None}
+            else:
+                posting[sequence_id] = None
+
+    # Remove a sequence from the index.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the uppercase DNA sequence, as it was indexed
+    def remove(self, sequence_id, sequence):
+        for kmer in self._kmers(sequence, self.k):
+            posting = self._postings.get(kmer)
+            if posting is not None:
+                posting.pop(sequence_id, None)
+                if not posting:
+                    del self._postings[kmer]
+
+    # Get the sequences that may contain a sample.
+    # Only the k-mers tiling the sample (plus its last k-mer) are looked up: every sequence containing
+    # the sample contains them, and intersecting a few posting lists is enough to discard most sequences.
+    # With a canonical index, the candidates also include the sequences containing the reverse complement
+    # of the sample.
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # Returns the list of candidate IDs in insertion order, or None if the sample is too short to use the index.
+    def candidates(self, sample):
+        k = self.k
+        if len(sample) < k:
+            return None
+
+        starts = set(range(0, len(sample) - k + 1, k))
+        starts.add(len(sample) - k)
+        postings = []
+        for start in starts:
+            kmer = sample[start:start + k]
+            if self.canonical:
+                kmer = min(kmer, reverse_complement(kmer))
+            posting = self._postings.get(kmer)
+            if posting is None:
+                return []
+            postings.append(posting)
+
+        postings.sort(key=len)
+        (smallest, others) = (postings[0], postings[1:])
+        return [id for id in smallest if all(id in posting for posting in others)]
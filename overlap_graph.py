@@ -0,0 +1,175 @@
+#
+# Overlap graph of the DNA sequence database, and greedy assembly of its sequences (reads) into contigs.
+#
+# The graph has an edge from a read "u" to a read "v" when a suffix of "u" is a prefix of "v" (a suffix-prefix
+# overlap), at least "minimum_overlap" bases long and shorter than both reads. Only the longest overlap of each
+# pair of reads is kept.
+#
+# The overlaps are found with a hash of the first "minimum_overlap" bases of every read (its seed): every
+# position of a read is looked up in the seeds, and the reads whose seed matches there are verified against the
+# whole suffix. Finding all the overlaps costs one lookup per base, instead of checking every pair of reads.
+#
+# The edges are stored in compressed sparse row (CSR) arrays: the edges of the i-th read are at the positions
+# "offsets[i]" to "offsets[i + 1]" of the target and overlap length arrays.
+#
+
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+# The default minimum length of the overlaps of the graph.
+# Short seeds match by chance in most reads: the graph is only built efficiently for selective overlaps.
+DEFAULT_MINIMUM_OVERLAP = 20
+
+# A path of the greedy assembly:
+# - sequence_ids: the IDs of the reads, in the order they are assembled
+# - overlaps: the overlap length between each read and the next one
+AssemblyPath = namedtuple("AssemblyPath", ["sequence_ids", "overlaps"])
+
+# An assembled contig:
+# - sequence: the sequence spelled by the reads
+# - sequence_ids: the IDs of the assembled reads
+Contig = namedtuple("Contig", ["sequence", "sequence_ids"])
+
+
+# Spell the sequence of an assembly path: each read is appended without its overlap with the previous one.
+#
+# Params:
+# - path: the AssemblyPath
+# - sequences: a mapping from the sequence IDs to the sequences
+# Returns the sequence of the path.
+def spell(path, sequences):
+    parts = [sequences[path.sequence_ids[0]]]
+    for (sequence_id, overlap) in zip(path.sequence_ids[1:], path.overlaps):
+        parts.append(sequences[sequence_id][overlap:])
+    return "".join(parts)
+
+
+class OverlapGraph:
+
+    # Build the graph.
+    #
+    # Params:
+    # - items: an iterable of (<sequence ID>, <uppercase sequence>) tuples, in insertion order
+    # - minimum_overlap: the minimum length of an overlap
+    # Raises:
+    # - ValueError if the minimum overlap is not positive.
+    def __init__(self, items, minimum_overlap=DEFAULT_MINIMUM_OVERLAP):
+        if minimum_overlap < 1:
+            raise ValueError(f"Invalid minimum overlap: [{minimum_overlap}]")
+        self.minimum_overlap = minimum_overlap
+        self._ids = []
+        reads = []
+        for (sequence_id, sequence) in items:
+            self._ids.append(sequence_id)
+            reads.append(sequence)
+
+        # The seeds map the first bases of the reads to the read number, or to a list of read numbers when
+        # several reads share them. An overlap must be shorter than the read, so shorter reads have no seed.
+        seeds = {}
+        for (node, read) in enumerate(reads):
+            if len(read) > minimum_overlap:
+                seed = read[:minimum_overlap]
+                nodes = seeds.get(seed)
+                if nodes is None:
+                    seeds[seed] = node
+                elif isinstance(nodes, list):
+                    nodes.append(node)
+                else:
+                    seeds[seed] = [nodes, node]
+
+        typecode = "I" if len(reads) < 2 ** 32 else "Q"
+        self._offsets = array("Q", [0])
+        self._targets = array(typecode)
+        self._lengths = array("I")
+        for (node, read) in enumerate(reads):
+            length = len(read)
+            # The positions where a seed starts, the longest overlaps first.
+            hits = [
+                start for start in range(1, length - minimum_overlap + 1)
+                if read[start:start + minimum_overlap] in seeds
+            ]
+            overlaps = {}
+            for start in hits:
+                overlap = length - start
+                suffix = read[start:]
+                nodes = seeds[read[start:start + minimum_overlap]]
+                for target in (nodes if isinstance(nodes, list) else (nodes,)):
+                    if (
+                        target != node and target not in overlaps and len(reads[target]) > overlap
+                        and reads[target].startswith(suffix)
+                    ):
+                        overlaps[target] = overlap
+            self._targets.extend(overlaps)
+            self._lengths.extend(overlaps.values())
+            self._offsets.append(len(self._targets))
+
+        # The read numbers of the sequence IDs, built by the first "successors".
+        self._nodes = None
+
+    # Get the number of reads of the graph.
+    def __len__(self):
+        return len(self._ids)
+
+    # Get the number of edges (overlaps) of the graph.
+    def edge_count(self):
+        return len(self._targets)
+
+    # Get the number of bytes used by the edge arrays.
+    def memory_size(self):
+        return sum(table.itemsize * len(table) for table in (self._offsets, self._targets, self._lengths))
+
+    # Get the reads overlapping the end of a read.
+    #
+    # Params:
+    # - sequence_id: the ID of the read
+    # Returns a list of (<sequence ID>, <overlap length>) tuples, the longest overlaps first.
+    # Raises:
+    # - KeyError if the read is not in the graph.
+    def successors(self, sequence_id):
+        if self._nodes is None:
+            self._nodes = {id: node for (node, id) in enumerate(self._ids)}
+        node = self._nodes[sequence_id]
+        (start, end) = (self._offsets[node], self._offsets[node + 1])
+        return [(self._ids[self._targets[edge]], self._lengths[edge]) for edge in range(start, end)]
+
+    # Assemble the reads greedily: the edges are taken from the longest overlap to the shortest, and an edge
+    # joins two paths unless its first read already has a successor, its second read already has a predecessor,
+    # or it would close a cycle.
+    # Returns the list of the AssemblyPath covering all the reads (a read without any overlap is a path on its
+    # own), in the insertion order of their first read.
+    def greedy_paths(self):
+        count = len(self._ids)
+        successor = [-1] * count
+        predecessor = [-1] * count
+        overlap_lengths = [0] * count
+        # The first read of the path ending with a read, and the last read of the path starting with a read.
+        # Only the entries of the ends of the paths are kept up to date.
+        first = list(range(count))
+        last = list(range(count))
+
+        # The sort is stable: the overlaps of the same length are taken in insertion order.
+        for edge in sorted(range(len(self._targets)), key=self._lengths.__getitem__, reverse=True):
+            target = self._targets[edge]
+            if predecessor[target] != -1:
+                continue
+            source = bisect_right(self._offsets, edge) - 1
+            if successor[source] != -1 or first[source] == target:
+                continue
+            successor[source] = target
+            predecessor[target] = source
+            overlap_lengths[source] = self._lengths[edge]
+            (head, tail) = (first[source], last[target])
+            first[tail] = head
+            last[head] = tail
+
+        paths = []
+        for node in range(count):
+            if predecessor[node] == -1:
+                (sequence_ids, overlaps) = ([self._ids[node]], [])
+                while successor[node] != -1:
+                    overlaps.append(overlap_lengths[node])
+                    node = successor[node]
+                    sequence_ids.append(self._ids[node])
+                paths.append(AssemblyPath(sequence_ids, overlaps))
+        return paths
@@ -0,0 +1,85 @@
+#
+# Prefix and suffix indexes for database-wide overlap queries.
+#
+# For every stored sequence, the prefixes and suffixes of length 1 to "max_length" are hashed into buckets holding
+# the IDs of the sequences that start (or end) with them. An overlap of length L between the end of a sample and
+# the start of a sequence is then found by looking up the last L bases of the sample in the prefix buckets
+# (and symmetrically for the suffixes), without visiting the sequences that can't overlap the sample.
+# Overlaps longer than "max_length" are looked up with their first "max_length" bases, and the candidates
+# are verified against the stored sequence.
+#
+
+# The default length of the longest indexed prefixes and suffixes.
+DEFAULT_MAX_LENGTH = 16
+
+
+class OverlapIndex:
+
+    # Params:
+    # - max_length: the length of the longest indexed prefixes and suffixes
+    def __init__(self, max_length=DEFAULT_MAX_LENGTH):
+        if max_length < 1:
+            raise ValueError(f"Invalid overlap index length: [{max_length}]")
+        self.max_length = max_length
+        # Each bucket is a dictionary used as an ordered set of IDs.
+        self._prefixes = {}
+        self._suffixes = {}
+
+    # Index the prefixes and suffixes of a sequence.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the uppercase DNA sequence
+    def add(self, sequence_id, sequence):
+        for length in range(1, min(self.max_length, len(sequence)) + 1):
+            self._prefixes.setdefault(sequence[:length], {})[sequence_id] = None
+            self._suffixes.setdefault(sequence[-length:], {})[sequence_id] = None
+
+    # Remove the prefixes and suffixes of a sequence from the index.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the uppercase DNA sequence, as it was indexed
+    def remove(self, sequence_id, sequence):
+        for length in range(1, min(self.max_length, len(sequence)) + 1):
+            for (buckets, piece) in ((self._prefixes, sequence[:length]), (self._suffixes, sequence[-length:])):
+                bucket = buckets.get(piece)
+                if bucket is not None:
+                    bucket.pop(sequence_id, None)
+                    if not bucket:
+                        del buckets[piece]
+
+    # Find the sequences whose prefix overlaps a suffix of the sample.
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # - minimum_overlap: the minimum length of an accepted overlap
+    # - get_prefix: a function returning the prefix of a given length of a stored sequence, to verify long overlaps
+    # Returns a dictionary associating each overlapping sequence ID to its longest overlap length.
+    def prefix_overlaps(self, sample, minimum_overlap, get_prefix):
+        return self._overlaps(self._prefixes, sample, minimum_overlap, get_prefix, True)
+
+    # Find the sequences whose suffix overlaps a prefix of the sample.
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # - minimum_overlap: the minimum length of an accepted overlap
+    # - get_suffix: a function returning the suffix of a given length of a stored sequence, to verify long overlaps
+    # Returns a dictionary associating each overlapping sequence ID to its longest overlap length.
+    def suffix_overlaps(self, sample, minimum_overlap, get_suffix):
+        return self._overlaps(self._suffixes, sample, minimum_overlap, get_suffix, False)
+
+    def _overlaps(self, buckets, sample, minimum_overlap, get_end, is_prefix):
+        found = {}
+        # The longest overlaps are looked up first, so the first overlap found for a sequence is its longest.
+        for length in range(len(sample), max(minimum_overlap, 1) - 1, -1):
+            piece = sample[-length:] if is_prefix else sample[:length]
+            if length <= self.max_length:
+                for id in buckets.get(piece, ()):
+                    found.setdefault(id, length)
+            else:
+                key = piece[:self.max_length] if is_prefix else piece[-self.max_length:]
+                for id in buckets.get(key, ()):
+                    if id not in found and get_end(id, length) == piece:
+                        found[id] = length
+        return found
@@ -0,0 +1,166 @@
+#
+# Multi-process "find" over a shared memory arena.
+#
+# The substring scans of "SequenceDb.find" run in a single thread because of the GIL. The "ParallelFinder"
+# copies the sequences of a database once into a "multiprocessing.shared_memory" arena, and a pool of worker
+# processes scans disjoint ranges of sequences directly in that arena: no sequence is ever pickled or sent to
+# a worker, only the sample and the range to scan.
+#
+# The arena layout is:
+# - a data block holding all the (uppercase, ASCII) sequences, each one followed by a "\n" separator,
+# - an offset block holding the start of each sequence in the data block (plus the end of the data), as
+#   64-bit unsigned integers.
+#
+# The arena is a snapshot of the database: "refresh" must be called to take into account new sequences.
+#
+
+import os
+import re
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+from dna_utilities import is_valid_sequence
+
+from exceptions.invalid_sample_ex import InvalidSample
+
+# Default number of sequences scanned by a worker for a single task.
+DEFAULT_CHUNK_SIZE = 10_000
+
+SEPARATOR = b"\n"
+
+# Shared memory blocks attached by a worker process, with the names of the blocks as key.
+_attached_arena = {}
+
+
+# Attach a worker process to the shared memory blocks of an arena (detaching it from the previous arena if needed).
+#
+# Params:
+# - data_name: the name of the data block
+# - offsets_name: the name of the offset block
+# Returns a tuple (<data block>, <offset block>).
+def _attach(data_name, offsets_name):
+    key = (data_name, offsets_name)
+    if key not in _attached_arena:
+        for blocks in _attached_arena.values():
+            for block in blocks:
+                block.close()
+        _attached_arena.clear()
+        _attached_arena[key] = (SharedMemory(data_name), SharedMemory(offsets_name))
+    return _attached_arena[key]
+
+
+# Find the sequences of a range containing a sample. Executed by the worker processes.
+#
+# Params:
+# - data_name: the name of the data block of the arena
+# - offsets_name: the name of the offset block of the arena
+# - count: the number of sequences in the arena
+# - sample: the uppercase sample, as bytes
+# - first: the index of the first sequence to scan
+# - last: the index following the last sequence to scan
+# Returns the list of the indexes of the matching sequences.
+def _find_in_range(data_name, offsets_name, count, sample, first, last):
+    (data_block, offsets_block) = _attach(data_name, offsets_name)
+    pattern = re.compile(re.escape(sample))
+    matches = []
+    with memoryview(offsets_block.buf)[:8 * (count + 1)].cast("Q") as offsets:
+        data = data_block.buf
+        end = offsets[last]
+        hit = pattern.search(data, offsets[first], end)
+        while hit:
+            index = bisect_right(offsets, hit.start(), first, last) - 1
+            matches.append(index)
+            # No need to look any further in this sequence.
+            hit = pattern.search(data, offsets[index + 1], end)
+        del hit
+    return matches
+
+
+class ParallelFinder:
+
+    # Params:
+    # - db: the sequence database to search
+    # - workers: the number of worker processes (the number of CPUs if None)
+    # - chunk_size: the number of sequences scanned by a worker for a single task
+    def __init__(self, db, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError(f"Invalid chunk size: [{chunk_size}]")
+        self.db = db
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self._ids = []
+        self._data_block = None
+        self._offsets_block = None
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Copy the current sequences of the database into a new arena.
+    def refresh(self):
+        self._release()
+        self._ids = []
+        offsets = array("Q", [0])
+        data = bytearray()
+        for (id, seq) in self.db.database.items():
+            self._ids.append(id)
+            data += seq.encode()
+            data += SEPARATOR
+            offsets.append(len(data))
+        if not self._ids:
+            return
+
+        self._data_block = SharedMemory(create=True, size=len(data))
+        self._data_block.buf[:len(data)] = data
+        offsets_bytes = offsets.tobytes()
+        self._offsets_block = SharedMemory(create=True, size=len(offsets_bytes))
+        self._offsets_block.buf[:len(offsets_bytes)] = offsets_bytes
+
+    # Release the arena and stop the worker processes.
+    def close(self):
+        self._release()
+        self._executor.shutdown()
+
+    def _release(self):
+        for block in (self._data_block, self._offsets_block):
+            if block is not None:
+                block.close()
+                block.unlink()
+        self._data_block = None
+        self._offsets_block = None
+
+    # Find all sequences of the arena that contains a sample sequence.
+    # The ranges of sequences are scanned concurrently by the worker processes, and the results
+    # are merged in ID order.
+    #
+    # Params:
+    # - sample: the sample DNA sequence to match
+    # Returns a list of sequence IDs for all matching sequences.
+    # Raises:
+    # - InvalidSample if the sample sequence is not a valid DNA sequence.
+    def find(self, sample):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        if not self._ids:
+            return []
+
+        count = len(self._ids)
+        futures = [
+            self._executor.submit(
+                _find_in_range,
+                self._data_block.name,
+                self._offsets_block.name,
+                count,
+                sample.upper().encode(),
+                first,
+                min(first + self.chunk_size, count)
+            )
+            for first in range(0, count, self.chunk_size)
+        ]
+        return [self._ids[index] for future in futures for index in future.result()]
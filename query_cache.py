@@ -0,0 +1,117 @@
+#
+# Query result cache for the DNA sequence database.
+#
+# The cache keeps the results of the most recently used queries, up to a maximum number of entries and a
+# maximum total size (for example the total number of cached sequence IDs). When a limit is exceeded, the least
+# recently used entries are evicted.
+#
+
+import threading
+from collections import OrderedDict, namedtuple
+
+# The default maximum total size of the cached results.
+DEFAULT_MAX_SIZE = 1_000_000
+
+# The statistics of a cache:
+# - hits: the number of lookups answered by the cache
+# - misses: the number of lookups not answered by the cache
+# - entries: the number of cached results
+# - size: the total size of the cached results
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "entries", "size"])
+
+
+class QueryCache:
+
+    # Params:
+    # - max_entries: the maximum number of cached results
+    # - max_size: the maximum total size of the cached results
+    def __init__(self, max_entries, max_size=DEFAULT_MAX_SIZE):
+        if max_entries < 1:
+            raise ValueError(f"Invalid cache size: [{max_entries}]")
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # Each entry is a [<result>, <size>] pair, from the least to the most recently used.
+        self._entries = OrderedDict()
+        self._size = 0
+        # The cache is updated by the readers of a thread-safe database, which run concurrently.
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # Get the keys of the cached results.
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    # Get a cached result, counting a hit or a miss.
+    #
+    # Params:
+    # - key: the key of the query
+    # - default: the value returned when the result is not cached
+    # Returns the cached result, or the default value.
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    # Cache the result of a query.
+    #
+    # Params:
+    # - key: the key of the query
+    # - result: the result of the query
+    # - size: the size of the result
+    def put(self, key, result, size=1):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+            self._entries[key] = [result, size]
+            self._size += size
+            self._evict()
+
+    # Append an item to a cached list of results, without changing its recency.
+    #
+    # Params:
+    # - key: the key of the query
+    # - item: the item to append
+    def append(self, key, item):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[0].append(item)
+                entry[1] += 1
+                self._size += 1
+                self._evict()
+
+    # Remove a cached result (if present).
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+
+    # Remove all the cached results.
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    # Get the statistics of the cache.
+    def stats(self):
+        return CacheStats(self.hits, self.misses, len(self._entries), self._size)
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_size):
+            (_, entry) = self._entries.popitem(last=False)
+            self._size -= entry[1]
@@ -0,0 +1,62 @@
+#
+# Reader-writer lock.
+#
+# Any number of readers can hold the lock at the same time, while a writer holds it alone.
+# Writers have priority: once a writer is waiting, new readers wait for it, so a steady flow of readers
+# can't starve the writers. The lock is not reentrant.
+#
+
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    # Hold the lock as a reader, for the duration of a "with" block.
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    # Hold the lock as a writer, for the duration of a "with" block.
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+# Lock used when the database is not shared between threads: it never blocks.
+class NoLock:
+
+    @contextmanager
+    def read(self):
+        yield
+
+    @contextmanager
+    def write(self):
+        yield
@@ -11,31 +11,148 @@
 # independent sequences, these "finds" can be performed concurrently and the results merged together when each "find worker"
 # has completed their search. This sharding can easily be extended to any number of bases as the shard identifier,
 # like having 16 shards based on a shard identifier of 2 bases ("AA", "AC", etc...).
+# This sharding is implemented by "ShardedSequenceDb" (see "sharded_sequence_db.py").
 # 
 # 2. To permit concurrency, the sequence IDs could be UUIDs to ensure that no clashes will occur between different threads
 # accessing the database.
+# A thread-safe mode is provided instead (see "thread_safe"): the IDs stay integers but are allocated atomically,
+# and a reader-writer lock lets many readers query the database while the writers are serialized.
 #
 # 3. The "overlap" method could return the found overlap sequence, and indicate if it corresponds to the prefix or the suffix
-# (or both) of the sequence.
+# (or both) of the sequence. This is provided by the "overlap_details" method.
 
+import contextlib
+import itertools
+import threading
+from bisect import bisect_right
+from collections import namedtuple
 from enum import Enum
 
 from dna_utilities import (
     DNA_BASES,
     is_valid_sequence,
     overlap_prefix,
-    overlap_suffix
+    overlap_prefix_lengths,
+    overlap_suffix,
+    overlap_suffix_lengths,
+    reverse_complement
 )
 
+from aho_corasick import AhoCorasick
+from approximate_match import (
+    edit_search,
+    hamming_search,
+    seed_pieces
+)
+from kmer_index import KmerIndex
+from instrumentation import OPERATIONS
+from overlap_graph import (
+    DEFAULT_MINIMUM_OVERLAP,
+    Contig,
+    OverlapGraph,
+    spell
+)
+from overlap_index import OverlapIndex
+from query_cache import QueryCache
+from rw_lock import (
+    NoLock,
+    ReadWriteLock
+)
+from sequence_storage import StringStorage
+from write_ahead_log import LogOperation
+from snapshot import (
+    MappedStorage,
+    write_snapshot
+)
+from suffix_index import SuffixArrayIndex
+
 from exceptions.invalid_sample_ex import InvalidSample
 from exceptions.invalid_sequence_ex import InvalidSequence
 from exceptions.invalid_sequence_id_ex import InvalidSequenceId
 
+# The number of sequences verified at a time by "iter_find".
+ITER_FIND_CHUNK_SIZE = 1_000
+
 # Indicates the insertion result. Only two possibilities for now (which could be replaced by True/False),
 # but keeping the door open in case other situations are added.
 class InsertResult(Enum):
     INSERTED = "Inserted"
     ALREADY_PRESENT = "Already present"
+    # Only reported by the bulk insertion, "insert" raises an exception instead.
+    INVALID = "Invalid"
+    # Only reported by "replace".
+    REPLACED = "Replaced"
+
+
+# Indicates which end of a sequence is overlapped by a sample.
+class OverlapType(Enum):
+    PREFIX = "Prefix"
+    SUFFIX = "Suffix"
+    BOTH = "Both"
+
+
+# The DNA strand(s) searched for a sample: the sample itself (FORWARD), its reverse complement (REVERSE),
+# or both. Also indicates which strand of a sample matched a sequence.
+class Strand(Enum):
+    FORWARD = "forward"
+    REVERSE = "reverse"
+    BOTH = "both"
+
+
+# A sequence matching a sample searched on both strands:
+# - sequence_id: the ID of the sequence
+# - strand: the strand of the sample found in the sequence (Strand, BOTH if the sequence contains both)
+StrandMatch = namedtuple("StrandMatch", ["sequence_id", "strand"])
+
+
+# The details of an overlap between a sample and a sequence:
+# - overlap_type: the overlapped end(s) of the sequence (OverlapType)
+# - overlap: the longest overlap sequence
+# - length: the length of the longest overlap sequence
+# - prefix_overlap: the longest overlap with the prefix of the sequence (None if no prefix overlap)
+# - suffix_overlap: the longest overlap with the suffix of the sequence (None if no suffix overlap)
+OverlapResult = namedtuple("OverlapResult", ["overlap_type", "overlap", "length", "prefix_overlap", "suffix_overlap"])
+
+
+# An approximate match of a sample in a sequence:
+# - sequence_id: the ID of the sequence
+# - position: the start of the match in the sequence
+# - distance: the number of mismatches (or edits) of the match
+ApproxMatch = namedtuple("ApproxMatch", ["sequence_id", "position", "distance"])
+
+
+# An occurrence of a sample in a sequence:
+# - sequence_id: the ID of the sequence
+# - position: the start of the occurrence in the sequence
+Occurrence = namedtuple("Occurrence", ["sequence_id", "position"])
+
+
+# Build the details of an overlap from the prefix and suffix overlaps found.
+#
+# Params:
+# - prefix_overlap: the overlap with the prefix of the sequence, or None
+# - suffix_overlap: the overlap with the suffix of the sequence, or None
+# Returns an OverlapResult, or None if there is no overlap at all.
+def _overlap_result(prefix_overlap, suffix_overlap):
+    if prefix_overlap is None and suffix_overlap is None:
+        return None
+    if suffix_overlap is None:
+        return OverlapResult(OverlapType.PREFIX, prefix_overlap, len(prefix_overlap), prefix_overlap, None)
+    if prefix_overlap is None:
+        return OverlapResult(OverlapType.SUFFIX, suffix_overlap, len(suffix_overlap), None, suffix_overlap)
+    overlap = max(prefix_overlap, suffix_overlap, key=len)
+    return OverlapResult(OverlapType.BOTH, overlap, len(overlap), prefix_overlap, suffix_overlap)
+
+
+# Get the Strand matching a sample from the matches of each strand.
+def _matched_strand(forward, reverse):
+    if forward and reverse:
+        return Strand.BOTH
+    return Strand.FORWARD if forward else Strand.REVERSE
+
+
+# Marks a result missing from a query cache ("None" is a valid "overlap_details" result).
+_NOT_CACHED = object()
 
 
 # The in-memory DNA sequence database.
@@ -44,37 +161,441 @@ class InsertResult(Enum):
 # overlaps a particular sequence in the database.
 class SequenceDb:
 
-    def __init__(self):
+    # Params:
+    # - storage: the storage engine keeping the sequences (see "sequence_storage.py").
+    #   By default, the sequences are kept as Python strings. The storage may already hold sequences.
+    # - kmer_size: the length of the k-mers indexed to accelerate "find" (no k-mer index if None)
+    # - overlap_index_size: the length of the longest prefixes and suffixes indexed to accelerate "overlap_all"
+    #   (no overlap index if None)
+    # - thread_safe: True to share the database between threads: the queries run concurrently,
+    #   while the changes are serialized by a reader-writer lock (see "rw_lock.py")
+    # - cache_size: the number of "find" results, and of "overlap" results, kept in the query caches
+    #   (see "query_cache.py", no caches if None)
+    # - instrumentation: the Instrumentation recording the calls of the operations (see "instrumentation.py",
+    #   no instrumentation if None)
+    # - canonical_kmers: True to index the canonical k-mers, so that the k-mer index also accelerates the searches
+    #   of the reverse complement of a sample (see "kmer_index.py")
+    # - prefilter: the BloomPrefilter rejecting, from per-sequence Bloom filters, most of the sequences that can't
+    #   contain a sample before they are scanned by "find" (see "bloom_filter.py", no prefilter if None)
+    def __init__(self, storage=None, kmer_size=None, overlap_index_size=None, thread_safe=False, cache_size=None,
+                 instrumentation=None, canonical_kmers=False, prefilter=None):
         # This could establish a connection to an actual database.
-        # But for now, just create an empty dictionary that will acts as a database.
+        # But for now, a storage engine that behaves like a dictionary acts as a database.
         # The sequences that are stored will be associated with an id.
-        self.database = {}
+        self.database = StringStorage() if storage is None else storage
 
         # For now, a simple integer will serve as an ID, but to be scalable 
         # to concurrent access, a UUID should be used.
+        # The IDs are drawn from an "itertools.count", whose "next" is atomic: two threads never get the same ID.
         self.sequence_id = 0 
+
+        # Readers share the lock, writers hold it alone. Without thread safety, the lock never blocks.
+        self._lock = ReadWriteLock() if thread_safe else NoLock()
+
+        # Reverse index used to detect duplicate sequences without scanning the database.
+        # It maps the hash of a sequence to its ID, or to a list of IDs when different
+        # sequences share the same hash. Only hashes are kept so that the index stays small
+        # even when the sequences themselves are large.
+        # When the storage already holds sequences, the index is only built by the first insertion,
+        # so opening a large database stays fast.
+        self._hash_index = {} if len(self.database) == 0 else None
+
+        # Optional k-mer index narrowing down the sequences verified by "find".
+        self._kmer_index = KmerIndex(kmer_size, canonical_kmers) if kmer_size else None
+
+        # Optional prefix and suffix indexes used by "overlap_all".
+        self._overlap_index = OverlapIndex(overlap_index_size) if overlap_index_size else None
+
+        # Optional Bloom filters of the sequences, checked before the sequences themselves are scanned.
+        self._prefilter = prefilter
+
+        # Optional full-text index, built on demand with "build_index".
+        # The sequences inserted (or replaced) after the index was built are kept aside and scanned by "find",
+        # while the indexed sequences deleted (or replaced) since are skipped.
+        self._suffix_index = None
+        self._unindexed_ids = {}
+        self._stale_ids = set()
+
+        # Deleted and replaced sequences leave tombstones in the storage and the full-text index, until "compact".
+        # A replaced sequence is added again to the search indexes, after the more recent sequences: their
+        # results are then sorted by ID (until the full-text index is compacted, and for good for the k-mer index,
+        # whose rebuild would cost much more than sorting its candidates).
+        self._tombstones = 0
+        self._reordered = False
+        # The number of changes of the database, to detect the changes made during a long query.
+        self._changes = 0
+        # While "compact" builds the compacted storage and index, the IDs of the sequences changed meanwhile
+        # (in the order of their first change), then applied to them. Only one compaction runs at a time.
+        self._compacted_ids = None
+        self._compaction_lock = threading.Lock()
+
+        # Optional caches of the "find" and "overlap" results.
+        # A new sequence is checked against the cached "find" samples, so the cached results are never stale.
+        # The "overlap" results only depend on a sequence: they are discarded when it is deleted or replaced.
+        self._find_cache = QueryCache(cache_size) if cache_size else None
+        self._overlap_cache = QueryCache(cache_size) if cache_size else None
+
+        # Optional write-ahead log and checkpointer of a durable database (see "durability.py").
+        self._wal = None
+        self._checkpointer = None
+
+        if self._kmer_index is not None or self._overlap_index is not None or self._prefilter is not None:
+            for (id, seq) in self.database.items():
+                self._index_search(id, seq)
+
+        # Optional instrumentation. The operations are only wrapped when instrumented, so that they run
+        # without any overhead otherwise.
+        self._instrumentation = None
+        if instrumentation is not None:
+            self.record_finds(instrumentation)
+            for operation in OPERATIONS:
+                setattr(self, operation, instrumentation.wrap(operation, getattr(self, operation)))
         
 
+    # Open a database from a snapshot file (see "snapshot.py").
+    # The sequences are read straight from the mapped file, so opening the snapshot doesn't depend on its size
+    # (unless search indexes are requested, they are built from all the sequences).
+    # Params:
+    # - path: the path of the snapshot
+    # - kmer_size: see the constructor
+    # - overlap_index_size: see the constructor
+    # - thread_safe: see the constructor
+    # - cache_size: see the constructor
+    # - instrumentation: see the constructor
+    # - canonical_kmers: see the constructor
+    # - prefilter: see the constructor
+    # Returns the opened SequenceDb.
+    # Raises:
+    # - InvalidSnapshot if the file is not a valid snapshot.
+    @classmethod
+    def open(cls, path, kmer_size=None, overlap_index_size=None, thread_safe=False, cache_size=None,
+             instrumentation=None, canonical_kmers=False, prefilter=None):
+        storage = MappedStorage(path)
+        db = cls(
+            storage, kmer_size, overlap_index_size, thread_safe, cache_size, instrumentation, canonical_kmers,
+            prefilter
+        )
+        db.sequence_id = storage.last_id
+        return db
+
+
+    # Attach a write-ahead log to the database: every change is logged before being applied.
+    # Params:
+    # - wal: the WriteAheadLog (see "write_ahead_log.py")
+    # - checkpointer: the Checkpointer merging the log into a snapshot (see "durability.py")
+    def attach_log(self, wal, checkpointer=None):
+        self._wal = wal
+        self._checkpointer = checkpointer
+
+
+    # Replay a change read from a write-ahead log.
+    # Replaying a change already applied has no effect.
+    # Params:
+    # - operation: the LogOperation
+    # - sequence_id: the ID of the sequence
+    # - sequence: the (uppercase) sequence
+    def replay(self, operation, sequence_id, sequence):
+        if operation == LogOperation.INSERT and sequence_id not in self.database:
+            self._apply_store(sequence_id, sequence)
+        elif operation == LogOperation.DELETE and sequence_id in self.database:
+            self._apply_delete(sequence_id)
+        elif (operation == LogOperation.REPLACE and sequence_id in self.database
+              and self.database[sequence_id] != sequence):
+            self._apply_replace(sequence_id, sequence)
+        # The IDs allocated before the crash must never be allocated again.
+        self.sequence_id = max(self.sequence_id, int(sequence_id))
+
+
+    # Merge the write-ahead log into the snapshot of a durable database.
+    def checkpoint(self):
+        if self._checkpointer is not None:
+            self._checkpointer.checkpoint()
+
+
+    # Switch to another storage engine holding the same sequences, like the new snapshot of a durable database.
+    # The previous storage is then closed (like the mapped file of a snapshot): no query is reading it anymore,
+    # and a compaction reading a view of it keeps it open until it is done (see "MappedStorage.view").
+    # Params:
+    # - build_storage: a function returning the new storage, called while the changes are blocked
+    def swap_storage(self, build_storage):
+        with self._lock.write():
+            # Without thread safety, only the lock of the write-ahead log serializes the changes: it is held
+            # until the new storage is installed, so that no change logged meanwhile is missed.
+            with self._wal.lock if self._wal is not None else contextlib.nullcontext():
+                (previous, self.database) = (self.database, build_storage())
+            if hasattr(previous, "close"):
+                previous.close()
+
+
+    # Close the database: stop the background checkpoints, close the write-ahead log and release the storage
+    # (like the mapped file of a snapshot).
+    def close(self):
+        if self._checkpointer is not None:
+            self._checkpointer.stop()
+        if self._wal is not None:
+            self._wal.close()
+        if hasattr(self.database, "close"):
+            self.database.close()
+
+
+    # Save all the sequences of the database into a snapshot file (see "snapshot.py").
+    # Params:
+    # - path: the path of the snapshot
+    # - packed: True to pack the sequences at 2 bits per base in the snapshot
+    def save(self, path, packed=False):
+        with self._lock.read():
+            write_snapshot(path, self.database.items(), self.sequence_id, packed)
+
+
+    # The last sequence ID counter allocated by the database.
+    @property
+    def sequence_id(self):
+        return self._last_id
+
+    @sequence_id.setter
+    def sequence_id(self, value):
+        self._last_id = value
+        self._id_counter = itertools.count(value + 1)
+
     # Get the next ID t be used for a sequence to be stored.
     def _get_next_id(self):
-        self.sequence_id += 1
-        return f"{self.sequence_id}"
+        next_id = next(self._id_counter)
+        self._last_id = max(self._last_id, next_id)
+        return f"{next_id}"
+
+    # Get the statistics of the query caches.
+    # Returns a dictionary with the CacheStats of the "find" and "overlap" caches (see "query_cache.py"),
+    # or None if the database has no caches.
+    def cache_stats(self):
+        if self._find_cache is None:
+            return None
+        return {"find": self._find_cache.stats(), "overlap": self._overlap_cache.stats()}
+
+    # Get the statistics of the Bloom filter prefilter.
+    # Returns the PrefilterStats (see "bloom_filter.py"), or None if the database has no prefilter.
+    def prefilter_stats(self):
+        if self._prefilter is None:
+            return None
+        return self._prefilter.stats()
+
+    # Get the statistics recorded by the instrumentation of the database.
+    # Returns the statistics (see "Instrumentation.stats"), or None if the database isn't instrumented.
+    def stats(self):
+        if self._instrumentation is None:
+            return None
+        return self._instrumentation.stats(self.cache_stats(), self.prefilter_stats())
+
+    # Record how the "find" are answered, and the bases they scan, without recording the calls of the operations.
+    # The shards of a ShardedSequenceDb record their "find" this way, their calls being recorded by the sharded
+    # database itself.
+    # Params:
+    # - instrumentation: the Instrumentation (see "instrumentation.py")
+    def record_finds(self, instrumentation):
+        with self._lock.write():
+            # The total number of bases, to estimate the bases scanned by "find".
+            self._total_bases = sum(len(seq) for (_, seq) in self.database.items())
+            self._instrumentation = instrumentation
+
+    # Get all the sequences of the database, at once.
+    # Returns the list of (<sequence ID>, <uppercase sequence>) tuples, in insertion order.
+    def items(self):
+        with self._lock.read():
+            return list(self.database.items())
 
     # Get the size of the sequence database.
     def __len__(self):
         return len(self.database)
 
     # Search the database for the presence of an exact sequence.
+    # The lookup goes through the hash index, so only sequences sharing the same hash
+    # are compared with the searched sequence.
     #
     # Params:
     # - sequence: the sequence to search for
     # Returns the sequence ID if found, None otherwise
     def _is_present(self, sequence):
-        for id in self.database.keys():
+        if self._hash_index is None:
+            self._build_hash_index()
+        indexed = self._hash_index.get(hash(sequence))
+        if indexed is None:
+            return None
+        if isinstance(indexed, str):
+            return indexed if self.database[indexed] == sequence else None
+        for id in indexed:
             if self.database[id] == sequence:
                 return id
         return None
 
+    # Add a sequence to the hash index.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the (uppercase) sequence
+    def _index_sequence(self, sequence_id, sequence):
+        if self._hash_index is None:
+            self._build_hash_index()
+        key = hash(sequence)
+        indexed = self._hash_index.get(key)
+        if indexed is None:
+            self._hash_index[key] = sequence_id
+        elif isinstance(indexed, str):
+            self._hash_index[key] = [indexed, sequence_id]
+        else:
+            indexed.append(sequence_id)
+
+    # Remove a sequence from the hash index.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the (uppercase) sequence
+    def _unindex_sequence(self, sequence_id, sequence):
+        if self._hash_index is None:
+            return
+        key = hash(sequence)
+        indexed = self._hash_index.get(key)
+        if indexed == sequence_id:
+            del self._hash_index[key]
+        elif isinstance(indexed, list):
+            indexed.remove(sequence_id)
+            if len(indexed) == 1:
+                self._hash_index[key] = indexed[0]
+
+    # Build the hash index from all the sequences of the database.
+    def _build_hash_index(self):
+        self._hash_index = {}
+        for (id, seq) in self.database.items():
+            self._index_sequence(id, seq)
+
+    # Add a sequence to the optional search indexes.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the (uppercase) sequence
+    def _index_search(self, sequence_id, sequence):
+        if self._kmer_index is not None:
+            self._kmer_index.add(sequence_id, sequence)
+        if self._overlap_index is not None:
+            self._overlap_index.add(sequence_id, sequence)
+        if self._prefilter is not None:
+            self._prefilter.add(sequence_id, sequence)
+
+    # Remove a sequence from all the indexes.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the (uppercase) sequence, as it was indexed
+    def _unindex(self, sequence_id, sequence):
+        self._unindex_sequence(sequence_id, sequence)
+        if self._kmer_index is not None:
+            self._kmer_index.remove(sequence_id, sequence)
+        if self._overlap_index is not None:
+            self._overlap_index.remove(sequence_id, sequence)
+        if self._prefilter is not None:
+            self._prefilter.remove(sequence_id)
+        if self._suffix_index is not None:
+            if sequence_id in self._unindexed_ids:
+                del self._unindexed_ids[sequence_id]
+            else:
+                self._stale_ids.add(sequence_id)
+
+    # Store, delete or replace a sequence in the database.
+    # For a durable database, the change is written to the log before being applied.
+    #
+    # Params:
+    # - operation: the LogOperation
+    # - sequence_id: the ID of the sequence
+    # - sequence: the (uppercase) sequence, empty for a deletion
+    def _change(self, operation, sequence_id, sequence=""):
+        if self._wal is not None:
+            with self._wal.lock:
+                self._wal.append(operation, sequence_id, sequence)
+                self._apply_change(operation, sequence_id, sequence)
+        else:
+            self._apply_change(operation, sequence_id, sequence)
+
+    def _apply_change(self, operation, sequence_id, sequence):
+        if operation == LogOperation.INSERT:
+            self._apply_store(sequence_id, sequence)
+        elif operation == LogOperation.DELETE:
+            self._apply_delete(sequence_id)
+        else:
+            self._apply_replace(sequence_id, sequence)
+
+    # Store a sequence in the database under the provided ID and keep the indexes up to date.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the (uppercase) sequence
+    def _apply_store(self, sequence_id, sequence):
+        self._index_sequence(sequence_id, sequence)
+        self.database[sequence_id] = sequence
+        self._index_search(sequence_id, sequence)
+        if self._suffix_index is not None:
+            self._unindexed_ids[sequence_id] = None
+        if self._instrumentation is not None:
+            self._total_bases += len(sequence)
+        self._changes += 1
+        if self._compacted_ids is not None:
+            self._compacted_ids[sequence_id] = None
+        if self._find_cache is not None:
+            # The new sequence is the most recent one, so it goes at the end of the cached results.
+            for sample in self._find_cache.keys():
+                if sample in sequence:
+                    self._find_cache.append(sample, sequence_id)
+
+    # Delete a sequence from the database and the indexes.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    def _apply_delete(self, sequence_id):
+        sequence = self.database[sequence_id]
+        self._unindex(sequence_id, sequence)
+        del self.database[sequence_id]
+        if self._instrumentation is not None:
+            self._total_bases -= len(sequence)
+        self._tombstones += 1
+        self._changes += 1
+        if self._compacted_ids is not None:
+            self._compacted_ids[sequence_id] = None
+        self._discard_cached(sequence_id, sequence)
+
+    # Replace a sequence of the database and keep the indexes up to date.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequence: the new (uppercase) sequence
+    def _apply_replace(self, sequence_id, sequence):
+        old_sequence = self.database[sequence_id]
+        self._unindex(sequence_id, old_sequence)
+        self._index_sequence(sequence_id, sequence)
+        self.database[sequence_id] = sequence
+        self._index_search(sequence_id, sequence)
+        if self._suffix_index is not None:
+            self._unindexed_ids[sequence_id] = None
+        if self._instrumentation is not None:
+            self._total_bases += len(sequence) - len(old_sequence)
+        self._tombstones += 1
+        self._reordered = True
+        self._changes += 1
+        if self._compacted_ids is not None:
+            self._compacted_ids[sequence_id] = None
+        self._discard_cached(sequence_id, old_sequence, sequence)
+
+    # Discard the cached results involving a deleted or replaced sequence.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - sequences: the old (and new) sequence
+    def _discard_cached(self, sequence_id, *sequences):
+        if self._find_cache is None:
+            return
+        for sample in self._find_cache.keys():
+            if any(sample in sequence for sequence in sequences):
+                self._find_cache.discard(sample)
+        for key in self._overlap_cache.keys():
+            if key[1] == sequence_id:
+                self._overlap_cache.discard(key)
+
     # Insert a sequence into the database.
     # A sequence will be inserted if it is valid and not already present in the database.
     # A tuple is returned indicating the insertion result (<InsertResult>, <sequence_id>):
@@ -89,16 +610,162 @@ class SequenceDb:
         if not is_valid_sequence(sequence):
             raise InvalidSequence(sequence)
         else:
-            # Is the sequence already in the database?
             upper_sequence = sequence.upper()
+            with self._lock.write():
+                # Is the sequence already in the database?
+                present_id = self._is_present(upper_sequence)
+                if present_id:
+                    return (InsertResult.ALREADY_PRESENT, present_id)
+
+                # Sequence not already there, insert it.
+                sequence_id = self._get_next_id()
+                self._change(LogOperation.INSERT, sequence_id, upper_sequence)
+                return (InsertResult.INSERTED, sequence_id)
+
+
+    # Insert many sequences into the database.
+    # Unlike "insert", invalid sequences don't raise an exception: they are reported in the results
+    # and the following sequences are still inserted.
+    # Params:
+    # - sequences: an iterable of sequences to insert
+    # Returns a list with one tuple (<InsertResult>, <sequence_id>) per sequence, in the same order:
+    # - (INSERTED, sequence_id) if the sequence is new,
+    # - (ALREADY_PRESENT, sequence_id) if the sequence was already present (or earlier in the batch), or
+    # - (INVALID, None) if the sequence is not a valid DNA sequence.
+    def insert_many(self, sequences):
+        results = []
+        # The whole batch is inserted while holding the lock once.
+        with self._lock.write():
+            for sequence in sequences:
+                if not is_valid_sequence(sequence):
+                    results.append((InsertResult.INVALID, None))
+                    continue
+                upper_sequence = sequence.upper()
+                present_id = self._is_present(upper_sequence)
+                if present_id:
+                    results.append((InsertResult.ALREADY_PRESENT, present_id))
+                else:
+                    sequence_id = self._get_next_id()
+                    self._change(LogOperation.INSERT, sequence_id, upper_sequence)
+                    results.append((InsertResult.INSERTED, sequence_id))
+        return results
+
+
+    # Delete a sequence from the database.
+    # The sequence is removed from all the indexes, but the space it uses in the storage is only reclaimed
+    # by "compact". Its ID is never allocated again.
+    # Params:
+    # - sequence_id: the ID of the sequence to delete
+    # Raises:
+    # - InvalidSequenceId if the sequence ID is not found in the database.
+    def delete(self, sequence_id):
+        with self._lock.write():
+            if sequence_id not in self.database:
+                raise InvalidSequenceId(sequence_id)
+            self._change(LogOperation.DELETE, sequence_id)
+
+
+    # Replace the sequence associated with a sequence ID.
+    # The new sequence keeps the ID (and the place) of the old one, and is not stored if it is already present
+    # in the database. The space used by the old sequence in the storage is only reclaimed by "compact".
+    # Params:
+    # - sequence_id: the ID of the sequence to replace
+    # - sequence: the new sequence
+    # Returns:
+    # - (REPLACED, sequence_id) if the sequence was replaced, or
+    # - (ALREADY_PRESENT, present_id) if the new sequence was already present (the database is unchanged).
+    # Raises:
+    # - InvalidSequence if the new sequence is not a valid DNA sequence.
+    # - InvalidSequenceId if the sequence ID is not found in the database.
+    def replace(self, sequence_id, sequence):
+        if not is_valid_sequence(sequence):
+            raise InvalidSequence(sequence)
+        upper_sequence = sequence.upper()
+        with self._lock.write():
+            if sequence_id not in self.database:
+                raise InvalidSequenceId(sequence_id)
             present_id = self._is_present(upper_sequence)
             if present_id:
                 return (InsertResult.ALREADY_PRESENT, present_id)
+            self._change(LogOperation.REPLACE, sequence_id, upper_sequence)
+            return (InsertResult.REPLACED, sequence_id)
 
-            # Sequence not already there, insert it.
-            sequence_id = self._get_next_id()
-            self.database[sequence_id] = upper_sequence
-            return (InsertResult.INSERTED, sequence_id)
+
+    # Reclaim the space of the deleted and replaced sequences.
+    # The storage is compacted (see "compacted" in "sequence_storage.py"), and the full-text index rebuilt if it
+    # holds deleted or replaced sequences. Everything is built from a view of the storage (see "view" in
+    # "sequence_storage.py") without holding any lock. The sequences changed meanwhile are then applied to the
+    # compacted storage and index: the changes and the queries are only blocked while they replace the current ones.
+    def compact(self):
+        with self._compaction_lock:
+            with self._lock.read():
+                if not self._tombstones:
+                    return
+                source = self.database
+                suffix_index = self._suffix_index
+                rebuild_index = self._rebuild_index()
+                view = source.view()
+                self._compacted_ids = {}
+            try:
+                try:
+                    (storage, compacted_index) = self._compaction(view, rebuild_index)
+                except BaseException:
+                    with self._lock.write():
+                        self._compacted_ids = None
+                    raise
+                with self._lock.write():
+                    (changed_ids, self._compacted_ids) = (self._compacted_ids, None)
+                    self._install_compaction(source, view, storage, suffix_index, compacted_index, changed_ids)
+            finally:
+                # A view of a snapshot keeps its mapped file open.
+                if hasattr(view, "close"):
+                    view.close()
+
+    # Replace the storage and the full-text index by their compacted versions, once the sequences changed
+    # while they were built are applied to them. Called while the changes and the queries are blocked.
+    # Params:
+    # - source: the storage which was compacted
+    # - view: the view of the storage the compacted versions were built from
+    # - storage: the compacted storage, or None
+    # - suffix_index: the full-text index when the view was taken
+    # - compacted_index: the compacted full-text index
+    # - changed_ids: the IDs of the sequences changed since the view was taken
+    def _install_compaction(self, source, view, storage, suffix_index, compacted_index, changed_ids):
+        # The sequences of the view deleted or replaced since leave new tombstones.
+        stale_ids = {id for id in changed_ids if id in view}
+        live_ids = {id: None for id in changed_ids if id in self.database}
+        # A storage switched meanwhile (see "swap_storage") is kept.
+        if storage is not None and self.database is source:
+            for id in changed_ids:
+                if id in live_ids:
+                    storage[id] = self.database[id]
+                elif id in storage:
+                    del storage[id]
+            self.database = storage
+        # A full-text index built or dropped meanwhile is kept.
+        if compacted_index is not suffix_index and self._suffix_index is suffix_index:
+            self._suffix_index = compacted_index
+            self._unindexed_ids = live_ids
+            self._stale_ids = stale_ids
+        self._tombstones = len(stale_ids)
+        replaced = any(id in live_ids for id in stale_ids)
+        self._reordered = (self._reordered and self._kmer_index is not None) or replaced
+
+    # Check if the full-text index holds deleted or replaced sequences, or sequences out of insertion order.
+    def _rebuild_index(self):
+        return self._suffix_index is not None and bool(self._stale_ids or self._reordered)
+
+    # Build the compacted storage and full-text index of the database.
+    # Params:
+    # - storage: the storage (or a view of the storage) to compact
+    # - rebuild_index: True to rebuild the full-text index
+    # Returns a tuple (<compacted storage, or None if the storage can't be compacted>, <full-text index>).
+    def _compaction(self, storage, rebuild_index):
+        compacted = storage.compacted()
+        suffix_index = self._suffix_index
+        if rebuild_index:
+            suffix_index = SuffixArrayIndex((storage if compacted is None else compacted).items())
+        return (compacted, suffix_index)
 
 
     # Get the sequence associated with a sequence ID.
@@ -109,23 +776,459 @@ class SequenceDb:
     # Raises:
     # - InvalidSequenceId if the sequence ID is not found in the database.
     def get(self, sequence_id):
-        if sequence_id in self.database:
-            return self.database[sequence_id]
+        with self._lock.read():
+            if sequence_id in self.database:
+                return self.database[sequence_id]
 
         raise InvalidSequenceId(sequence_id)
 
 
     # Find all sequences in the database that contains a sampel sequence.
+    # The sample can also be searched on the opposite DNA strand (as its reverse complement), or on both strands
+    # at once: the candidates of both strands are then verified together (a sequence is searched for each strand
+    # until one matches), and each matching sequence is reported once.
     # Params:
     # - sample: the sampel DNA sequence to match
-    # Returns a list of sequence IDs for all matching sequences in the database.
+    # - strand: the Strand (or its value) to search
+    # Returns a list of sequence IDs for all matching sequences in the database, or with the BOTH strand,
+    # a list of StrandMatch indicating which strand matched each sequence.
+    # Raises:
+    # - InvalidSample if the sample sequence is not a valid DNA sequence.
+    # - ValueError if the strand is unknown.
+    def find(self, sample, strand=Strand.FORWARD):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        strand = Strand(strand)
+        upper_sample = sample.upper()
+        if strand == Strand.REVERSE:
+            upper_sample = reverse_complement(upper_sample)
+        elif strand == Strand.BOTH:
+            # The matches of both strands are not cached.
+            with self._lock.read():
+                return self._find_both(upper_sample)
+        with self._lock.read():
+            if self._find_cache is None:
+                return self._find(upper_sample)
+            found_ids = self._find_cache.get(upper_sample)
+            if found_ids is None:
+                found_ids = self._find(upper_sample)
+                self._find_cache.put(upper_sample, found_ids, len(found_ids))
+            # The cached list is kept up to date by the insertions, the caller gets its own copy.
+            return list(found_ids)
+
+    # Check if "find" answers a sample without scanning all the sequences: from the query cache, the full-text
+    # index, or the k-mer index or the Bloom filters when the sample is long enough to use them.
+    # Params:
+    # - sample: the (valid) sample DNA sequence
+    # Returns True if the sample is answered by a cache or an index.
+    def is_indexed(self, sample):
+        upper_sample = sample.upper()
+        with self._lock.read():
+            return (
+                (self._find_cache is not None and upper_sample in self._find_cache)
+                or self._suffix_index is not None
+                or (self._kmer_index is not None and len(upper_sample) >= self._kmer_index.k)
+                or (self._prefilter is not None and len(upper_sample) >= self._prefilter.k)
+            )
+
+    # Find all sequences containing an uppercase sample, with the help of the search indexes.
+    def _find(self, upper_sample):
+        if self._suffix_index is not None:
+            if self._instrumentation is not None:
+                self._record_find("suffix_index", len(self._unindexed_ids))
+            # The sequences inserted after the index was built are more recent than all the indexed ones.
+            found_ids = self._indexed(self._suffix_index.find(upper_sample))
+            found_ids += self.database.find(upper_sample, self._unindexed_ids)
+            if self._reordered:
+                found_ids.sort(key=int)
+            return found_ids
+
+        # Only the candidates of the k-mer index need to be verified (when the sample is long enough to use it),
+        # and among them only the ones passing their Bloom filter.
+        candidates = self._candidates(upper_sample)
+        verified = self._prefiltered([upper_sample], candidates)
+        if self._instrumentation is not None:
+            self._record_find(self._find_path(candidates, verified), self._scanned(verified))
+        found_ids = self.database.find(upper_sample, verified)
+        if verified is not candidates:
+            self._prefilter.record_false_positives(len(verified) - len(found_ids))
+        return found_ids
+
+    # Keep the sequences passing their Bloom filter for one of the samples.
+    #
+    # Params:
+    # - upper_samples: the uppercase samples
+    # - ids: the IDs of the sequences to check, in insertion order (all the sequences if None)
+    # Returns the list of the IDs passing their filter, or "ids" itself if there is no prefilter
+    # or a sample is too short to use it.
+    def _prefiltered(self, upper_samples, ids):
+        if self._prefilter is None:
+            return ids
+        passed = self._prefilter.filter(upper_samples, self.database if ids is None else ids)
+        return ids if passed is None else passed
+
+    # Get the way a "find" is answered without the full-text index (see "instrumentation.py").
+    #
+    # Params:
+    # - candidates: the candidates of the k-mer index, None if it wasn't used
+    # - verified: the IDs of the sequences to verify, None to scan all the sequences
+    def _find_path(self, candidates, verified):
+        if candidates is not None:
+            return "kmer_index"
+        return "scan" if verified is None else "bloom_filter"
+
+    # Get the number of sequences scanned by a "find".
+    #
+    # Params:
+    # - verified: the IDs of the sequences to verify, None to scan all the sequences
+    def _scanned(self, verified):
+        return len(self.database) if verified is None else len(verified)
+
+    # Get the IDs found by the full-text index, without the sequences deleted or replaced since it was built.
+    def _indexed(self, found_ids):
+        if self._stale_ids:
+            return [id for id in found_ids if id not in self._stale_ids]
+        return found_ids
+
+    # Get the candidates of the k-mer index for a sample, in insertion order.
+    # Returns the list of candidate IDs, or None if there is no k-mer index or the sample is too short to use it.
+    def _candidates(self, upper_sample):
+        if self._kmer_index is None:
+            return None
+        candidates = self._kmer_index.candidates(upper_sample)
+        if self._reordered and candidates:
+            candidates.sort(key=int)
+        return candidates
+
+    # Find all sequences containing an uppercase sample or its reverse complement, with the help of the search indexes.
+    # The candidates of both strands are looked up together (a single lookup with a canonical k-mer index), then
+    # each candidate is read once and searched for both strands.
+    # Returns a list of StrandMatch.
+    def _find_both(self, upper_sample):
+        reverse_sample = reverse_complement(upper_sample)
+        # A reverse palindrome (like "GAATTC") is its own reverse complement.
+        if reverse_sample == upper_sample:
+            return [StrandMatch(id, Strand.BOTH) for id in self._find(upper_sample)]
+
+        if self._suffix_index is not None:
+            if self._instrumentation is not None:
+                self._record_find("suffix_index", len(self._unindexed_ids))
+            forward = set(self._indexed(self._suffix_index.find(upper_sample)))
+            reverse = set(self._indexed(self._suffix_index.find(reverse_sample)))
+            matches = [(id, id in forward, id in reverse) for id in sorted(forward | reverse, key=int)]
+            matches += self.database.find_both(upper_sample, reverse_sample, self._unindexed_ids)
+            if self._reordered:
+                matches.sort(key=lambda match: int(match[0]))
+        else:
+            candidates = self._both_candidates(upper_sample, reverse_sample)
+            verified = self._prefiltered([upper_sample, reverse_sample], candidates)
+            if self._instrumentation is not None:
+                self._record_find(self._find_path(candidates, verified), self._scanned(verified))
+            matches = self.database.find_both(upper_sample, reverse_sample, verified)
+            if verified is not candidates:
+                self._prefilter.record_false_positives(len(verified) - len(matches))
+        return [StrandMatch(id, _matched_strand(forward, reverse)) for (id, forward, reverse) in matches]
+
+    # Get the candidates of the k-mer index for both strands of a sample.
+    # A canonical index gives them with a single lookup, otherwise the candidates of each strand are merged.
+    # Returns the list of candidate IDs in insertion order, or None if the k-mer index can't be used.
+    def _both_candidates(self, upper_sample, reverse_sample):
+        if self._kmer_index is None:
+            return None
+        if self._kmer_index.canonical:
+            return self._candidates(upper_sample)
+        forward = self._kmer_index.candidates(upper_sample)
+        if forward is None:
+            return None
+        reverse = self._kmer_index.candidates(reverse_sample)
+        return sorted(set(forward).union(reverse), key=int)
+
+    # Record how a "find" was answered, the scanned bases being estimated from the average sequence length.
+    #
+    # Params:
+    # - path: the way "find" was answered (see "instrumentation.py")
+    # - scanned_sequences: the number of sequences scanned
+    def _record_find(self, path, scanned_sequences):
+        size = len(self.database)
+        if scanned_sequences == size:
+            bases = self._total_bases
+        else:
+            bases = scanned_sequences * self._total_bases // size
+        self._instrumentation.record_find(path, bases)
+
+
+    # Iterate over the sequences in the database that contain a sample sequence.
+    # The matches are found and returned progressively, in the same order as "find", so the first matches are
+    # available without searching the whole database, and the search stops as soon as the iteration stops.
+    # The sequences inserted during the iteration are not returned.
+    # Params:
+    # - sample: the sample DNA sequence to match
+    # - limit: the maximum number of IDs to return (no limit if None)
+    # - after_id: only return the IDs following this one, to get the next page of results (from the start if None)
+    # Returns an iterator of the IDs of the matching sequences.
+    # Raises:
+    # - InvalidSample if the sample sequence is not a valid DNA sequence.
+    # - InvalidSequenceId if "after_id" is not a valid sequence ID.
+    def iter_find(self, sample, limit=None, after_id=None):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        after = self._id_number(after_id)
+        matches = (id for chunk in self._find_chunks(sample.upper(), after) for id in chunk)
+        return itertools.islice(matches, limit)
+
+
+    # Count the sequences in the database that contain a sample sequence, without building the list of their IDs.
+    # Params:
+    # - sample: the sample DNA sequence to match
+    # Returns the number of matching sequences.
+    # Raises:
+    # - InvalidSample if the sample sequence is not a valid DNA sequence.
+    def find_count(self, sample):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        upper_sample = sample.upper()
+        with self._lock.read():
+            found_ids = self._find_cache.get(upper_sample) if self._find_cache is not None else None
+            if found_ids is not None:
+                return len(found_ids)
+            if self._suffix_index is not None:
+                return len(self._find(upper_sample))
+            candidates = self._candidates(upper_sample)
+            verified = self._prefiltered([upper_sample], candidates)
+            count = self.database.find_count(upper_sample, verified)
+            if verified is not candidates:
+                self._prefilter.record_false_positives(len(verified) - count)
+            return count
+
+    # Find all the occurrences of a sample in the database, overlapping occurrences included.
+    # The occurrences are located by the same index lookup or scan as "find", instead of searching the matching
+    # sequences again afterwards.
+    # Params:
+    # - sample: the sample DNA sequence to match
+    # Returns a list of Occurrence, in insertion order of the sequences and in increasing position in each one.
+    # Raises:
+    # - InvalidSample if the sample sequence is not a valid DNA sequence.
+    def find_positions(self, sample):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        upper_sample = sample.upper()
+        with self._lock.read():
+            occurrences = self._find_occurrences(upper_sample)
+        return [Occurrence(id, position) for (id, positions) in occurrences for position in positions]
+
+    # Count all the occurrences of a sample in the database (overlapping occurrences included),
+    # without building the list of their positions.
+    # Params:
+    # - sample: the sample DNA sequence to match
+    # Returns the number of occurrences.
     # Raises:
     # - InvalidSample if the sample sequence is not a valid DNA sequence.
-    def find(self, sample):
+    def count(self, sample):
         if not is_valid_sequence(sample):
             raise InvalidSample(sample)
         upper_sample = sample.upper()
-        return [id for (id, seq) in self.database.items() if upper_sample in seq]
+        with self._lock.read():
+            if self._suffix_index is not None:
+                if self._stale_ids:
+                    return sum(len(positions) for (_, positions) in self._find_occurrences(upper_sample))
+                # The occurrences in the indexed sequences are the size of a range of the suffix array.
+                return (
+                    self._suffix_index.count_occurrences(upper_sample)
+                    + self.database.count_occurrences(upper_sample, self._unindexed_ids)
+                )
+            return self.database.count_occurrences(upper_sample, self._occurrence_candidates(upper_sample))
+
+    # Find all the occurrences of an uppercase sample, with the help of the search indexes.
+    # Returns a list of (<sequence ID>, <positions of the occurrences>) tuples, in insertion order.
+    def _find_occurrences(self, upper_sample):
+        if self._suffix_index is not None:
+            occurrences = self._suffix_index.find_occurrences(upper_sample)
+            if self._stale_ids:
+                occurrences = [occurrence for occurrence in occurrences if occurrence[0] not in self._stale_ids]
+            occurrences += self.database.find_occurrences(upper_sample, self._unindexed_ids)
+            if self._reordered:
+                occurrences.sort(key=lambda occurrence: int(occurrence[0]))
+            return occurrences
+        return self.database.find_occurrences(upper_sample, self._occurrence_candidates(upper_sample))
+
+    # Get the sequences that may contain an uppercase sample, without the full-text index: the cached "find"
+    # results if any, otherwise the candidates of the k-mer index passing their Bloom filter.
+    # Returns the list of IDs, in insertion order, or None if all the sequences must be searched.
+    def _occurrence_candidates(self, upper_sample):
+        found_ids = self._find_cache.get(upper_sample) if self._find_cache is not None else None
+        if found_ids is not None:
+            return list(found_ids)
+        return self._prefiltered([upper_sample], self._candidates(upper_sample))
+
+    # Get the counter of a sequence ID used as a pagination cursor.
+    # Returns the counter, 0 if there is no cursor.
+    def _id_number(self, sequence_id):
+        if sequence_id is None:
+            return 0
+        try:
+            return int(sequence_id)
+        except (TypeError, ValueError):
+            raise InvalidSequenceId(sequence_id)
+
+    # Find, chunk by chunk, the sequences containing an uppercase sample.
+    # The lock is only held while a chunk is searched.
+    #
+    # Params:
+    # - upper_sample: the uppercase sample
+    # - after: only the sequences with a greater ID counter are searched
+    # Returns a generator of lists of matching sequence IDs.
+    def _find_chunks(self, upper_sample, after):
+        with self._lock.read():
+            found_ids = self._find_cache.get(upper_sample) if self._find_cache is not None else None
+            if found_ids is not None:
+                found_ids = list(found_ids)
+            elif self._suffix_index is not None:
+                found_ids = self._find(upper_sample)
+            else:
+                candidates = self._candidates(upper_sample)
+                # The IDs are kept (not the sequences), so that the sequences inserted meanwhile are ignored.
+                ids = list(self.database) if candidates is None else candidates
+                changes = self._changes
+        if found_ids is not None:
+            yield found_ids[bisect_right(found_ids, after, key=int):]
+            return
+
+        # The IDs are counters allocated in insertion order.
+        for start in range(bisect_right(ids, after, key=int), len(ids), ITER_FIND_CHUNK_SIZE):
+            with self._lock.read():
+                chunk = ids[start:start + ITER_FIND_CHUNK_SIZE]
+                if self._changes != changes:
+                    # Skip the sequences deleted meanwhile.
+                    chunk = [id for id in chunk if id in self.database]
+                verified = self._prefiltered([upper_sample], chunk)
+                matches = self.database.find(upper_sample, verified)
+                if verified is not chunk:
+                    self._prefilter.record_false_positives(len(verified) - len(matches))
+            yield matches
+
+
+    # Find all sequences in the database that contain a sample with a few errors.
+    # Either mismatches only (Hamming distance) or mismatches, insertions and deletions (edit distance) are allowed.
+    # A sequence is only searched if it contains, exactly, one of the pieces of the sample that any match
+    # must contain (these pieces are looked up in the k-mer index and the Bloom filters, if any).
+    # Params:
+    # - sample: the sample DNA sequence to match
+    # - max_mismatches: the maximum number of mismatches (when "max_edits" is None)
+    # - max_edits: the maximum edit distance
+    # Returns a list with an ApproxMatch for each matching sequence (its best match), in insertion order.
+    # Raises:
+    # - InvalidSample if the sample sequence is not a valid DNA sequence.
+    # - ValueError if the maximum number of errors is negative.
+    def find_approx(self, sample, max_mismatches=0, max_edits=None):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        errors = max_mismatches if max_edits is None else max_edits
+        if errors < 0:
+            raise ValueError(f"Invalid number of errors: [{errors}]")
+        upper_sample = sample.upper()
+        pieces = seed_pieces(upper_sample, errors)
+        search = hamming_search if max_edits is None else edit_search
+
+        with self._lock.read():
+            candidates = None
+            if self._kmer_index is not None:
+                piece_candidates = [self._kmer_index.candidates(piece) for piece in pieces]
+                if all(ids is not None for ids in piece_candidates):
+                    candidates = sorted({id for ids in piece_candidates for id in ids}, key=int)
+            candidates = self._prefiltered(pieces, candidates)
+            items = self.database.items() if candidates is None else ((id, self.database[id]) for id in candidates)
+
+            matches = []
+            for (id, seq) in items:
+                if any(piece in seq for piece in pieces):
+                    match = search(seq, upper_sample, errors)
+                    if match is not None:
+                        matches.append(ApproxMatch(id, *match))
+            return matches
+
+
+    # Find, for many samples at once, all sequences in the database that contain each sample.
+    # All the samples are searched with a single scan of the database.
+    # Invalid samples don't abort the search, they are reported separately.
+    #
+    # Params:
+    # - samples: the sample DNA sequences to match
+    # Returns a tuple (<matches>, <invalid samples>):
+    # - matches: a dictionary associating each valid sample to the list of IDs of the matching sequences.
+    # - invalid samples: a list of InvalidSample exceptions, one for each invalid sample.
+    def find_many(self, samples):
+        valid_samples = []
+        invalid_samples = []
+        for sample in samples:
+            if is_valid_sequence(sample):
+                valid_samples.append(sample)
+            else:
+                invalid_samples.append(InvalidSample(sample))
+
+        # Samples differing only by their case share the same pattern.
+        patterns = list(dict.fromkeys(sample.upper() for sample in valid_samples))
+        found_ids = [[] for _ in patterns]
+        if patterns:
+            automaton = AhoCorasick(patterns)
+            with self._lock.read():
+                for (id, seq) in self.database.items():
+                    for index in automaton.search(seq):
+                        found_ids[index].append(id)
+
+        ids_by_pattern = dict(zip(patterns, found_ids))
+        matches = {sample: list(ids_by_pattern[sample.upper()]) for sample in valid_samples}
+        return (matches, invalid_samples)
+
+
+    # Build (or rebuild) the full-text index used by "find".
+    # The index covers all the sequences currently in the database. Sequences inserted afterwards
+    # are still found, but by a scan, until the index is rebuilt.
+    # Returns the built index (see "suffix_index.py").
+    def build_index(self):
+        with self._lock.write():
+            self._suffix_index = SuffixArrayIndex(self.database.items())
+            self._unindexed_ids = {}
+            self._stale_ids = set()
+            return self._suffix_index
+
+
+    # Drop the full-text index, "find" goes back to scanning the database.
+    def drop_index(self):
+        with self._lock.write():
+            self._suffix_index = None
+            self._unindexed_ids = {}
+            self._stale_ids = set()
+
+
+    # Build the overlap graph of all the sequences of the database (see "overlap_graph.py"): its edges are the
+    # suffix-prefix overlaps between the sequences, found with a hash of the sequence prefixes instead of
+    # checking every pair of sequences with "overlap".
+    # The graph is a snapshot: the sequences changed afterwards are not part of it.
+    # Params:
+    # - minimum_overlap: the minimum length of an overlap
+    # Returns the OverlapGraph.
+    # Raises:
+    # - ValueError if the minimum overlap is not positive.
+    def build_overlap_graph(self, minimum_overlap=DEFAULT_MINIMUM_OVERLAP):
+        with self._lock.read():
+            return OverlapGraph(self.database.items(), minimum_overlap)
+
+
+    # Assemble the sequences of the database into contigs, with a greedy pass on their overlap graph
+    # (see "OverlapGraph.greedy_paths").
+    # Params:
+    # - graph: the OverlapGraph of the database (see "build_overlap_graph")
+    # Returns the list of Contig, in the insertion order of their first sequence.
+    # Raises:
+    # - InvalidSequenceId if a sequence of the graph was deleted since the graph was built.
+    def assemble(self, graph):
+        paths = graph.greedy_paths()
+        with self._lock.read():
+            for path in paths:
+                for sequence_id in path.sequence_ids:
+                    if sequence_id not in self.database:
+                        raise InvalidSequenceId(sequence_id)
+            return [Contig(spell(path, self.database), path.sequence_ids) for path in paths]
 
 
     # Validate if a sample sequence overlaps a sequence in the database.
@@ -134,14 +1237,102 @@ class SequenceDb:
     # - sample: the sample sequence to validate the overlap
     # - sequence_id: the sequence ID in the database
     # - minimum_overlap: - the minimum lenght of an accepted overlap sequence
+    # - strand: the Strand (or its value) of the sample to check (the sample itself, its reverse complement or both)
     # Returns True is the sample overlaps the sequence prefix or suffix (or both), False otherwise.
-    def overlap(self, sample, sequence_id, minimum_overlap=2):
+    # With the BOTH strand, returns the Strand of the sample overlapping the sequence, or None.
+    # Raises:
+    # - InvalidSample if the sample sequence is not a valid DNA sequence.
+    # - InvalidSequenceId if the sequence ID is not found in the database.
+    # - ValueError if the strand is unknown.
+    def overlap(self, sample, sequence_id, minimum_overlap=2, strand=Strand.FORWARD):
+        strand = Strand(strand)
+        if strand == Strand.FORWARD:
+            return self.overlap_details(sample, sequence_id, minimum_overlap) is not None
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        reverse_sample = reverse_complement(sample)
+        reverse = self.overlap_details(reverse_sample, sequence_id, minimum_overlap) is not None
+        if strand == Strand.REVERSE:
+            return reverse
+        forward = self.overlap_details(sample, sequence_id, minimum_overlap) is not None
+        return _matched_strand(forward, reverse) if forward or reverse else None
+
+
+    # Get the details of the overlap between a sample sequence and a sequence in the database.
+    # The sample overlap could be with the sequence's prefix or its suffix (or both), and for each of them
+    # the longest overlap is reported.
+    # Params:
+    # - sample: the sample sequence to validate the overlap
+    # - sequence_id: the sequence ID in the database
+    # - minimum_overlap: - the minimum length of an accepted overlap sequence
+    # Returns an OverlapResult, or None if the sample doesn't overlap the sequence.
+    # Raises:
+    # - InvalidSample if the sample sequence is not a valid DNA sequence.
+    # - InvalidSequenceId if the sequence ID is not found in the database.
+    def overlap_details(self, sample, sequence_id, minimum_overlap=2):
         if not is_valid_sequence(sample):
             raise InvalidSample(sample)
         else:
             upper_sample = sample.upper()
-            sequence = self.get(sequence_id)
-            prefix_overlap = overlap_prefix(upper_sample, sequence)
-            suffix_overlap = overlap_suffix(upper_sample, sequence)
-            # Future enhancement: could return the obtained prefix/suffix overlap sequences instead of just True/False.
-            return prefix_overlap is not None or suffix_overlap is not None
+            key = (upper_sample, sequence_id, minimum_overlap)
+            if self._overlap_cache is not None:
+                result = self._overlap_cache.get(key, _NOT_CACHED)
+                if result is not _NOT_CACHED:
+                    return result
+            with self._lock.read():
+                if sequence_id not in self.database:
+                    raise InvalidSequenceId(sequence_id)
+                # An overlap can't be longer than the sample, so only the ends of the sequence are needed.
+                sequence_prefix = self.database.prefix(sequence_id, len(upper_sample))
+                sequence_suffix = self.database.suffix(sequence_id, len(upper_sample))
+                prefix_overlap = overlap_prefix(upper_sample, sequence_prefix, minimum_overlap)
+                suffix_overlap = overlap_suffix(upper_sample, sequence_suffix, minimum_overlap)
+                result = _overlap_result(prefix_overlap, suffix_overlap)
+                # Cached before the lock is released: a replacement or a deletion then discards it.
+                if self._overlap_cache is not None:
+                    self._overlap_cache.put(key, result)
+            return result
+
+    # Find all the sequences in the database overlapped by a sample sequence.
+    # The sample overlap could be with a sequence's prefix or its suffix (or both).
+    # Params:
+    # - sample: the sample sequence to validate the overlaps
+    # - minimum_overlap: - the minimum length of an accepted overlap sequence
+    # Returns a dictionary associating the ID of each overlapped sequence to its OverlapResult, in ID order.
+    # Raises:
+    # - InvalidSample if the sample sequence is not a valid DNA sequence.
+    def overlap_all(self, sample, minimum_overlap=2):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        upper_sample = sample.upper()
+
+        with self._lock.read():
+            if self._overlap_index is not None:
+                prefix_lengths = self._overlap_index.prefix_overlaps(
+                    upper_sample, minimum_overlap, self.database.prefix
+                )
+                suffix_lengths = self._overlap_index.suffix_overlaps(
+                    upper_sample, minimum_overlap, self.database.suffix
+                )
+            else:
+                # Without index, every sequence has to be checked.
+                (prefix_lengths, suffix_lengths) = ({}, {})
+                for id in self.database:
+                    sequence_prefix = self.database.prefix(id, len(upper_sample))
+                    sequence_suffix = self.database.suffix(id, len(upper_sample))
+                    lengths = overlap_prefix_lengths(upper_sample, sequence_prefix, minimum_overlap)
+                    if lengths:
+                        prefix_lengths[id] = lengths[0]
+                    lengths = overlap_suffix_lengths(upper_sample, sequence_suffix, minimum_overlap)
+                    if lengths:
+                        suffix_lengths[id] = lengths[0]
+
+        overlaps = {}
+        for id in sorted(prefix_lengths.keys() | suffix_lengths.keys(), key=int):
+            prefix_length = prefix_lengths.get(id)
+            suffix_length = suffix_lengths.get(id)
+            overlaps[id] = _overlap_result(
+                upper_sample[-prefix_length:] if prefix_length else None,
+                upper_sample[:suffix_length] if suffix_length else None
+            )
+        return overlaps
@@ -2,17 +2,38 @@
 # Simple command line interface for the Sequence Database
 # Just execute this script to get things going!
 #
+import argparse
+import os
+
 from sequence_db import (
     SequenceDb,
 )
+from sequence_loader import load_file
+from sharded_sequence_db import ShardedSequenceDb
 from exceptions.invalid_sample_ex import InvalidSample
 from exceptions.invalid_sequence_ex import InvalidSequence
 from exceptions.invalid_sequence_id_ex import InvalidSequenceId
 
 MINIMUM_OVERLAP_SIZE = 2
 
+parser = argparse.ArgumentParser(description="DNA sequence database")
+parser.add_argument("--shard-prefix-length", type=int, default=0,
+                    help="shard the database on the first bases of the sequences (no sharding if 0)")
+parser.add_argument("--snapshot",
+                    help="snapshot file (directory of a sharded database) opened at startup (if it exists) "
+                         "and saved on exit")
+arguments = parser.parse_args()
+
 # Instantiate the application's sequence database.
-database = SequenceDb()
+# A saved sharded database keeps its prefix length.
+if arguments.shard_prefix_length and arguments.snapshot and os.path.exists(arguments.snapshot):
+    database = ShardedSequenceDb.open(arguments.snapshot)
+elif arguments.shard_prefix_length:
+    database = ShardedSequenceDb(arguments.shard_prefix_length)
+elif arguments.snapshot and os.path.exists(arguments.snapshot):
+    database = SequenceDb.open(arguments.snapshot)
+else:
+    database = SequenceDb()
 
 # Insert a DNA sequence and persists it to the database.
 # Prompts for a DNA sequence.
@@ -27,6 +48,20 @@ def insert_sequence():
     return True
 
 
+# Load all the sequences of a FASTA or plain text file (optionally gzip compressed).
+# Prompts for the file path.
+def load_sequences():
+    print("\nLoad sequences from file: ", end="")
+    path = input()
+    try:
+        summary = load_file(database, path)
+        print(f"Load result: Inserted:[{summary.inserted}] Already present:[{summary.already_present}] "
+              f"Invalid:[{summary.invalid}] Bases:[{summary.bases}]")
+    except OSError as e:
+        print(f"ERROR - Unable to load file: [{e}]")
+    return True
+
+
 # Gets a sequence from the database using the unique sequence identifier.
 # Prompts for the sequence ID.
 def get_sequence():
@@ -41,13 +76,19 @@ def get_sequence():
 
 
 # Finds all sequences containing the sample sequence.
+# The IDs are printed as soon as they are found.
 # Prompts for the sample DNA sequence.
 def find_sequence():
     print("Find sequence from sample: ", end="")
     sample = input()
     try:
-        sequence_ids = database.find(sample)
-        print(f"Find result: {sequence_ids} from Sample:[{sample}]")
+        sequence_ids = database.iter_find(sample)
+        count = 0
+        print(f"Find result from Sample:[{sample}]:", end="", flush=True)
+        for sequence_id in sequence_ids:
+            print(f" {sequence_id}", end="", flush=True)
+            count += 1
+        print(f"\nFind count:[{count}]")
     except InvalidSample as e:
         print(e)
     return True
@@ -70,8 +111,12 @@ def overlap_sequence():
     return True
 
 
-# Exit the CLI.
+# Exit the CLI, saving the database first if a snapshot file was provided.
 def exit_application():
+    if arguments.snapshot:
+        database.save(arguments.snapshot)
+        print(f"Database saved to snapshot:[{arguments.snapshot}]")
+    database.close()
     print("Exiting...To the next!")
     return False
 
@@ -79,6 +124,7 @@ def exit_application():
 # The accepted commands and the functions to execute.
 commands = {
     "I": insert_sequence,
+    "L": load_sequences,
     "G": get_sequence,
     "F": find_sequence,
     "O": overlap_sequence,
@@ -90,6 +136,7 @@ def display_menu():
     print("\nDNA Sequence Database")
     print("---------------------")
     print("I - Insert sequence")
+    print("L - Load sequences from file")
     print("G - Get sequence")
     print("F - Find sequence")
     print("O - Overlap sequence")
@@ -0,0 +1,115 @@
+#
+# Client of the DNA sequence database server (see "sequence_db_server.py").
+#
+# The client is asynchronous and pipelines its requests: the concurrent calls made on a single connection are
+# all sent without waiting for the previous responses, for example:
+#
+#     client = await SequenceDbClient.connect("127.0.0.1", 8765)
+#     results = await asyncio.gather(*(client.find(sample) for sample in samples))
+#     await client.close()
+#
+
+import asyncio
+import json
+
+from sequence_db import InsertResult
+from sequence_db_server import (
+    DEFAULT_PORT,
+    MAX_LINE_LENGTH
+)
+
+from exceptions.internal_error_ex import InternalError
+from exceptions.invalid_request_ex import InvalidRequest
+from exceptions.invalid_sample_ex import InvalidSample
+from exceptions.invalid_sequence_ex import InvalidSequence
+from exceptions.invalid_sequence_id_ex import InvalidSequenceId
+
+# The exceptions raised for the errors reported by the server.
+ERRORS = {
+    exception.__name__: exception
+    for exception in (InternalError, InvalidRequest, InvalidSample, InvalidSequence, InvalidSequenceId)
+}
+
+
+class SequenceDbClient:
+
+    # Use "connect" or "connect_unix" to create a client.
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        # The futures waiting for the responses, in the request order.
+        self._waiting = []
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    # Connect to a server listening on a TCP socket.
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=DEFAULT_PORT):
+        return cls(*await asyncio.open_connection(host, port, limit=MAX_LINE_LENGTH))
+
+    # Connect to a server listening on a Unix socket.
+    @classmethod
+    async def connect_unix(cls, path):
+        return cls(*await asyncio.open_unix_connection(path, limit=MAX_LINE_LENGTH))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # Close the connection.
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._receiver
+
+    # Read the responses and hand them over to the waiting requests.
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                self._waiting.pop(0).set_result(json.loads(line))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for future in self._waiting:
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to the server lost"))
+            self._waiting.clear()
+
+    # Send a request and wait for its response.
+    # Returns the result of the request.
+    # Raises the exception reported by the server, if any.
+    async def _request(self, *request):
+        if self._receiver.done():
+            raise ConnectionError("Connection to the server lost")
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(future)
+        self._writer.write(json.dumps(request).encode() + b"\n")
+        await self._writer.drain()
+        response = await future
+        if "error" in response:
+            raise ERRORS[response["error"]](response["value"])
+        return response["result"]
+
+    # Insert a sequence. See "SequenceDb.insert".
+    async def insert(self, sequence):
+        (result, sequence_id) = await self._request("insert", sequence)
+        return (InsertResult(result), sequence_id)
+
+    # Get the sequence associated with a sequence ID. See "SequenceDb.get".
+    async def get(self, sequence_id):
+        return await self._request("get", sequence_id)
+
+    # Find all sequences that contain a sample. See "SequenceDb.find".
+    async def find(self, sample):
+        return await self._request("find", sample)
+
+    # Validate if a sample overlaps a sequence. See "SequenceDb.overlap".
+    async def overlap(self, sample, sequence_id, minimum_overlap=2):
+        return await self._request("overlap", sample, sequence_id, minimum_overlap)
@@ -0,0 +1,342 @@
+#
+# Network server for the DNA sequence database.
+#
+# The server exposes "insert", "get", "find" and "overlap" on a TCP or Unix socket, with a line protocol:
+# - request: a JSON array holding the command and its arguments, for example ["find", "ACGT"],
+# - response: a JSON object, either {"result": <result>} or {"error": <exception name>, "value": <invalid value>}.
+#   An unexpected error of the server is logged and reported as an "InternalError".
+#
+# Requests can be pipelined: a client may send many requests without waiting for the responses. The requests
+# of a connection are executed concurrently, but the responses are always sent back in the request order.
+# The changes are executed one at a time, in the order they were received.
+#
+# The queries run in a thread pool so that they never block the event loop, and the concurrent "find" requests
+# (from all the connections) are coalesced into batches. The samples of a batch answered by an index are looked up
+# one by one, while the samples needing a scan of the database are all searched by a single "find_many" scan.
+# The database (a SequenceDb, or a ShardedSequenceDb with "--shard-prefix-length") is accessed by several threads:
+# it must be created in thread-safe mode.
+#
+#     > python sequence_db_server.py --port 8765
+#
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dna_utilities import is_valid_sequence
+from sequence_db import SequenceDb
+from sharded_sequence_db import ShardedSequenceDb
+
+from exceptions.internal_error_ex import InternalError
+from exceptions.invalid_request_ex import InvalidRequest
+from exceptions.invalid_sample_ex import InvalidSample
+from exceptions.invalid_sequence_ex import InvalidSequence
+from exceptions.invalid_sequence_id_ex import InvalidSequenceId
+
+DEFAULT_PORT = 8765
+
+logger = logging.getLogger(__name__)
+
+# The longest accepted request line, in bytes.
+MAX_LINE_LENGTH = 16 * 1024 * 1024
+
+# The maximum number of requests of a connection waiting for their response.
+MAX_PIPELINED_REQUESTS = 1024
+
+# The maximum number of samples searched by a single "find_many" scan.
+DEFAULT_MAX_BATCH_SIZE = 1024
+
+# The value reported for each exception sent back to the clients.
+ERROR_VALUES = {
+    InternalError: lambda ex: ex.error,
+    InvalidRequest: lambda ex: ex.request,
+    InvalidSample: lambda ex: ex.sample,
+    InvalidSequence: lambda ex: ex.sequence,
+    InvalidSequenceId: lambda ex: ex.sequence_id
+}
+
+
+# Encode a response line.
+#
+# Params:
+# - result: the result of the request
+# - error: the exception raised by the request, or None
+# Returns the encoded line.
+def encode_response(result, error=None):
+    if error is None:
+        response = {"result": result}
+    else:
+        response = {"error": type(error).__name__, "value": ERROR_VALUES[type(error)](error)}
+    return json.dumps(response).encode() + b"\n"
+
+
+# Coalesces the concurrent "find" requests into batches.
+# While a batch is searched, the new samples are queued and all searched by the next batch.
+# A "find_many" scan skips the indexes, so only the samples that "find" would also answer with a scan are
+# searched together: the other ones are looked up concurrently with "find".
+class FindBatcher:
+
+    # Params:
+    # - db: the sequence database
+    # - executor: the executor running the searches
+    # - max_batch_size: the maximum number of samples of a batch
+    def __init__(self, db, executor, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+        self.db = db
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.batch_count = 0
+        self.scan_count = 0
+        # The futures waiting for the result of each queued sample.
+        self._pending = {}
+        self._flushing = False
+
+    # Find all sequences that contain a (valid) sample.
+    # Returns the list of matching sequence IDs.
+    async def find(self, sample):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(sample.upper(), []).append(future)
+        if not self._flushing:
+            self._flushing = True
+            asyncio.ensure_future(self._flush())
+        return await future
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        try:
+            # Let the requests already received join the first batch.
+            await asyncio.sleep(0)
+            while self._pending:
+                samples = list(self._pending)[:self.max_batch_size]
+                futures = [self._pending.pop(sample) for sample in samples]
+                self.batch_count += 1
+                try:
+                    matches = await self._search(loop, samples)
+                except Exception as ex:
+                    for sample_futures in futures:
+                        for future in sample_futures:
+                            future.set_exception(ex)
+                    continue
+                for (sample, sample_futures) in zip(samples, futures):
+                    for future in sample_futures:
+                        if not future.cancelled():
+                            future.set_result(list(matches[sample]))
+        finally:
+            self._flushing = False
+
+    # Search the samples of a batch.
+    # Returns a dictionary associating each sample to the list of matching sequence IDs.
+    async def _search(self, loop, samples):
+        # "is_indexed" waits for the changes in progress, so it doesn't run in the event loop.
+        scanned = await loop.run_in_executor(
+            self.executor, lambda: [sample for sample in samples if not self.db.is_indexed(sample)]
+        )
+        if len(scanned) < 2:
+            # A single scan is as fast with "find".
+            scanned = []
+        scanned_samples = set(scanned)
+        looked_up = [sample for sample in samples if sample not in scanned_samples]
+        searches = [loop.run_in_executor(self.executor, self.db.find, sample) for sample in looked_up]
+        if scanned:
+            self.scan_count += 1
+            searches.append(loop.run_in_executor(self.executor, self.db.find_many, scanned))
+        results = await asyncio.gather(*searches)
+        matches = dict(zip(looked_up, results))
+        if scanned:
+            matches.update(results[-1][0])
+        return matches
+
+
+class SequenceDbServer:
+
+    # Params:
+    # - db: the (thread-safe) sequence database to serve
+    # - max_workers: the maximum number of threads executing the queries (default of ThreadPoolExecutor if None)
+    # - max_batch_size: the maximum number of samples searched by a single scan
+    def __init__(self, db, max_workers=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="server-query")
+        # A single thread executes the changes, in the order they were received.
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="server-change")
+        self.finds = FindBatcher(db, self._executor, max_batch_size)
+        self._server = None
+        # The writer of each open connection, with the task serving it.
+        self._connections = {}
+        self._commands = {
+            "insert": self._insert,
+            "get": self._get,
+            "find": self._find,
+            "overlap": self._overlap
+        }
+
+    # Start listening on a TCP socket.
+    #
+    # Params:
+    # - host: the interface to listen on
+    # - port: the port to listen on (any free port if 0)
+    # Returns the port listened on.
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self._server = await asyncio.start_server(self._serve, host, port, limit=MAX_LINE_LENGTH)
+        return self._server.sockets[0].getsockname()[1]
+
+    # Start listening on a Unix socket.
+    #
+    # Params:
+    # - path: the path of the socket
+    async def start_unix(self, path):
+        self._server = await asyncio.start_unix_server(self._serve, path, limit=MAX_LINE_LENGTH)
+
+    # Serve the clients until the server is closed.
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    # Stop listening, close the client connections, and stop the query threads.
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self._connections):
+            writer.transport.abort()
+        await asyncio.gather(*self._connections.values())
+        self._executor.shutdown()
+        self._write_executor.shutdown()
+
+    # Serve a client connection.
+    # The requests are read and started as soon as they are received, while their responses are written back
+    # in order by a separate task.
+    async def _serve(self, reader, writer):
+        self._connections[writer] = asyncio.current_task()
+        responses = asyncio.Queue(MAX_PIPELINED_REQUESTS)
+        responder = asyncio.ensure_future(self._respond(responses, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # The line is too long or the client is gone.
+                    break
+                if not line:
+                    break
+                await responses.put(asyncio.ensure_future(self._execute(line)))
+        finally:
+            await responses.put(None)
+            await responder
+            writer.close()
+            del self._connections[writer]
+
+    async def _respond(self, responses, writer):
+        while True:
+            request = await responses.get()
+            if request is None:
+                break
+            try:
+                response = await request
+            except Exception as ex:
+                # A failed request must not stop the responses of the following requests.
+                logger.exception("Request failed")
+                response = encode_response(None, InternalError(repr(ex)))
+            writer.write(response)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    # Execute a request line.
+    # Returns the encoded response line.
+    # An unexpected error is logged and reported as an InternalError.
+    async def _execute(self, line):
+        try:
+            request = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return encode_response(None, InvalidRequest(line.decode(errors="replace").strip()))
+        try:
+            # The command is checked to be a string first: an unhashable command can't be looked up.
+            if (
+                not isinstance(request, list) or not request or not isinstance(request[0], str)
+                or request[0] not in self._commands
+            ):
+                raise InvalidRequest(line.decode().strip())
+            command = self._commands[request[0]]
+            try:
+                inspect.signature(command).bind(*request[1:])
+            except TypeError:
+                # Not the arguments of the command.
+                raise InvalidRequest(line.decode().strip())
+            return encode_response(await command(*request[1:]))
+        except (InvalidRequest, InvalidSample, InvalidSequence, InvalidSequenceId) as ex:
+            return encode_response(None, ex)
+        except Exception as ex:
+            logger.exception("Request failed: [%s]", line.decode().strip())
+            return encode_response(None, InternalError(repr(ex)))
+
+    async def _insert(self, sequence):
+        loop = asyncio.get_running_loop()
+        (result, sequence_id) = await loop.run_in_executor(self._write_executor, self.db.insert, sequence)
+        return [result.value, sequence_id]
+
+    async def _get(self, sequence_id):
+        if not isinstance(sequence_id, str):
+            raise InvalidSequenceId(sequence_id)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.db.get, sequence_id)
+
+    async def _find(self, sample):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        return await self.finds.find(sample)
+
+    async def _overlap(self, sample, sequence_id, minimum_overlap=2):
+        if not isinstance(minimum_overlap, int):
+            raise InvalidRequest(minimum_overlap)
+        if not isinstance(sequence_id, str):
+            raise InvalidSequenceId(sequence_id)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.db.overlap, sample, sequence_id, minimum_overlap
+        )
+
+
+async def main(arguments):
+    # A saved sharded database keeps its prefix length.
+    if arguments.shard_prefix_length and arguments.snapshot and os.path.exists(arguments.snapshot):
+        db = ShardedSequenceDb.open(arguments.snapshot, kmer_size=arguments.kmer_size, thread_safe=True)
+    elif arguments.shard_prefix_length:
+        db = ShardedSequenceDb(arguments.shard_prefix_length, kmer_size=arguments.kmer_size, thread_safe=True)
+    elif arguments.snapshot and os.path.exists(arguments.snapshot):
+        db = SequenceDb.open(arguments.snapshot, kmer_size=arguments.kmer_size, thread_safe=True)
+    else:
+        db = SequenceDb(kmer_size=arguments.kmer_size, thread_safe=True)
+
+    server = SequenceDbServer(db, arguments.workers)
+    if arguments.unix_socket:
+        await server.start_unix(arguments.unix_socket)
+        print(f"Listening on:[{arguments.unix_socket}]")
+    else:
+        port = await server.start(arguments.host, arguments.port)
+        print(f"Listening on:[{arguments.host}:{port}]")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        if arguments.snapshot:
+            db.save(arguments.snapshot)
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DNA sequence database server")
+    parser.add_argument("--host", default="127.0.0.1", help="the interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="the TCP port to listen on")
+    parser.add_argument("--unix-socket", help="listen on a Unix socket instead of a TCP port")
+    parser.add_argument("--kmer-size", type=int, help="the length of the indexed k-mers (no k-mer index if omitted)")
+    parser.add_argument("--workers", type=int, help="the number of query threads")
+    parser.add_argument("--shard-prefix-length", type=int, default=0,
+                        help="shard the database on the first bases of the sequences (no sharding if 0)")
+    parser.add_argument("--snapshot", help="snapshot file (directory of a sharded database) opened at startup "
+                                           "(if it exists) and saved on exit")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        print("Exiting...To the next!")
@@ -0,0 +1,137 @@
+#
+# Streaming bulk loader for the DNA sequence database.
+#
+# Sequences are read from FASTA files or plain text files (one sequence per line), optionally gzip compressed,
+# and inserted in batches with "insert_many". Only one batch of sequences is held in memory at a time,
+# so arbitrarily large files can be loaded.
+#
+
+import gzip
+from collections import namedtuple
+from enum import Enum
+from itertools import islice
+
+from sequence_db import InsertResult
+
+# The default number of sequences inserted per batch.
+DEFAULT_BATCH_SIZE = 10_000
+
+# The first bytes of a gzip file.
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+# The supported file formats.
+class FileFormat(Enum):
+    FASTA = "FASTA"
+    LINES = "Lines"
+
+
+# The outcome of a bulk load:
+# - inserted: the number of new sequences inserted
+# - already_present: the number of sequences already present in the database
+# - invalid: the number of invalid sequences
+# - bases: the number of bases read
+LoadSummary = namedtuple("LoadSummary", ["inserted", "already_present", "invalid", "bases"])
+
+
+# Open a text file, decompressing it on the fly if it is gzip compressed.
+#
+# Params:
+# - path: the path of the file
+# Returns the file object, opened in text mode.
+def open_text(path):
+    with open(path, "rb") as file:
+        is_gzip = file.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+    return gzip.open(path, "rt") if is_gzip else open(path, "r")
+
+
+# Read the sequences of a FASTA file.
+# Each record starts with a ">" header line, followed by the lines of its sequence.
+#
+# Params:
+# - lines: an iterable of the lines of the file
+# Returns a generator of sequences.
+def read_fasta(lines):
+    parts = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith(">"):
+            if parts:
+                yield "".join(parts)
+            parts = []
+        elif line and not line.startswith(";"):
+            parts.append(line)
+    if parts:
+        yield "".join(parts)
+
+
+# Read the sequences of a plain text file, one sequence per line (blank lines are ignored).
+#
+# Params:
+# - lines: an iterable of the lines of the file
+# Returns a generator of sequences.
+def read_lines(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield line
+
+
+# Read the sequences of a file.
+#
+# Params:
+# - path: the path of the file (gzip compressed or not)
+# - file_format: the FileFormat of the file, detected from its first line if None
+# Returns a generator of sequences.
+def read_sequences(path, file_format=None):
+    with open_text(path) as file:
+        if file_format is None:
+            first_line = file.readline()
+            file_format = FileFormat.FASTA if first_line.startswith(">") else FileFormat.LINES
+            lines = _chain_line(first_line, file)
+        else:
+            lines = file
+        reader = read_fasta if file_format == FileFormat.FASTA else read_lines
+        yield from reader(lines)
+
+
+def _chain_line(first_line, file):
+    yield first_line
+    yield from file
+
+
+# Insert sequences into a database in batches.
+#
+# Params:
+# - db: the sequence database
+# - sequences: an iterable of sequences
+# - batch_size: the number of sequences inserted per batch
+# Returns a LoadSummary.
+def load_sequences(db, sequences, batch_size=DEFAULT_BATCH_SIZE):
+    if batch_size < 1:
+        raise ValueError(f"Invalid batch size: [{batch_size}]")
+    counts = {result: 0 for result in InsertResult}
+    bases = 0
+    sequences = iter(sequences)
+    while True:
+        batch = list(islice(sequences, batch_size))
+        if not batch:
+            break
+        bases += sum(len(sequence) for sequence in batch if isinstance(sequence, str))
+        for (result, _) in db.insert_many(batch):
+            counts[result] += 1
+    return LoadSummary(
+        counts[InsertResult.INSERTED], counts[InsertResult.ALREADY_PRESENT], counts[InsertResult.INVALID], bases
+    )
+
+
+# Insert the sequences of a file into a database in batches.
+#
+# Params:
+# - db: the sequence database
+# - path: the path of the file (gzip compressed or not)
+# - file_format: the FileFormat of the file, detected from its first line if None
+# - batch_size: the number of sequences inserted per batch
+# Returns a LoadSummary.
+def load_file(db, path, file_format=None, batch_size=DEFAULT_BATCH_SIZE):
+    return load_sequences(db, read_sequences(path, file_format), batch_size)
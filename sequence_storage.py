@@ -0,0 +1,527 @@
+#
+# Storage engines for the DNA sequence database.
+#
+# A storage engine maps sequence IDs to (uppercase) DNA sequences, like a dictionary, and also knows how to
+# search its own sequences so that "SequenceDb" never has to decode every stored sequence to answer a query.
+# Two engines are available:
+# - "StringStorage": the sequences are kept as Python strings (the default).
+# - "PackedStorage": the sequences are packed at 2 bits per base in a single contiguous arena.
+#
+
+import re
+from array import array
+from bisect import bisect_right
+
+from dna_utilities import DNA_BASES, smallest_period
+
+# Number of bases packed in a single byte.
+BASES_PER_BYTE = 4
+
+# Translation tables between the DNA bases and their 2-bit codes written as base 4 digits.
+_BASES_TO_DIGITS = str.maketrans(DNA_BASES, "0123")
+
+# Each hexadecimal digit holds exactly two bases.
+_HEX_TO_BASES = str.maketrans({
+    f"{value:x}": DNA_BASES[value >> 2] + DNA_BASES[value & 3] for value in range(16)
+})
+
+
+# Pack a DNA sequence at 2 bits per base.
+# The first base of the sequence is stored in the most significant bits of the first byte
+# and the last byte is padded with "A" (code 0) bases.
+#
+# Params:
+# - sequence: the uppercase DNA sequence to pack
+# Returns the packed bytes.
+def pack_sequence(sequence):
+    byte_count = (len(sequence) + BASES_PER_BYTE - 1) // BASES_PER_BYTE
+    if byte_count == 0:
+        return b""
+    padding = "0" * (byte_count * BASES_PER_BYTE - len(sequence))
+    return int(sequence.translate(_BASES_TO_DIGITS) + padding, 4).to_bytes(byte_count, "big")
+
+
+# Unpack DNA bases packed at 2 bits per base.
+#
+# Params:
+# - packed: the packed bytes
+# - start: the index of the first base to unpack
+# - end: the index following the last base to unpack
+# Returns the uppercase DNA sequence.
+def unpack_sequence(packed, start, end):
+    first_byte = start // BASES_PER_BYTE
+    last_byte = (end + BASES_PER_BYTE - 1) // BASES_PER_BYTE
+    skip = start - first_byte * BASES_PER_BYTE
+    return bytes(packed[first_byte:last_byte]).hex().translate(_HEX_TO_BASES)[skip:skip + end - start]
+
+
+# Build the regular expressions locating a sample in a packed arena.
+# A sample can start at any of the 4 positions within a byte (its "phase"), so one pattern is built per phase.
+# The bytes fully covered by the sample are matched literally, while the partially covered first and
+# last bytes are matched with a character class of all the byte values holding the expected bases.
+#
+# Params:
+# - sample: the uppercase DNA sample
+# Returns a list of (<phase>, <compiled pattern>) tuples.
+def _packed_patterns(sample):
+    codes = [DNA_BASES.index(base) for base in sample]
+    patterns = []
+    for phase in range(BASES_PER_BYTE):
+        position = phase
+        pattern = b""
+        remaining = codes
+        while remaining:
+            taken = remaining[:BASES_PER_BYTE - position]
+            remaining = remaining[len(taken):]
+            shift = 2 * (BASES_PER_BYTE - position - len(taken))
+            mask = ((1 << (2 * len(taken))) - 1) << shift
+            value = int("".join(str(code) for code in taken), 4) << shift
+            if mask == 0xFF:
+                pattern += re.escape(bytes([value]))
+            else:
+                matching = bytes(byte for byte in range(256) if byte & mask == value)
+                pattern += b"[" + b"".join(re.escape(bytes([byte])) for byte in matching) + b"]"
+            position = 0
+        patterns.append((phase, re.compile(pattern, re.DOTALL)))
+    return patterns
+
+
+# Find the packed sequences containing a sample.
+# The sequences are packed one after the other in an arena, each one starting on a byte boundary.
+# The sample is searched directly in the arena, one pass per phase, and each hit is mapped back to its
+# sequence with the offset table. When candidate positions are provided, only the bytes of these sequences
+# are searched.
+#
+# Params:
+# - arena: the packed sequences (any bytes-like object, like a bytearray or a mmap)
+# - offsets: the offset (in bytes) of each sequence in the arena
+# - lengths: the length (in bases) of each sequence
+# - sample: the uppercase DNA sample
+# - positions: the positions of the sequences to verify, in increasing order (all the sequences if None)
+# Returns the sorted list of the positions of the matching sequences.
+def find_packed(arena, offsets, lengths, sample, positions=None):
+    patterns = _packed_patterns(sample)
+    if positions is not None:
+        return [
+            position for position in positions
+            if _packed_contains(arena, offsets, lengths, position, len(sample), patterns)
+        ]
+
+    matches = set()
+    sample_length = len(sample)
+    for (phase, pattern) in patterns:
+        hit = pattern.search(arena)
+        while hit:
+            start = hit.start()
+            position = bisect_right(offsets, start) - 1
+            start_base = (start - offsets[position]) * BASES_PER_BYTE + phase
+            if start_base + sample_length <= lengths[position]:
+                matches.add(position)
+                # No need to look any further in this sequence.
+                if position + 1 == len(offsets):
+                    break
+                hit = pattern.search(arena, offsets[position + 1])
+            else:
+                hit = pattern.search(arena, start + 1)
+    return sorted(matches)
+
+
+# Determine if a single packed sequence contains a sample.
+#
+# Params:
+# - arena: the packed sequences
+# - offsets: the offset (in bytes) of each sequence in the arena
+# - lengths: the length (in bases) of each sequence
+# - position: the position of the sequence to verify
+# - sample_length: the length of the sample
+# - patterns: the packed patterns of the sample (see "_packed_patterns")
+# Returns True if the sequence contains the sample, False otherwise.
+def _packed_contains(arena, offsets, lengths, position, sample_length, patterns):
+    offset = offsets[position]
+    length = lengths[position]
+    end = offset + (length + BASES_PER_BYTE - 1) // BASES_PER_BYTE
+    for (phase, pattern) in patterns:
+        hit = pattern.search(arena, offset, end)
+        while hit:
+            start_base = (hit.start() - offset) * BASES_PER_BYTE + phase
+            if start_base + sample_length <= length:
+                return True
+            hit = pattern.search(arena, hit.start() + 1, end)
+    return False
+
+
+# Find the candidate packed sequences containing a sample or its reverse complement.
+# The candidates are verified in a single pass, the bytes of each one being searched for both strands.
+#
+# Params:
+# - arena: the packed sequences
+# - offsets: the offset (in bytes) of each sequence in the arena
+# - lengths: the length (in bases) of each sequence
+# - sample: the uppercase DNA sample
+# - reverse_sample: the reverse complement of the sample
+# - positions: the positions of the sequences to verify
+# Returns a list of (<position>, <True if the sample matches>, <True if its reverse complement matches>) tuples,
+# in the order of the positions.
+def find_packed_both(arena, offsets, lengths, sample, reverse_sample, positions):
+    (patterns, reverse_patterns) = (_packed_patterns(sample), _packed_patterns(reverse_sample))
+    matches = []
+    for position in positions:
+        forward = _packed_contains(arena, offsets, lengths, position, len(sample), patterns)
+        reverse = _packed_contains(arena, offsets, lengths, position, len(sample), reverse_patterns)
+        if forward or reverse:
+            matches.append((position, forward, reverse))
+    return matches
+
+
+# Find the sequences containing a sample or its reverse complement.
+# The sequences are read in a single pass, each one being searched for both strands.
+#
+# Params:
+# - items: an iterable of (<sequence ID>, <uppercase sequence>) tuples
+# - sample: the uppercase DNA sample
+# - reverse_sample: the reverse complement of the sample
+# Returns a list of (<sequence ID>, <True if the sample matches>, <True if its reverse complement matches>) tuples.
+def find_both_items(items, sample, reverse_sample):
+    matches = []
+    for (id, seq) in items:
+        (forward, reverse) = (sample in seq, reverse_sample in seq)
+        if forward or reverse:
+            matches.append((id, forward, reverse))
+    return matches
+
+
+# Find the offsets of all the occurrences of a sample in a sequence, overlapping occurrences included.
+#
+# Params:
+# - sequence: the uppercase DNA sequence
+# - sample: the uppercase DNA sample
+# - period: the smallest period of the sample (see "smallest_period"), the search resumes this far after a match
+# Returns the list of the offsets, in increasing order.
+def find_offsets(sequence, sample, period):
+    offsets = []
+    offset = sequence.find(sample)
+    while offset != -1:
+        offsets.append(offset)
+        offset = sequence.find(sample, offset + period)
+    return offsets
+
+
+# Find all the occurrences of a sample in sequences.
+#
+# Params:
+# - items: an iterable of (<sequence ID>, <uppercase sequence>) tuples
+# - sample: the uppercase DNA sample
+# Returns a list of (<sequence ID>, <offsets of the occurrences>) tuples, for the matching sequences only.
+def find_occurrences_items(items, sample):
+    period = smallest_period(sample)
+    # Most sequences don't match: they are discarded first, the few matches are then searched again.
+    return [(id, find_offsets(seq, sample, period)) for (id, seq) in items if sample in seq]
+
+
+# Count all the occurrences of a sample in sequences, without building the list of their offsets.
+#
+# Params:
+# - sequences: an iterable of uppercase DNA sequences
+# - sample: the uppercase DNA sample
+# Returns the number of occurrences.
+def count_occurrences_items(sequences, sample):
+    period = smallest_period(sample)
+    # Occurrences of a sample that doesn't overlap itself never overlap: "str.count" counts them in one pass.
+    if period == len(sample):
+        return sum(seq.count(sample) for seq in sequences)
+    return sum(len(find_offsets(seq, sample, period)) for seq in sequences if sample in seq)
+
+
+# Storage engine keeping every sequence as a Python string.
+class StringStorage(dict):
+
+    # Find all sequences containing a sample.
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # - ids: the IDs of the sequences to verify, in insertion order (all the sequences if None)
+    # Returns the list of matching sequence IDs, in insertion order.
+    def find(self, sample, ids=None):
+        if ids is None:
+            return [id for (id, seq) in self.items() if sample in seq]
+        return [id for id in ids if sample in self[id]]
+
+    # Count the sequences containing a sample, without building the list of their IDs.
+    # See "find".
+    def find_count(self, sample, ids=None):
+        if ids is None:
+            return sum(sample in seq for seq in self.values())
+        return sum(sample in self[id] for id in ids)
+
+    # Find all the occurrences of a sample, overlapping occurrences included.
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # - ids: the IDs of the sequences to search, in insertion order (all the sequences if None)
+    # Returns a list of (<sequence ID>, <offsets of the occurrences>) tuples for the matching sequences,
+    # in insertion order.
+    def find_occurrences(self, sample, ids=None):
+        items = self.items() if ids is None else ((id, self[id]) for id in ids)
+        return find_occurrences_items(items, sample)
+
+    # Count all the occurrences of a sample, without building the list of their offsets.
+    # See "find_occurrences".
+    def count_occurrences(self, sample, ids=None):
+        sequences = self.values() if ids is None else (self[id] for id in ids)
+        return count_occurrences_items(sequences, sample)
+
+    # Find all sequences containing a sample or its reverse complement (see "find_both_items").
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # - reverse_sample: the reverse complement of the sample
+    # - ids: the IDs of the sequences to verify, in insertion order (all the sequences if None)
+    # Returns a list of (<sequence ID>, <True if the sample matches>, <True if its reverse complement matches>)
+    # tuples, in insertion order.
+    def find_both(self, sample, reverse_sample, ids=None):
+        items = self.items() if ids is None else ((id, self[id]) for id in ids)
+        return find_both_items(items, sample, reverse_sample)
+
+    # Build a compacted copy of the storage.
+    # The strings of the deleted sequences are already freed, but the table of a dictionary never shrinks:
+    # the copy gets a table sized for the remaining sequences.
+    # Returns the new StringStorage.
+    def compacted(self):
+        return StringStorage(self)
+
+    # Get a read-only view of the sequences stored at this point, unaffected by the later changes.
+    # Only the table of the dictionary is copied, the strings are shared.
+    # Returns the StringStorage view.
+    def view(self):
+        return StringStorage(self)
+
+    # Get the first bases of a sequence.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - length: the maximum number of bases to return
+    # Returns the prefix of the sequence.
+    def prefix(self, sequence_id, length):
+        return self[sequence_id][:length]
+
+    # Get the last bases of a sequence.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - length: the maximum number of bases to return
+    # Returns the suffix of the sequence.
+    def suffix(self, sequence_id, length):
+        return self[sequence_id][-length:]
+
+
+# Storage engine packing every sequence at 2 bits per base.
+# All the sequences are appended to a single arena; each sequence starts on a byte boundary.
+# The offset (in bytes) and the length (in bases) of each sequence are kept in parallel tables,
+# indexed by the position of the sequence in the arena.
+# Sequences are only decoded when they are retrieved.
+#
+# The arena is append-only: a deleted sequence is only marked as such (a "tombstone"), and a replaced sequence
+# is appended again at the end of the arena, keeping the rank of the original sequence so that the sequences
+# are still iterated in insertion order. The space of the deleted and replaced sequences is reclaimed by
+# "compacted".
+class PackedStorage:
+
+    def __init__(self):
+        self._arena = bytearray()
+        self._offsets = array("Q")
+        self._lengths = array("Q")
+        # The rank of each position in the insertion order (the position itself unless the sequence was replaced).
+        self._ranks = array("Q")
+        # The ID of each position, None for a deleted (or replaced) sequence.
+        self._ids = []
+        self._positions = {}
+        self._dead_bytes = 0
+        # True when a replaced sequence is out of order in the arena.
+        self._reordered = False
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, sequence_id):
+        return sequence_id in self._positions
+
+    def __iter__(self):
+        if not self._reordered:
+            return (id for id in self._ids if id is not None)
+        return (self._ids[position] for position in self._ordered(self._positions.values()))
+
+    def __getitem__(self, sequence_id):
+        position = self._positions[sequence_id]
+        return self._unpack(position, 0, self._lengths[position])
+
+    # Store a sequence, or replace the sequence stored under the same ID.
+    def __setitem__(self, sequence_id, sequence):
+        position = self._positions.get(sequence_id)
+        if position is None:
+            rank = len(self._ids)
+        else:
+            rank = self._ranks[position]
+            self._kill(position)
+            self._reordered = True
+        self._positions[sequence_id] = len(self._ids)
+        self._ids.append(sequence_id)
+        self._offsets.append(len(self._arena))
+        self._lengths.append(len(sequence))
+        self._ranks.append(rank)
+        self._arena += pack_sequence(sequence)
+
+    # Delete a sequence. Only a tombstone is left in the arena.
+    def __delitem__(self, sequence_id):
+        self._kill(self._positions.pop(sequence_id))
+
+    def _kill(self, position):
+        self._ids[position] = None
+        self._dead_bytes += (self._lengths[position] + BASES_PER_BYTE - 1) // BASES_PER_BYTE
+
+    # Sort positions in insertion order.
+    def _ordered(self, positions):
+        return sorted(positions, key=self._ranks.__getitem__)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return ((id, self[id]) for id in self)
+
+    # Get the number of bytes used by the packed sequences and their tables.
+    def memory_size(self):
+        return (
+            len(self._arena)
+            + self._offsets.itemsize * len(self._offsets)
+            + self._lengths.itemsize * len(self._lengths)
+            + self._ranks.itemsize * len(self._ranks)
+        )
+
+    # Get the number of bytes of the arena still used by deleted or replaced sequences.
+    def dead_size(self):
+        return self._dead_bytes
+
+    # Build a compacted copy of the storage, without the deleted and replaced sequences and in insertion order.
+    # The packed bytes are copied as they are, no sequence is decoded. The storage itself is only read, so it
+    # can still be searched while the copy is built.
+    # Returns the new PackedStorage.
+    def compacted(self):
+        storage = PackedStorage()
+        for position in self._ordered(self._positions.values()):
+            offset = self._offsets[position]
+            length = self._lengths[position]
+            storage._positions[self._ids[position]] = len(storage._ids)
+            storage._ids.append(self._ids[position])
+            storage._offsets.append(len(storage._arena))
+            storage._lengths.append(length)
+            storage._ranks.append(len(storage._ranks))
+            storage._arena += self._arena[offset:offset + (length + BASES_PER_BYTE - 1) // BASES_PER_BYTE]
+        return storage
+
+    # Get a read-only view of the sequences stored at this point, unaffected by the later changes.
+    # The arena and its tables are append-only, so they are shared: only the IDs and their positions are copied.
+    # Returns the PackedStorage view.
+    def view(self):
+        view = PackedStorage()
+        (view._arena, view._offsets, view._lengths, view._ranks) = (
+            self._arena, self._offsets, self._lengths, self._ranks
+        )
+        view._ids = list(self._ids)
+        view._positions = dict(self._positions)
+        view._dead_bytes = self._dead_bytes
+        view._reordered = self._reordered
+        return view
+
+    # Find all sequences containing a sample.
+    # When candidate IDs are provided, only the bytes of these sequences are searched.
+    # See "find_packed".
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # - ids: the IDs of the sequences to verify, in insertion order (all the sequences if None)
+    # Returns the list of matching sequence IDs, in insertion order.
+    def find(self, sample, ids=None):
+        return [self._ids[position] for position in self._find_positions(sample, ids)]
+
+    # Count the sequences containing a sample, without building the list of their IDs.
+    # See "find".
+    def find_count(self, sample, ids=None):
+        positions = None if ids is None else [self._positions[id] for id in ids]
+        matches = find_packed(self._arena, self._offsets, self._lengths, sample, positions)
+        if positions is None and self._dead_bytes:
+            return sum(self._ids[position] is not None for position in matches)
+        return len(matches)
+
+    # Find all the occurrences of a sample.
+    # The arena is searched for the matching sequences, and only these sequences are decoded to locate
+    # the occurrences.
+    # See "StringStorage.find_occurrences".
+    def find_occurrences(self, sample, ids=None):
+        positions = self._find_positions(sample, ids)
+        return find_occurrences_items(((self._ids[position], self._decode(position)) for position in positions), sample)
+
+    # Count all the occurrences of a sample, decoding only the matching sequences.
+    # See "StringStorage.count_occurrences".
+    def count_occurrences(self, sample, ids=None):
+        positions = self._find_positions(sample, ids)
+        return count_occurrences_items((self._decode(position) for position in positions), sample)
+
+    # Find all sequences containing a sample or its reverse complement.
+    # The candidates are verified in a single pass (see "find_packed_both"). Without candidates, the arena is
+    # searched for each strand and the matches merged: a pattern matching either strand is several times slower
+    # for the regular expression engine than two searches.
+    # See "StringStorage.find_both".
+    def find_both(self, sample, reverse_sample, ids=None):
+        if ids is not None:
+            positions = [self._positions[id] for id in ids]
+            return [
+                (self._ids[position], forward, reverse)
+                for (position, forward, reverse)
+                in find_packed_both(self._arena, self._offsets, self._lengths, sample, reverse_sample, positions)
+            ]
+
+        forward = set(self._find_positions(sample, None))
+        reverse = set(self._find_positions(reverse_sample, None))
+        return [
+            (self._ids[position], position in forward, position in reverse)
+            for position in self._ordered(forward | reverse)
+        ]
+
+    # Find the positions of the live sequences containing a sample, in insertion order.
+    def _find_positions(self, sample, ids):
+        if ids is not None:
+            positions = [self._positions[id] for id in ids]
+            return find_packed(self._arena, self._offsets, self._lengths, sample, positions)
+        matches = find_packed(self._arena, self._offsets, self._lengths, sample)
+        if self._dead_bytes:
+            matches = [position for position in matches if self._ids[position] is not None]
+        return self._ordered(matches) if self._reordered else matches
+
+    # Get the first bases of a sequence, decoding only these bases.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - length: the maximum number of bases to return
+    # Returns the prefix of the sequence.
+    def prefix(self, sequence_id, length):
+        position = self._positions[sequence_id]
+        end = min(length, self._lengths[position])
+        return self._unpack(position, 0, end)
+
+    # Get the last bases of a sequence, decoding only these bases.
+    #
+    # Params:
+    # - sequence_id: the ID of the sequence
+    # - length: the maximum number of bases to return
+    # Returns the suffix of the sequence.
+    def suffix(self, sequence_id, length):
+        position = self._positions[sequence_id]
+        sequence_length = self._lengths[position]
+        return self._unpack(position, max(0, sequence_length - length), sequence_length)
+
+    def _decode(self, position):
+        return self._unpack(position, 0, self._lengths[position])
+
+    def _unpack(self, position, start, end):
+        return unpack_sequence(self._arena, self._offsets[position] * BASES_PER_BYTE + start,
+                               self._offsets[position] * BASES_PER_BYTE + end)
@@ -0,0 +1,456 @@
+#
+# Sharded DNA sequence database.
+#
+# The sequences are distributed among 4^n shards based on their first n bases (the "shard key"),
+# each shard being an independent "SequenceDb". A sequence ID starts with the shard key of its sequence
+# (for example "AC-12"), so "get" and "overlap" directly access the right shard, and since the same sequence always
+# lands in the same shard, duplicates are detected by that shard alone.
+# The "find" methods search all the shards concurrently and merge their results.
+# A sharded database is saved as a directory holding the snapshot of each shard (see "snapshot.py"), named after
+# its shard key (for example "AC.snapshot").
+#
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, product
+
+from dna_utilities import (
+    DNA_BASES,
+    is_valid_sequence
+)
+from instrumentation import OPERATIONS
+from overlap_graph import (
+    DEFAULT_MINIMUM_OVERLAP,
+    Contig,
+    OverlapGraph,
+    spell
+)
+from query_cache import CacheStats
+from bloom_filter import PrefilterStats
+from sequence_db import (
+    ApproxMatch,
+    InsertResult,
+    Occurrence,
+    SequenceDb,
+    Strand,
+    StrandMatch
+)
+from snapshot import InvalidSnapshot
+
+from exceptions.invalid_sample_ex import InvalidSample
+from exceptions.invalid_sequence_ex import InvalidSequence
+from exceptions.invalid_sequence_id_ex import InvalidSequenceId
+
+# Separates the shard key from the ID of the sequence within its shard.
+SHARD_SEPARATOR = "-"
+
+# The extension of the snapshot of a shard.
+SNAPSHOT_EXTENSION = ".snapshot"
+
+
+# Get the shard keys of a prefix length, in sorted order.
+def _shard_keys(prefix_length):
+    return ["".join(key) for key in product(DNA_BASES, repeat=prefix_length)]
+
+
+class ShardedSequenceDb:
+
+    # Params:
+    # - prefix_length: the number of bases of the shard key (4^prefix_length shards)
+    # - max_workers: the maximum number of threads searching the shards (default of ThreadPoolExecutor if None)
+    # - storage_factory: a function creating the storage engine of a shard (see "SequenceDb")
+    # - kmer_size: the length of the k-mers indexed by each shard (see "SequenceDb")
+    # - overlap_index_size: the length of the prefixes and suffixes indexed by each shard (see "SequenceDb")
+    # - thread_safe: True to share the database between threads (see "SequenceDb")
+    # - cache_size: the number of results kept in the query caches of each shard (see "SequenceDb")
+    # - canonical_kmers: True for canonical k-mer indexes (see "SequenceDb")
+    # - instrumentation: the Instrumentation recording the calls of the operations of the sharded database, and
+    #   the "find" of each shard (see "SequenceDb", no instrumentation if None)
+    # - prefilter_factory: a function creating the BloomPrefilter of a shard (see "SequenceDb", no prefilter if None)
+    def __init__(self, prefix_length=1, max_workers=None, storage_factory=None, kmer_size=None,
+                 overlap_index_size=None, thread_safe=False, cache_size=None, canonical_kmers=False,
+                 instrumentation=None, prefilter_factory=None):
+        if prefix_length < 1:
+            raise ValueError(f"Invalid shard prefix length: [{prefix_length}]")
+        shards = {
+            key: SequenceDb(
+                storage_factory() if storage_factory else None, kmer_size, overlap_index_size, thread_safe,
+                cache_size, canonical_kmers=canonical_kmers, prefilter=prefilter_factory() if prefilter_factory else None
+            )
+            for key in _shard_keys(prefix_length)
+        }
+        self._setup(shards, max_workers, instrumentation)
+
+    # Open a sharded database from the directory of its snapshots (see "save").
+    # The prefix length is the one of the saved database. The other parameters are the ones of the constructor.
+    # Returns the opened ShardedSequenceDb.
+    # Raises:
+    # - InvalidSnapshot if the directory doesn't hold the snapshots of all the shards, or a snapshot is invalid.
+    @classmethod
+    def open(cls, directory, max_workers=None, kmer_size=None, overlap_index_size=None, thread_safe=False,
+             cache_size=None, canonical_kmers=False, instrumentation=None, prefilter_factory=None):
+        keys = sorted(
+            name[:-len(SNAPSHOT_EXTENSION)] for name in os.listdir(directory) if name.endswith(SNAPSHOT_EXTENSION)
+        )
+        if not keys or keys != _shard_keys(len(keys[0])):
+            raise InvalidSnapshot(directory, "missing or unexpected shard snapshots")
+        shards = {}
+        try:
+            for key in keys:
+                shards[key] = SequenceDb.open(
+                    os.path.join(directory, key + SNAPSHOT_EXTENSION), kmer_size, overlap_index_size, thread_safe,
+                    cache_size, canonical_kmers=canonical_kmers,
+                    prefilter=prefilter_factory() if prefilter_factory else None
+                )
+        except BaseException:
+            for shard in shards.values():
+                shard.close()
+            raise
+        db = cls.__new__(cls)
+        db._setup(shards, max_workers, instrumentation)
+        return db
+
+    def _setup(self, shards, max_workers, instrumentation):
+        self.prefix_length = len(next(iter(shards)))
+        self.shards = shards
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard-find")
+        # The calls are recorded once by the sharded database, while each shard records how it answers a "find".
+        self._instrumentation = instrumentation
+        if instrumentation is not None:
+            for shard in shards.values():
+                shard.record_finds(instrumentation)
+            for operation in OPERATIONS:
+                setattr(self, operation, instrumentation.wrap(operation, getattr(self, operation)))
+
+    # Save the snapshot of every shard into a directory (created if needed).
+    # The shards are saved one after the other, each one with the sequences it holds when it is saved.
+    # See "SequenceDb.save".
+    def save(self, directory, packed=False):
+        os.makedirs(directory, exist_ok=True)
+        for (shard_key, shard) in self.shards.items():
+            shard.save(os.path.join(directory, shard_key + SNAPSHOT_EXTENSION), packed)
+
+    # Get the size of the sequence database.
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Stop the threads searching the shards, and close every shard (see "SequenceDb.close").
+    def close(self):
+        self._executor.shutdown()
+        for shard in self.shards.values():
+            shard.close()
+
+    # Get the statistics of the query caches, summed over the shards.
+    # See "SequenceDb.cache_stats".
+    def cache_stats(self):
+        shard_stats = [shard.cache_stats() for shard in self.shards.values()]
+        if shard_stats[0] is None:
+            return None
+        return {
+            name: CacheStats(*(sum(values) for values in zip(*(stats[name] for stats in shard_stats))))
+            for name in shard_stats[0]
+        }
+
+    # Get the statistics of the Bloom filter prefilters, summed over the shards (a "find" being counted as a query
+    # by every shard).
+    # See "SequenceDb.prefilter_stats".
+    def prefilter_stats(self):
+        shard_stats = [shard.prefilter_stats() for shard in self.shards.values()]
+        if shard_stats[0] is None:
+            return None
+        return PrefilterStats(*(sum(values) for values in zip(*shard_stats)))
+
+    # Get the statistics recorded by the instrumentation of the database: the calls of the operations of the
+    # sharded database, and the "find" paths and scanned bases of every shard.
+    # See "SequenceDb.stats".
+    def stats(self):
+        if self._instrumentation is None:
+            return None
+        return self._instrumentation.stats(self.cache_stats(), self.prefilter_stats())
+
+    # Get the shard key of an uppercase sequence.
+    # Sequences shorter than the shard key are padded with "A" bases.
+    def _shard_key(self, sequence):
+        return sequence[:self.prefix_length].ljust(self.prefix_length, DNA_BASES[0])
+
+    # Split a sequence ID into the shard key and the ID of the sequence within its shard.
+    #
+    # Raises:
+    # - InvalidSequenceId if the sequence ID doesn't identify a shard.
+    def _parse(self, sequence_id):
+        (shard_key, separator, local_id) = str(sequence_id).partition(SHARD_SEPARATOR)
+        if shard_key not in self.shards or not separator:
+            raise InvalidSequenceId(sequence_id)
+        return (shard_key, local_id)
+
+    # Get the shard holding a sequence ID and the ID of the sequence within this shard.
+    #
+    # Raises:
+    # - InvalidSequenceId if the sequence ID doesn't identify a shard.
+    def _route(self, sequence_id):
+        (shard_key, local_id) = self._parse(sequence_id)
+        return (self.shards[shard_key], local_id)
+
+    # Insert a sequence into the shard of its shard key.
+    # See "SequenceDb.insert".
+    def insert(self, sequence):
+        return self._insert(sequence)
+
+    # Not instrumented, so that the bulk insertion records a single call.
+    def _insert(self, sequence):
+        if not is_valid_sequence(sequence):
+            raise InvalidSequence(sequence)
+        shard_key = self._shard_key(sequence.upper())
+        (result, local_id) = self.shards[shard_key].insert(sequence)
+        return (result, f"{shard_key}{SHARD_SEPARATOR}{local_id}")
+
+    # Insert many sequences, each one into the shard of its shard key.
+    # See "SequenceDb.insert_many".
+    def insert_many(self, sequences):
+        results = []
+        for sequence in sequences:
+            try:
+                results.append(self._insert(sequence))
+            except InvalidSequence:
+                results.append((InsertResult.INVALID, None))
+        return results
+
+    # Get the sequence associated with a sequence ID.
+    # See "SequenceDb.get".
+    def get(self, sequence_id):
+        return self._get(sequence_id)
+
+    # Not instrumented, so that "assemble" doesn't record a call per sequence.
+    def _get(self, sequence_id):
+        (shard, local_id) = self._route(sequence_id)
+        try:
+            return shard.get(local_id)
+        except InvalidSequenceId:
+            raise InvalidSequenceId(sequence_id)
+
+    # Delete a sequence from its shard.
+    # See "SequenceDb.delete".
+    def delete(self, sequence_id):
+        (shard, local_id) = self._route(sequence_id)
+        try:
+            shard.delete(local_id)
+        except InvalidSequenceId:
+            raise InvalidSequenceId(sequence_id)
+
+    # Replace the sequence associated with a sequence ID.
+    # The ID starts with the shard key of the sequence: a new sequence with the same shard key replaces the old one
+    # in its shard and keeps its ID, while a new sequence with another shard key is inserted into its own shard
+    # under a new ID, and the old sequence deleted. The two shards are changed one after the other, so a concurrent
+    # query may find both sequences meanwhile.
+    # See "SequenceDb.replace".
+    #
+    # Returns:
+    # - (REPLACED, sequence_id) if the sequence was replaced, sequence_id being the new ID if the shard changed, or
+    # - (ALREADY_PRESENT, present_id) if the new sequence was already present (the database is unchanged).
+    def replace(self, sequence_id, sequence):
+        if not is_valid_sequence(sequence):
+            raise InvalidSequence(sequence)
+        (shard, local_id) = self._route(sequence_id)
+        shard_key = self._shard_key(sequence.upper())
+        try:
+            if self.shards[shard_key] is shard:
+                (result, local_id) = shard.replace(local_id, sequence)
+            else:
+                (result, local_id) = self._move(shard, local_id, shard_key, sequence)
+        except InvalidSequenceId:
+            raise InvalidSequenceId(sequence_id)
+        return (result, f"{shard_key}{SHARD_SEPARATOR}{local_id}")
+
+    # Replace a sequence by a sequence of another shard: the new sequence is inserted before the old one is deleted.
+    # Returns the (InsertResult, local ID) of the new sequence in its shard.
+    def _move(self, shard, local_id, shard_key, sequence):
+        shard.get(local_id)
+        (result, new_local_id) = self.shards[shard_key].insert(sequence)
+        if result == InsertResult.ALREADY_PRESENT:
+            return (result, new_local_id)
+        try:
+            shard.delete(local_id)
+        except InvalidSequenceId:
+            # Deleted meanwhile: there is nothing left to replace.
+            self.shards[shard_key].delete(new_local_id)
+            raise
+        return (InsertResult.REPLACED, new_local_id)
+
+    # Reclaim the space of the deleted and replaced sequences of every shard.
+    # See "SequenceDb.compact".
+    def compact(self):
+        for shard in self.shards.values():
+            shard.compact()
+
+    # Find all sequences in the database that contains a sample sequence, searching all the shards concurrently.
+    # See "SequenceDb.find".
+    def find(self, sample, strand=Strand.FORWARD):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        strand = Strand(strand)
+        results = self._executor.map(lambda shard: shard.find(sample, strand), self.shards.values())
+        if strand == Strand.BOTH:
+            return [
+                StrandMatch(f"{shard_key}{SHARD_SEPARATOR}{local_id}", matched_strand)
+                for (shard_key, matches) in zip(self.shards, results)
+                for (local_id, matched_strand) in matches
+            ]
+        return [
+            f"{shard_key}{SHARD_SEPARATOR}{local_id}"
+            for (shard_key, local_ids) in zip(self.shards, results)
+            for local_id in local_ids
+        ]
+
+    # Check if every shard answers the "find" of a sample without scanning all its sequences.
+    # See "SequenceDb.is_indexed".
+    def is_indexed(self, sample):
+        return all(shard.is_indexed(sample) for shard in self.shards.values())
+
+    # Iterate over the sequences in the database that contain a sample sequence, one shard after the other
+    # (in the same order as "find").
+    # See "SequenceDb.iter_find".
+    def iter_find(self, sample, limit=None, after_id=None):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        (after_key, after_local_id) = (None, None)
+        if after_id is not None:
+            (after_key, after_local_id) = self._parse(after_id)
+            if not after_local_id.isdigit():
+                raise InvalidSequenceId(after_id)
+        return islice(self._iter_find(sample, after_key, after_local_id), limit)
+
+    def _iter_find(self, sample, after_key, after_local_id):
+        for (shard_key, shard) in self.shards.items():
+            if after_key is not None and shard_key < after_key:
+                continue
+            local_after_id = after_local_id if shard_key == after_key else None
+            for local_id in shard.iter_find(sample, after_id=local_after_id):
+                yield f"{shard_key}{SHARD_SEPARATOR}{local_id}"
+
+    # Count the sequences in the database that contain a sample sequence, counting in all the shards concurrently.
+    # See "SequenceDb.find_count".
+    def find_count(self, sample):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        return sum(self._executor.map(lambda shard: shard.find_count(sample), self.shards.values()))
+
+    # Find all the occurrences of a sample in the database, searching all the shards concurrently.
+    # See "SequenceDb.find_positions".
+    def find_positions(self, sample):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        results = self._executor.map(lambda shard: shard.find_positions(sample), self.shards.values())
+        return [
+            Occurrence(f"{shard_key}{SHARD_SEPARATOR}{local_id}", position)
+            for (shard_key, occurrences) in zip(self.shards, results)
+            for (local_id, position) in occurrences
+        ]
+
+    # Count all the occurrences of a sample in the database, counting in all the shards concurrently.
+    # See "SequenceDb.count".
+    def count(self, sample):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        return sum(self._executor.map(lambda shard: shard.count(sample), self.shards.values()))
+
+    # Find all sequences in the database that contain a sample with a few errors, searching all the shards
+    # concurrently.
+    # See "SequenceDb.find_approx".
+    def find_approx(self, sample, max_mismatches=0, max_edits=None):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        errors = max_mismatches if max_edits is None else max_edits
+        if errors < 0:
+            raise ValueError(f"Invalid number of errors: [{errors}]")
+        results = self._executor.map(
+            lambda shard: shard.find_approx(sample, max_mismatches, max_edits), self.shards.values()
+        )
+        return [
+            ApproxMatch(f"{shard_key}{SHARD_SEPARATOR}{match.sequence_id}", match.position, match.distance)
+            for (shard_key, matches) in zip(self.shards, results)
+            for match in matches
+        ]
+
+    # Find, for many samples at once, all sequences that contain each sample, searching all the shards concurrently.
+    # See "SequenceDb.find_many".
+    def find_many(self, samples):
+        samples = list(samples)
+        results = list(self._executor.map(lambda shard: shard.find_many(samples), self.shards.values()))
+        # Every shard validates the samples the same way.
+        invalid_samples = results[0][1]
+        matches = {}
+        for (shard_key, (shard_matches, _)) in zip(self.shards, results):
+            for (sample, local_ids) in shard_matches.items():
+                matches.setdefault(sample, []).extend(
+                    f"{shard_key}{SHARD_SEPARATOR}{local_id}" for local_id in local_ids
+                )
+        return (matches, invalid_samples)
+
+    # Validate if a sample sequence overlaps a sequence in the database.
+    # See "SequenceDb.overlap".
+    def overlap(self, sample, sequence_id, minimum_overlap=2, strand=Strand.FORWARD):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        (shard, local_id) = self._route(sequence_id)
+        try:
+            return shard.overlap(sample, local_id, minimum_overlap, strand)
+        except InvalidSequenceId:
+            raise InvalidSequenceId(sequence_id)
+
+    # Get the details of the overlap between a sample sequence and a sequence in the database.
+    # See "SequenceDb.overlap_details".
+    def overlap_details(self, sample, sequence_id, minimum_overlap=2):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        (shard, local_id) = self._route(sequence_id)
+        try:
+            return shard.overlap_details(sample, local_id, minimum_overlap)
+        except InvalidSequenceId:
+            raise InvalidSequenceId(sequence_id)
+
+    # Find all the sequences in the database overlapped by a sample sequence, searching all the shards concurrently.
+    # See "SequenceDb.overlap_all".
+    def overlap_all(self, sample, minimum_overlap=2):
+        if not is_valid_sequence(sample):
+            raise InvalidSample(sample)
+        results = self._executor.map(lambda shard: shard.overlap_all(sample, minimum_overlap), self.shards.values())
+        return {
+            f"{shard_key}{SHARD_SEPARATOR}{local_id}": overlap
+            for (shard_key, overlaps) in zip(self.shards, results)
+            for (local_id, overlap) in overlaps.items()
+        }
+
+    # Build (or rebuild) the full-text index of every shard.
+    # See "SequenceDb.build_index".
+    def build_index(self):
+        for shard in self.shards.values():
+            shard.build_index()
+
+    # Drop the full-text index of every shard.
+    def drop_index(self):
+        for shard in self.shards.values():
+            shard.drop_index()
+
+    # Build the overlap graph of the sequences of all the shards, with their full IDs.
+    # The shards are read one after the other, each one as it is when it is read.
+    # See "SequenceDb.build_overlap_graph".
+    def build_overlap_graph(self, minimum_overlap=DEFAULT_MINIMUM_OVERLAP):
+        items = [
+            (f"{shard_key}{SHARD_SEPARATOR}{local_id}", sequence)
+            for (shard_key, shard) in self.shards.items()
+            for (local_id, sequence) in shard.items()
+        ]
+        return OverlapGraph(items, minimum_overlap)
+
+    # Assemble the sequences of all the shards into contigs.
+    # See "SequenceDb.assemble".
+    def assemble(self, graph):
+        paths = graph.greedy_paths()
+        sequences = {sequence_id: self._get(sequence_id) for path in paths for sequence_id in path.sequence_ids}
+        return [Contig(spell(path, sequences), path.sequence_ids) for path in paths]
@@ -0,0 +1,392 @@
+#
+# On-disk snapshots of the DNA sequence database.
+#
+# A snapshot is a single binary file that is opened with "mmap": the sequences are read straight from the
+# mapped file when they are needed, so opening a snapshot takes the same time whatever its size.
+#
+# File layout (all integers are unsigned little-endian, all tables are aligned on 8 bytes):
+# - header: magic, format version, flags, number of sequences, last allocated sequence ID counter, and the
+#   offsets of each region below (see "HEADER_FORMAT").
+# - data region: the sequences, in insertion order. Either as ASCII text, each sequence followed by a "\n"
+#   separator, or packed at 2 bits per base, each sequence starting on a byte boundary (flag "FLAG_PACKED").
+# - start table: the offset (in bytes, relative to the data region) of each sequence, plus the end of the data.
+# - length table: the length (in bases) of each sequence.
+# - ID table: the offset and length of each sequence ID in the ID region, in insertion order.
+# - sorted ID table: the positions of the sequences, sorted by ID, to look up an ID with a binary search.
+# - ID region: the sequence IDs, encoded in UTF-8.
+#
+
+import copy
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from sequence_storage import (
+    BASES_PER_BYTE,
+    StringStorage,
+    count_occurrences_items,
+    find_both_items,
+    find_occurrences_items,
+    find_packed,
+    pack_sequence,
+    unpack_sequence
+)
+
+MAGIC = b"DNASNAP\0"
+VERSION = 1
+
+# The data region is packed at 2 bits per base.
+FLAG_PACKED = 1
+
+# magic, version, flags, count, last ID, data, starts, lengths, ID table, sorted IDs, ID region, end of file
+HEADER_FORMAT = "<8sIIQQQQQQQQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+SEPARATOR = b"\n"
+
+
+# Exception to indicate an invalid snapshot file.
+class InvalidSnapshot(Exception):
+    def __init__(self, path, reason):
+        self.path = path
+        self.reason = reason
+    def __str__(self):
+        return f"ERROR - Invalid snapshot: [{self.path}] ({self.reason})"
+
+
+def _pad(file):
+    file.write(b"\0" * (-file.tell() % 8))
+
+
+# Write a snapshot of sequences.
+# The snapshot is written to a temporary file which then replaces the destination, so an existing snapshot
+# is never left half written.
+#
+# Params:
+# - path: the path of the snapshot
+# - items: an iterable of (<sequence ID>, <uppercase sequence>) tuples, in insertion order
+# - last_id: the last sequence ID counter allocated by the database
+# - packed: True to pack the sequences at 2 bits per base
+def write_snapshot(path, items, last_id, packed=False):
+    temporary_path = f"{path}.tmp"
+    starts = array("Q")
+    lengths = array("Q")
+    ids = []
+    with open(temporary_path, "wb") as file:
+        file.write(b"\0" * HEADER_SIZE)
+        data_offset = file.tell()
+        for (sequence_id, sequence) in items:
+            starts.append(file.tell() - data_offset)
+            lengths.append(len(sequence))
+            ids.append(sequence_id.encode())
+            file.write(pack_sequence(sequence) if packed else sequence.encode() + SEPARATOR)
+        starts.append(file.tell() - data_offset)
+        _pad(file)
+
+        id_table = array("Q")
+        id_offset = 0
+        for encoded_id in ids:
+            id_table.extend((id_offset, len(encoded_id)))
+            id_offset += len(encoded_id)
+        sorted_ids = array("Q", sorted(range(len(ids)), key=ids.__getitem__))
+
+        region_offsets = []
+        for table in (starts, lengths, id_table, sorted_ids):
+            region_offsets.append(file.tell())
+            table.tofile(file)
+        region_offsets.append(file.tell())
+        file.write(b"".join(ids))
+        end = file.tell()
+
+        file.seek(0)
+        file.write(struct.pack(
+            HEADER_FORMAT, MAGIC, VERSION, FLAG_PACKED if packed else 0, len(ids), last_id,
+            data_offset, *region_offsets, end
+        ))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+# The mapped file of a snapshot, shared by a MappedStorage and its views.
+# It is released when the storage and all its views are closed, so that closing the storage doesn't break a view
+# still being read (like the one of a compaction, see "SequenceDb.compact").
+class _MappedFile:
+
+    # Params:
+    # - map: the mmap of the file
+    # - views: the memoryviews of the regions of the file
+    def __init__(self, map, views):
+        self.map = map
+        self.views = views
+        self._users = 1
+        self._lock = threading.Lock()
+
+    # Register a new user of the mapped file.
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+
+    # Unregister a user of the mapped file, releasing it after the last one.
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            if self._users:
+                return
+        for view in self.views:
+            view.release()
+        self.map.close()
+
+
+# Storage engine reading the sequences of a snapshot straight from the mapped file.
+# The snapshot itself is read-only: sequences stored afterwards are kept in memory, until a new snapshot is saved.
+# Likewise, the sequences of the snapshot that are deleted or replaced are only marked as such, the space of
+# the snapshot is reclaimed by the next snapshot.
+class MappedStorage:
+
+    # Params:
+    # - path: the path of the snapshot
+    # Raises:
+    # - InvalidSnapshot if the file is not a valid snapshot.
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER_SIZE:
+                raise InvalidSnapshot(path, "truncated header")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, flags, count, last_id, data_offset, starts_offset, lengths_offset, ids_offset,
+         sorted_ids_offset, id_region_offset, end) = struct.unpack_from(HEADER_FORMAT, self._map)
+        if magic != MAGIC:
+            raise InvalidSnapshot(path, "unknown file type")
+        if version != VERSION:
+            raise InvalidSnapshot(path, f"unsupported version {version}")
+        if end != len(self._map):
+            raise InvalidSnapshot(path, "truncated file")
+
+        self.packed = bool(flags & FLAG_PACKED)
+        self.last_id = last_id
+        self._count = count
+        self._data_offset = data_offset
+        view = memoryview(self._map)
+        self._data = view[data_offset:starts_offset]
+        self._starts = view[starts_offset:lengths_offset].cast("Q")
+        self._lengths = view[lengths_offset:ids_offset].cast("Q")
+        self._ids = view[ids_offset:sorted_ids_offset].cast("Q")
+        self._sorted_ids = view[sorted_ids_offset:id_region_offset].cast("Q")
+        self._id_region = view[id_region_offset:end]
+        self._mapped_file = _MappedFile(self._map, [
+            self._data, self._starts, self._lengths, self._ids, self._sorted_ids, self._id_region
+        ])
+        self._closed = False
+
+        # Sequences stored after the snapshot was opened.
+        self._overlay = StringStorage()
+        # The positions of the deleted sequences of the snapshot, and the new sequences of the replaced ones.
+        self._deleted = set()
+        self._replaced = {}
+
+    # Release the mapped file, once all the views of the storage are closed too.
+    # Closing the storage again has no effect.
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._mapped_file.release()
+
+    def __len__(self):
+        return self._count - len(self._deleted) + len(self._overlay)
+
+    def __contains__(self, sequence_id):
+        return sequence_id in self._overlay or self._position(sequence_id) is not None
+
+    def __iter__(self):
+        for position in range(self._count):
+            if position not in self._deleted:
+                yield self._id(position)
+        yield from self._overlay
+
+    def __getitem__(self, sequence_id):
+        position = self._position(sequence_id)
+        if position is None:
+            return self._overlay[sequence_id]
+        return self._sequence(position)
+
+    def __setitem__(self, sequence_id, sequence):
+        position = self._position(sequence_id)
+        if position is None:
+            self._overlay[sequence_id] = sequence
+        else:
+            self._replaced[position] = sequence
+
+    def __delitem__(self, sequence_id):
+        position = self._position(sequence_id)
+        if position is None:
+            del self._overlay[sequence_id]
+        else:
+            self._deleted.add(position)
+            self._replaced.pop(position, None)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        for position in range(self._count):
+            if position not in self._deleted:
+                yield (self._id(position), self._sequence(position))
+        yield from self._overlay.items()
+
+    # Build a compacted copy of the storage.
+    # The snapshot can't be rewritten in place: its space is reclaimed by the next snapshot instead.
+    # Returns None.
+    def compacted(self):
+        return None
+
+    # Get a read-only view of the sequences stored at this point, unaffected by the later changes.
+    # The mapped file is shared: only the sequences stored since the snapshot was opened and the changes of its
+    # sequences are copied. The view keeps the mapped file open until it is closed.
+    # Returns the MappedStorage view.
+    def view(self):
+        self._mapped_file.acquire()
+        view = copy.copy(self)
+        view._closed = False
+        view._overlay = self._overlay.view()
+        view._deleted = set(self._deleted)
+        view._replaced = dict(self._replaced)
+        return view
+
+    # Find all sequences containing a sample, searching the mapped file directly.
+    # See "StringStorage.find".
+    def find(self, sample, ids=None):
+        if ids is not None:
+            return [id for id in ids if sample in self[id]]
+
+        positions = self._find_positions(sample)
+        return [self._id(position) for position in positions] + self._overlay.find(sample)
+
+    # Count the sequences containing a sample, without building the list of their IDs.
+    # See "find".
+    def find_count(self, sample, ids=None):
+        if ids is not None:
+            return sum(sample in self[id] for id in ids)
+
+        return len(self._find_positions(sample)) + self._overlay.find_count(sample)
+
+    # Find all the occurrences of a sample: the mapped file is searched for the matching sequences, and only
+    # these sequences are read to locate the occurrences.
+    # See "StringStorage.find_occurrences".
+    def find_occurrences(self, sample, ids=None):
+        if ids is not None:
+            return find_occurrences_items(((id, self[id]) for id in ids), sample)
+
+        items = ((self._id(position), self._sequence(position)) for position in self._find_positions(sample))
+        return find_occurrences_items(items, sample) + self._overlay.find_occurrences(sample)
+
+    # Count all the occurrences of a sample, reading only the matching sequences.
+    # See "StringStorage.count_occurrences".
+    def count_occurrences(self, sample, ids=None):
+        if ids is not None:
+            return count_occurrences_items((self[id] for id in ids), sample)
+
+        sequences = (self._sequence(position) for position in self._find_positions(sample))
+        return count_occurrences_items(sequences, sample) + self._overlay.count_occurrences(sample)
+
+    # Find all sequences containing a sample or its reverse complement.
+    # Each candidate is read once and searched for both strands. Without candidates, the mapped file is searched
+    # for each strand: two searches of a literal sample are faster than a search for either strand at once.
+    # See "StringStorage.find_both".
+    def find_both(self, sample, reverse_sample, ids=None):
+        if ids is not None:
+            return find_both_items(((id, self[id]) for id in ids), sample, reverse_sample)
+
+        (forward, reverse) = (set(self._find_positions(sample)), set(self._find_positions(reverse_sample)))
+        return [
+            (self._id(position), position in forward, position in reverse)
+            for position in sorted(forward | reverse)
+        ] + self._overlay.find_both(sample, reverse_sample)
+
+    def prefix(self, sequence_id, length):
+        position = self._position(sequence_id)
+        if position is None:
+            return self._overlay.prefix(sequence_id, length)
+        if position in self._replaced:
+            return self._replaced[position][:length]
+        return self._bases(position, 0, min(length, self._lengths[position]))
+
+    def suffix(self, sequence_id, length):
+        position = self._position(sequence_id)
+        if position is None:
+            return self._overlay.suffix(sequence_id, length)
+        if position in self._replaced:
+            return self._replaced[position][-length:]
+        sequence_length = self._lengths[position]
+        return self._bases(position, max(0, sequence_length - length), sequence_length)
+
+    # Find the positions of the live sequences of the snapshot containing a sample, searching the mapped file.
+    # The deleted and replaced sequences are skipped, and the new sequences of the replaced ones are verified
+    # separately.
+    def _find_positions(self, sample):
+        if self.packed:
+            positions = find_packed(self._data, self._starts[:-1], self._lengths, sample)
+        else:
+            positions = self._find_text(sample.encode())
+        if not self._deleted and not self._replaced:
+            return positions
+        positions = [
+            position for position in positions if position not in self._deleted and position not in self._replaced
+        ]
+        if self._replaced:
+            positions = sorted(positions + [
+                position for (position, sequence) in self._replaced.items() if sample in sequence
+            ])
+        return positions
+
+    # Find the positions of the text sequences containing a sample.
+    def _find_text(self, sample):
+        positions = []
+        offset = self._data_offset
+        end = offset + self._starts[self._count]
+        hit = self._map.find(sample, offset, end)
+        while hit != -1:
+            position = bisect_right(self._starts, hit - offset, 0, self._count) - 1
+            positions.append(position)
+            # No need to look any further in this sequence.
+            hit = self._map.find(sample, offset + self._starts[position + 1], end)
+        return positions
+
+    # Get the sequence at a position of the snapshot (or the sequence replacing it).
+    def _sequence(self, position):
+        if position in self._replaced:
+            return self._replaced[position]
+        return self._bases(position, 0, self._lengths[position])
+
+    # Get the bases of a sequence of the snapshot.
+    def _bases(self, position, start, end):
+        if self.packed:
+            base_offset = self._starts[position] * BASES_PER_BYTE
+            return unpack_sequence(self._data, base_offset + start, base_offset + end)
+        offset = self._starts[position]
+        return bytes(self._data[offset + start:offset + end]).decode()
+
+    # Get the ID of the sequence at a position of the snapshot.
+    def _id(self, position):
+        return self._encoded_id(position).decode()
+
+    # Get the position of a sequence ID in the snapshot, with a binary search on the sorted ID table.
+    # Returns the position, or None if the ID is not in the snapshot (or was deleted).
+    def _position(self, sequence_id):
+        if not isinstance(sequence_id, str):
+            return None
+        encoded_id = sequence_id.encode()
+        key = lambda index: self._encoded_id(self._sorted_ids[index])
+        index = bisect_left(range(self._count), encoded_id, key=key)
+        if index < self._count and key(index) == encoded_id:
+            position = self._sorted_ids[index]
+            return None if position in self._deleted else position
+        return None
+
+    def _encoded_id(self, position):
+        offset = self._ids[2 * position]
+        return bytes(self._id_region[offset:offset + self._ids[2 * position + 1]])
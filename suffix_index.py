@@ -0,0 +1,155 @@
+#
+# Generalized suffix array over all the sequences of the DNA sequence database.
+#
+# The sequences are concatenated (each one followed by a separator) and every suffix of the resulting text
+# is sorted. All the occurrences of a sample are then found in a contiguous range of the suffix array,
+# located with two binary searches, so a query costs O(m log n) for a sample of length m plus the number of hits,
+# whatever the size of the database.
+#
+# The index is a snapshot: it is built explicitly and sequences inserted afterwards are not part of it.
+#
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Separator appended to each sequence in the indexed text. It is not a DNA base, so no sample can match across
+# two sequences.
+SEPARATOR = "$"
+
+
+# Length of the prefixes used to sort the suffixes before the doubling rounds.
+# Most suffixes of DNA sequences are already distinguished by their first few bases.
+INITIAL_PREFIX_LENGTH = 16
+
+
+# Assign to each suffix the rank of its group of equal keys.
+#
+# Params:
+# - suffix_array: the suffix positions, sorted by key
+# - keys: the key of each suffix position
+# Returns a tuple (<rank of each suffix position>, <highest rank>).
+def _rank(suffix_array, keys):
+    rank = [0] * len(suffix_array)
+    current = 0
+    for j in range(1, len(suffix_array)):
+        if keys[suffix_array[j]] != keys[suffix_array[j - 1]]:
+            current += 1
+        rank[suffix_array[j]] = current
+    return (rank, current)
+
+
+# Build the suffix array of a text by prefix doubling.
+# The suffixes are first sorted by their first characters. Then, after each round, the suffixes are sorted
+# by their first 2*k characters, and the rank of each suffix identifies its group of equal prefixes.
+# The algorithm stops once every suffix has a distinct rank.
+#
+# Params:
+# - text: the text to index
+# Returns the list of the suffix start positions, in the lexicographic order of the suffixes.
+def build_suffix_array(text):
+    n = len(text)
+    suffix_array = list(range(n))
+    if n < 2:
+        return suffix_array
+
+    k = INITIAL_PREFIX_LENGTH
+    keys = [text[i:i + k] for i in range(n)]
+    suffix_array.sort(key=keys.__getitem__)
+    (rank, current) = _rank(suffix_array, keys)
+
+    while current < n - 1:
+        # Suffixes too short to have a second half come first (their key is 0).
+        keys = [rank[i] * (n + 1) + (rank[i + k] + 1 if i + k < n else 0) for i in range(n)]
+        suffix_array.sort(key=keys.__getitem__)
+        (rank, current) = _rank(suffix_array, keys)
+        k *= 2
+
+    return suffix_array
+
+
+class SuffixArrayIndex:
+
+    # Build the index.
+    #
+    # Params:
+    # - items: an iterable of (<sequence ID>, <uppercase sequence>) tuples, in insertion order
+    def __init__(self, items):
+        self._ids = []
+        starts = []
+        parts = []
+        length = 0
+        for (sequence_id, sequence) in items:
+            self._ids.append(sequence_id)
+            starts.append(length)
+            parts.append(sequence)
+            length += len(sequence) + len(SEPARATOR)
+        parts.append("")
+
+        self._text = SEPARATOR.join(parts)
+        self._starts = array("Q", starts)
+        typecode = "I" if len(self._text) < 2 ** 32 else "Q"
+        self._suffix_array = array(typecode, build_suffix_array(self._text))
+
+    # Get the number of indexed sequences.
+    def __len__(self):
+        return len(self._ids)
+
+    # Get the number of bytes used by the index (text, suffix array and sequence tables).
+    def memory_size(self):
+        return (
+            len(self._text)
+            + self._suffix_array.itemsize * len(self._suffix_array)
+            + self._starts.itemsize * len(self._starts)
+            + 8 * len(self._ids)
+        )
+
+    # Get the positions of all the occurrences of a sample in the indexed text.
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # Returns the range of the suffix array holding the occurrences.
+    def _occurrences(self, sample):
+        (start, end) = self._bounds(sample)
+        return self._suffix_array[start:end]
+
+    # Locate the range of the suffix array holding the occurrences of a sample, with two binary searches.
+    # Returns a tuple (<start>, <end>) of the range.
+    def _bounds(self, sample):
+        text = self._text
+        m = len(sample)
+        key = lambda position: text[position:position + m]
+        start = bisect_left(self._suffix_array, sample, key=key)
+        end = bisect_right(self._suffix_array, sample, lo=start, key=key)
+        return (start, end)
+
+    # Find all indexed sequences containing a sample.
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # Returns the list of matching sequence IDs, in insertion order.
+    def find(self, sample):
+        positions = {bisect_right(self._starts, occurrence) - 1 for occurrence in self._occurrences(sample)}
+        return [self._ids[position] for position in sorted(positions)]
+
+    # Find all the occurrences of a sample in the indexed sequences, overlapping occurrences included.
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # Returns a list of (<sequence ID>, <offsets of the occurrences>) tuples for the matching sequences,
+    # in insertion order.
+    def find_occurrences(self, sample):
+        offsets = {}
+        # In text order, the sequences come in insertion order and their occurrences in increasing order.
+        for occurrence in sorted(self._occurrences(sample)):
+            position = bisect_right(self._starts, occurrence) - 1
+            offsets.setdefault(position, []).append(occurrence - self._starts[position])
+        return [(self._ids[position], position_offsets) for (position, position_offsets) in offsets.items()]
+
+    # Count all the occurrences of a sample in the indexed sequences: the size of their range in the suffix array.
+    #
+    # Params:
+    # - sample: the uppercase DNA sample
+    # Returns the number of occurrences.
+    def count_occurrences(self, sample):
+        (start, end) = self._bounds(sample)
+        return end - start
@@ -0,0 +1,34 @@
+#
+# Unit tests for "aho_corasick.py"
+#
+
+import random
+
+from aho_corasick import AhoCorasick
+
+#
+# Test cases for "AhoCorasick"
+#
+def test_aho_corasick_search_when_no_sample_found_then_empty():
+    automaton = AhoCorasick(["ACG", "TTT"])
+
+    assert automaton.search("CCCCCC") == set()
+
+def test_aho_corasick_search_when_nested_samples_then_all_found():
+    automaton = AhoCorasick(["ACGT", "CG", "G", "GTA"])
+
+    assert automaton.search("TACGTT") == {0, 1, 2}
+
+def test_aho_corasick_search_when_sample_after_failure_then_found():
+    automaton = AhoCorasick(["AAC", "ACA"])
+
+    assert automaton.search("AAACA") == {0, 1}
+
+def test_aho_corasick_search_when_random_samples_then_same_as_in():
+    generator = random.Random(5)
+    samples = ["".join(generator.choices("ACGT", k=generator.randint(1, 8))) for _ in range(100)]
+    automaton = AhoCorasick(samples)
+
+    for _ in range(100):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(1, 60)))
+        assert automaton.search(sequence) == {index for (index, sample) in enumerate(samples) if sample in sequence}
@@ -0,0 +1,84 @@
+#
+# Unit tests for "approximate_match.py"
+#
+
+import random
+
+from approximate_match import (
+    edit_search,
+    hamming_search,
+    seed_pieces
+)
+
+
+# Edit distance between two strings, with the full dynamic programming matrix.
+def edit_distance(first, second):
+    row = list(range(len(second) + 1))
+    for (i, first_base) in enumerate(first, 1):
+        (previous_row, row) = (row, [i])
+        for (j, second_base) in enumerate(second, 1):
+            row.append(min(previous_row[j - 1] + (first_base != second_base), previous_row[j] + 1, row[j - 1] + 1))
+    return row[-1]
+
+#
+# Test cases for "seed_pieces"
+#
+def test_seed_pieces_when_errors_then_disjoint_pieces():
+    assert seed_pieces("ACGTACGTA", 2) == ["ACG", "TAC", "GTA"]
+
+def test_seed_pieces_when_sample_too_short_then_empty_pieces():
+    assert seed_pieces("AC", 2) == ["", "", ""]
+
+#
+# Test cases for "hamming_search"
+#
+def test_hamming_search_when_sequence_shorter_than_sample_then_none():
+    assert hamming_search("ACG", "ACGT", 2) is None
+
+def test_hamming_search_when_several_matches_then_fewest_mismatches():
+    assert hamming_search("ACCTTTACGA", "ACGT", 1) == (0, 1)
+    assert hamming_search("ACCTTTACGTACGA", "ACGT", 1) == (6, 0)
+
+def test_hamming_search_when_random_then_same_as_naive_search():
+    generator = random.Random(3)
+    for _ in range(1000):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(0, 20)))
+        sample = "".join(generator.choices("ACGT", k=generator.randint(1, 8)))
+        max_mismatches = generator.randint(0, 3)
+        expected = None
+        for start in range(len(sequence) - len(sample) + 1):
+            mismatches = sum(a != b for (a, b) in zip(sequence[start:], sample))
+            if mismatches <= max_mismatches and (expected is None or mismatches < expected[1]):
+                expected = (start, mismatches)
+
+        assert hamming_search(sequence, sample, max_mismatches) == expected
+
+#
+# Test cases for "edit_search"
+#
+def test_edit_search_when_insertion_then_one_edit():
+    assert edit_search("TTACGGTAA", "ACGTA", 1) == (2, 1)
+
+def test_edit_search_when_sample_within_edits_then_empty_match():
+    assert edit_search("", "AC", 2) == (0, 2)
+
+def test_edit_search_when_random_then_same_distance_as_naive_search():
+    generator = random.Random(4)
+    for _ in range(500):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(0, 12)))
+        sample = "".join(generator.choices("ACGT", k=generator.randint(1, 6)))
+        max_edits = generator.randint(0, 3)
+        distances = [
+            edit_distance(sample, sequence[start:end])
+            for end in range(len(sequence) + 1) for start in range(end + 1)
+        ]
+        best = min(distances)
+
+        match = edit_search(sequence, sample, max_edits)
+
+        if best > max_edits:
+            assert match is None
+        else:
+            (start, distance) = match
+            assert distance == best
+            assert any(edit_distance(sample, sequence[start:end]) == best for end in range(start, len(sequence) + 1))
@@ -0,0 +1,106 @@
+#
+# Unit tests for "bloom_filter.py"
+#
+
+import random
+
+import pytest
+
+from bloom_filter import (
+    MIN_FILTER_BITS,
+    BloomPrefilter,
+    bloom_bits
+)
+
+#
+# Test cases for "bloom_bits"
+#
+def test_bloom_bits_when_kmers_then_at_most_hashes_bits_per_kmer():
+    bits = bloom_bits(["ACGT", "TTTT"], 256, 3)
+
+    assert 0 < bin(bits).count("1") <= 6
+    assert bits < 1 << 256
+
+def test_bloom_bits_when_subset_then_bits_included():
+    bits = bloom_bits(["ACGT", "TTTT", "GGCA"], 128, 4)
+    subset_bits = bloom_bits(["GGCA"], 128, 4)
+
+    assert bits & subset_bits == subset_bits
+
+#
+# Test cases for "BloomPrefilter"
+#
+@pytest.mark.parametrize("arguments", [(0, 0.01), (4, 0), (4, 1), (4, 0.01, 0)])
+def test_bloom_prefilter_when_invalid_arguments_then_exception(arguments):
+    with pytest.raises(ValueError):
+        BloomPrefilter(*arguments)
+
+def test_bloom_prefilter_filter_when_sample_shorter_than_k_then_none():
+    prefilter = BloomPrefilter(4)
+    prefilter.add("1", "ACGTACGT")
+
+    assert prefilter.filter(["ACG"], ["1"]) is None
+    assert prefilter.stats().queries == 0
+
+def test_bloom_prefilter_filter_when_random_sequences_then_no_false_negatives():
+    generator = random.Random(53)
+    prefilter = BloomPrefilter(5, 0.05)
+    sequences = {}
+    for id in range(300):
+        sequences[f"{id}"] = "".join(generator.choices("ACGT", k=generator.randint(1, 300)))
+        prefilter.add(f"{id}", sequences[f"{id}"])
+
+    for _ in range(200):
+        samples = ["".join(generator.choices("ACGT", k=generator.randint(5, 12))) for _ in range(2)]
+        passed = prefilter.filter(samples, list(sequences))
+        matching = [id for (id, sequence) in sequences.items() if any(sample in sequence for sample in samples)]
+        assert set(matching) <= set(passed)
+        # In the same order as the checked IDs.
+        assert passed == sorted(passed, key=int)
+
+    stats = prefilter.stats()
+    assert (stats.queries, stats.checked) == (200, 200 * 300)
+    assert stats.rejected > stats.checked // 2
+
+def test_bloom_prefilter_when_removed_then_filter_dropped():
+    prefilter = BloomPrefilter(3)
+    prefilter.add("1", "ACGTACGT")
+    prefilter.add("2", "TTTTTTTT")
+    memory_size = prefilter.memory_size()
+
+    prefilter.remove("1")
+    prefilter.remove("1")
+
+    assert len(prefilter) == 1
+    assert prefilter.memory_size() < memory_size
+    assert prefilter.filter(["TTT"], ["2"]) == ["2"]
+
+def test_bloom_prefilter_when_readded_then_new_filter():
+    prefilter = BloomPrefilter(3)
+    prefilter.add("1", "ACGTACGT")
+    prefilter.add("1", "TTTTTTTT")
+
+    assert len(prefilter) == 1
+    assert prefilter.filter(["TTT"], ["1"]) == ["1"]
+
+def test_bloom_prefilter_filter_size_when_lower_false_positive_rate_then_larger():
+    assert BloomPrefilter(8, 0.001).filter_size(10000, 10000) > BloomPrefilter(8, 0.1).filter_size(10000, 10000)
+    assert BloomPrefilter(8).filter_size(4, 0) == MIN_FILTER_BITS
+
+def test_bloom_prefilter_when_memory_budget_then_filters_capped():
+    (unbounded, bounded) = (BloomPrefilter(8, 0.001), BloomPrefilter(8, 0.001, max_bits_per_base=2))
+    sequence = "".join(random.Random(59).choices("ACGT", k=10000))
+    unbounded.add("1", sequence)
+    bounded.add("1", sequence)
+
+    assert bounded.memory_size() * 8 <= 2 * len(sequence)
+    assert bounded.memory_size() < unbounded.memory_size()
+    # Still no false negatives.
+    assert bounded.filter([sequence[5000:5020]], ["1"]) == ["1"]
+
+def test_bloom_prefilter_when_false_positives_recorded_then_counted():
+    prefilter = BloomPrefilter(3)
+    prefilter.record_false_positives(2)
+    prefilter.record_false_positives(0)
+
+    assert prefilter.stats().false_positives == 2
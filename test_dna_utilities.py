@@ -2,12 +2,21 @@
 # Unit tests for "dna_utilities.py"
 #
 
+import random
+
 import pytest
 
 from dna_utilities import (
+    first_invalid_position,
     is_valid_sequence,
     overlap_prefix,
-    overlap_suffix
+    overlap_prefix_lengths,
+    overlap_suffix,
+    overlap_suffix_lengths,
+    prefix_function,
+    reverse_complement,
+    smallest_period,
+    validate_sequences
 )
 
 #
@@ -107,6 +116,37 @@ def test_is_valid_sequence_when_t_base_then_true():
     assert is_valid
 
 
+def test_is_valid_sequence_when_random_strings_then_same_result_as_uppercase_check():
+    generator = random.Random(5)
+    characters = "ACGTacgtNnUu-\n ßıſ"
+    for _ in range(1000):
+        sequence = "".join(generator.choices(characters, k=generator.randint(0, 8)))
+
+        expected = bool(sequence) and all(c in "ACGT" for c in sequence.upper())
+
+        assert is_valid_sequence(sequence) == expected
+
+
+# Test cases for the "first_invalid_position" function.
+def test_first_invalid_position_when_valid_sequence_then_none():
+    assert first_invalid_position("ACGTacgt") is None
+
+
+def test_first_invalid_position_when_invalid_base_then_its_position():
+    assert first_invalid_position("ACGNTX") == 3
+
+
+def test_first_invalid_position_when_empty_or_not_string_then_zero():
+    assert first_invalid_position("") == 0
+    assert first_invalid_position(None) == 0
+    assert first_invalid_position(123) == 0
+
+
+# Test cases for the "validate_sequences" function.
+def test_validate_sequences_when_many_sequences_then_positions_in_order():
+    assert validate_sequences(["ACGT", "AXGT", "", "acgtN"]) == [None, 1, 0, 4]
+
+
 # Test cases for the "overlap_prefix" function.
 # Note that each test uses the default "minimum_overlap" value of 2.
 def test_overlap_prefix_given_null_sample_then_none():
@@ -268,3 +308,90 @@ def test_overlap_suffix_given_long_matching_sequence_then_matching_suffix():
 
     overlap_sequence = overlap_suffix(sample, sequence)
     assert overlap_sequence == overlap
+
+def test_overlap_suffix_given_several_overlaps_then_longest_suffix():
+    sample = "AGAGA"
+    sequence = "TTAGAGA"
+
+    overlap_sequence = overlap_suffix(sample, sequence)
+    assert overlap_sequence == "AGAGA"
+
+#
+# Test cases for the "prefix_function" function.
+#
+def test_prefix_function_given_empty_string_then_empty():
+    assert prefix_function("") == []
+
+def test_prefix_function_given_string_then_borders():
+    assert prefix_function("AABAAAB") == [0, 1, 0, 1, 2, 2, 3]
+
+#
+# Test cases for the "smallest_period" function.
+#
+def test_smallest_period_given_empty_string_then_zero():
+    assert smallest_period("") == 0
+
+def test_smallest_period_given_strings_then_smallest_self_matching_shift():
+    assert smallest_period("ACGT") == 4
+    assert smallest_period("ACACA") == 2
+    assert smallest_period("AAAA") == 1
+    assert smallest_period("AABAAAB") == 4
+
+#
+# Test cases for the "overlap_prefix_lengths" and "overlap_suffix_lengths" functions.
+#
+def test_overlap_prefix_given_several_overlaps_then_longest_prefix():
+    sample = "TTAGAGA"
+    sequence = "AGAGACC"
+
+    overlap_sequence = overlap_prefix(sample, sequence)
+    assert overlap_sequence == "AGAGA"
+
+def test_overlap_prefix_lengths_given_several_overlaps_then_all_lengths():
+    sample = "TTAGAGA"
+    sequence = "AGAGACC"
+
+    assert overlap_prefix_lengths(sample, sequence) == [5, 3]
+    assert overlap_prefix_lengths(sample, sequence, 1) == [5, 3, 1]
+    assert overlap_prefix_lengths(sample, sequence, 4) == [5]
+
+def test_overlap_suffix_lengths_given_several_overlaps_then_all_lengths():
+    sample = "AGAGACC"
+    sequence = "TTAGAGA"
+
+    assert overlap_suffix_lengths(sample, sequence) == [5, 3]
+
+def test_overlap_lengths_given_null_sample_then_empty():
+    assert overlap_prefix_lengths(None, "ACGT") == []
+    assert overlap_suffix_lengths(None, "ACGT") == []
+
+def test_overlap_lengths_given_random_sequences_then_same_as_brute_force():
+    generator = random.Random(17)
+    for _ in range(300):
+        sample = "".join(generator.choices("AC", k=generator.randint(1, 12)))
+        sequence = "".join(generator.choices("AC", k=generator.randint(1, 12)))
+        longest = min(len(sample), len(sequence))
+
+        assert overlap_prefix_lengths(sample, sequence) == [
+            length for length in range(longest, 1, -1) if sample.endswith(sequence[:length])
+        ]
+        assert overlap_suffix_lengths(sample, sequence) == [
+            length for length in range(longest, 1, -1) if sample.startswith(sequence[-length:])
+        ]
+
+#
+# Test cases for the "reverse_complement" function.
+#
+def test_reverse_complement_when_sequence_then_complemented_and_reversed():
+    assert reverse_complement("AACGTT") == "AACGTT"
+    assert reverse_complement("ACCTG") == "CAGGT"
+    assert reverse_complement("") == ""
+
+def test_reverse_complement_when_lowercase_then_same_case():
+    assert reverse_complement("aAcG") == "CgTt"
+
+def test_reverse_complement_when_applied_twice_then_original_sequence():
+    generator = random.Random(23)
+    for _ in range(100):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(0, 20)))
+        assert reverse_complement(reverse_complement(sequence)) == sequence
@@ -0,0 +1,282 @@
+#
+# Unit tests for "durability.py"
+#
+
+import os
+import random
+import threading
+import time
+
+import durability
+from durability import (
+    LOG_FILE,
+    OLD_LOG_FILE,
+    SNAPSHOT_FILE,
+    merged_items,
+    open_durable_db
+)
+from rw_lock import (
+    NoLock,
+    ReadWriteLock
+)
+from sequence_db import (
+    InsertResult,
+    SequenceDb
+)
+from snapshot import (
+    MappedStorage,
+    write_snapshot
+)
+from write_ahead_log import (
+    FsyncPolicy,
+    LogOperation,
+    encode_record
+)
+
+#
+# Test cases for "merged_items"
+#
+def test_merged_items_when_random_records_then_same_sequences_as_replay(tmp_path):
+    generator = random.Random(73)
+    snapshot_path = tmp_path / SNAPSHOT_FILE
+    write_snapshot(snapshot_path, [(f"{id}", "ACGT" * id) for id in range(1, 21)], 20)
+    records = []
+    for _ in range(200):
+        operation = generator.choice(list(LogOperation))
+        sequence = "".join(generator.choices("ACGT", k=8)) if operation != LogOperation.DELETE else ""
+        records.append((operation, f"{generator.randint(1, 40)}", sequence))
+    db = SequenceDb.open(snapshot_path)
+    for record in records:
+        db.replay(*record)
+    storage = MappedStorage(snapshot_path)
+
+    assert list(merged_items(storage, records)) == list(db.database.items())
+    storage.close()
+
+def test_merged_items_when_no_snapshot_then_log_sequences():
+    records = [
+        (LogOperation.INSERT, "1", "ACGT"), (LogOperation.INSERT, "2", "CCCC"), (LogOperation.REPLACE, "1", "TTTT"),
+        (LogOperation.DELETE, "2", ""), (LogOperation.INSERT, "3", "GGGG"), (LogOperation.INSERT, "3", "AAAA")
+    ]
+
+    assert list(merged_items(None, records)) == [("1", "TTTT"), ("3", "GGGG")]
+
+#
+# Test cases for "open_durable_db"
+#
+def test_open_durable_db_when_reopened_then_sequences_recovered_and_ids_not_reused(tmp_path):
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("CCCTAGA")
+    db.close()
+
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    (result3, sequence_id3) = db.insert("ACATAGA")
+    (result4, sequence_id4) = db.insert("GGGTAGA")
+
+    assert len(db) == 3
+    assert db.get(sequence_id2) == "CCCTAGA"
+    assert result3 == InsertResult.ALREADY_PRESENT
+    assert sequence_id3 == sequence_id1
+    assert sequence_id4 not in (sequence_id1, sequence_id2)
+    db.close()
+
+def test_open_durable_db_when_process_died_without_close_then_sequences_recovered(tmp_path):
+    db = open_durable_db(tmp_path, FsyncPolicy.NEVER, checkpoint_interval=None)
+    (result, sequence_id) = db.insert("ACATAGA")
+    # No "close": the log is left as is.
+
+    recovered_db = open_durable_db(tmp_path, checkpoint_interval=None)
+
+    assert recovered_db.get(sequence_id) == "ACATAGA"
+    recovered_db.close()
+
+def test_open_durable_db_when_torn_tail_record_then_previous_records_recovered(tmp_path):
+    record = encode_record(LogOperation.INSERT, "1", "ACATAGA")
+    torn_record = encode_record(LogOperation.INSERT, "2", "CCCTAGA")[:-3]
+    (tmp_path / LOG_FILE).write_bytes(record + torn_record)
+
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    (result, sequence_id) = db.insert("GGGTAGA")
+
+    assert len(db) == 2
+    assert db.get("1") == "ACATAGA"
+    assert sequence_id == "2"
+    db.close()
+
+def test_open_durable_db_when_interrupted_checkpoint_then_both_logs_recovered(tmp_path):
+    (tmp_path / OLD_LOG_FILE).write_bytes(encode_record(LogOperation.INSERT, "1", "ACATAGA"))
+    (tmp_path / LOG_FILE).write_bytes(encode_record(LogOperation.INSERT, "2", "CCCTAGA"))
+
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+
+    assert db.find("TAGA") == ["1", "2"]
+    assert not os.path.exists(tmp_path / OLD_LOG_FILE)
+    db.close()
+
+def test_checkpoint_then_log_merged_into_snapshot(tmp_path):
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    db.insert("ACATAGA")
+    db.checkpoint()
+    db.insert("CCCTAGA")
+    db.close()
+
+    assert os.path.exists(tmp_path / SNAPSHOT_FILE)
+    assert not os.path.exists(tmp_path / OLD_LOG_FILE)
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    assert db.find("TAGA") == ["1", "2"]
+    db.close()
+
+def test_background_checkpoint_when_log_large_enough_then_log_emptied(tmp_path):
+    db = open_durable_db(tmp_path, checkpoint_log_size=1, checkpoint_interval=0.01)
+    db.insert("ACATAGA")
+
+    deadline = time.monotonic() + 5
+    while os.path.getsize(tmp_path / LOG_FILE) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    db.close()
+
+    assert os.path.getsize(tmp_path / LOG_FILE) == 0
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    assert db.get("1") == "ACATAGA"
+    db.close()
+
+def test_open_durable_db_when_deleted_and_replaced_then_changes_recovered_and_ids_not_reused(tmp_path):
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    db.insert_many(["ACATAGA", "CCCTAGA", "GGGTAGA"])
+    db.checkpoint()
+    db.delete("3")
+    db.replace("1", "TTTTAGA")
+    db.close()
+
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    (result, sequence_id) = db.insert("GGGTAGA")
+
+    assert db.find("TAGA") == ["1", "2", "4"]
+    assert db.get("1") == "TTTTAGA"
+    assert sequence_id == "4"
+    db.close()
+
+def test_open_durable_db_when_interrupted_checkpoint_with_deletion_then_deletion_recovered(tmp_path):
+    (tmp_path / OLD_LOG_FILE).write_bytes(
+        encode_record(LogOperation.INSERT, "1", "ACATAGA")
+        + encode_record(LogOperation.INSERT, "2", "CCCTAGA")
+        + encode_record(LogOperation.DELETE, "1", "")
+    )
+    (tmp_path / LOG_FILE).write_bytes(encode_record(LogOperation.REPLACE, "2", "GGGTAGA"))
+
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+
+    assert db.find("TAGA") == ["2"]
+    assert db.get("2") == "GGGTAGA"
+    assert db.insert("ACATAGA") == (InsertResult.INSERTED, "3")
+    db.close()
+
+def test_open_durable_db_when_closed_cleanly_then_snapshot_not_rewritten(tmp_path, monkeypatch):
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    db.insert("ACATAGA")
+    db.checkpoint()
+    db.close()
+    writes = []
+    monkeypatch.setattr(durability, "write_snapshot", lambda *arguments: writes.append(arguments))
+
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+
+    assert writes == []
+    assert db.get("1") == "ACATAGA"
+    assert os.path.getsize(tmp_path / LOG_FILE) == 0
+    db.close()
+
+def test_checkpoint_then_database_reads_new_snapshot(tmp_path):
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    db.insert_many(["ACATAGA", "CCCTAGA", "GGGTAGA"])
+    db.checkpoint()
+    db.delete("2")
+    db.replace("3", "TTTTAGA")
+    db.insert("AAATAGA")
+    db.checkpoint()
+
+    assert isinstance(db.database, MappedStorage)
+    assert len(db.database._overlay) == 0
+    assert db.find("TAGA") == ["1", "3", "4"]
+    assert db.get("3") == "TTTTAGA"
+    db.insert("CCCCAGA")
+    db.close()
+
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    assert list(db.database.items()) == [("1", "ACATAGA"), ("3", "TTTTAGA"), ("4", "AAATAGA"), ("5", "CCCCAGA")]
+    db.close()
+
+def test_checkpoint_when_storage_swapped_then_previous_snapshot_closed(tmp_path):
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    db.insert("ACATAGA")
+    db.checkpoint()
+    previous = db.database
+    db.insert("CCCTAGA")
+
+    db.checkpoint()
+
+    assert previous._map.closed
+    assert not db.database._map.closed
+    assert db.find("TAGA") == ["1", "2"]
+    db.close()
+
+def test_checkpoint_when_changes_during_checkpoint_then_applied_to_new_snapshot(tmp_path, monkeypatch):
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    db.insert_many(["ACATAGA", "CCCTAGA"])
+    write = durability.write_snapshot
+
+    # The changes logged after the rotation are not in the new snapshot.
+    def write_during_changes(*arguments):
+        db.insert("GGGTAGA")
+        db.delete("1")
+        write(*arguments)
+    monkeypatch.setattr(durability, "write_snapshot", write_during_changes)
+    db.checkpoint()
+
+    assert list(db.database.items()) == [("2", "CCCTAGA"), ("3", "GGGTAGA")]
+    db.close()
+
+def test_checkpoint_when_insert_during_storage_swap_then_insert_kept(tmp_path, monkeypatch):
+    db = open_durable_db(tmp_path, checkpoint_interval=None)
+    db.insert("ACATAGA")
+    write = durability.write_snapshot
+    threads = []
+
+    # A change logged during the checkpoint is applied to the new snapshot.
+    def write_during_change(*arguments):
+        db.insert("CCCTAGA")
+        write(*arguments)
+
+    # Meanwhile, an insert from another thread must wait for the new snapshot to be installed.
+    class InsertingStorage(MappedStorage):
+        def __setitem__(self, sequence_id, sequence):
+            if not threads:
+                threads.append(threading.Thread(target=lambda: db.insert("GGGTAGA")))
+                threads[0].start()
+                threads[0].join(0.2)
+            super().__setitem__(sequence_id, sequence)
+    monkeypatch.setattr(durability, "write_snapshot", write_during_change)
+    monkeypatch.setattr(durability, "MappedStorage", InsertingStorage)
+    db.checkpoint()
+    threads[0].join()
+
+    assert len(db) == 3
+    assert db.find("TAGA") == ["1", "2", "3"]
+    assert db.insert("GGGTAGA") == (InsertResult.ALREADY_PRESENT, "3")
+    db.close()
+
+def test_open_durable_db_when_max_sync_delay_then_passed_to_log(tmp_path):
+    db = open_durable_db(tmp_path, FsyncPolicy.GROUP, max_sync_delay=0.25, checkpoint_interval=None)
+
+    assert db._wal.max_delay == 0.25
+    db.close()
+
+def test_open_durable_db_when_background_checkpoints_then_thread_safe(tmp_path):
+    db = open_durable_db(tmp_path, checkpoint_interval=60)
+    unchecked_db = open_durable_db(tmp_path / "unchecked", checkpoint_interval=None)
+
+    assert isinstance(db._lock, ReadWriteLock)
+    assert isinstance(unchecked_db._lock, NoLock)
+    db.close()
+    unchecked_db.close()
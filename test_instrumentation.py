@@ -0,0 +1,134 @@
+#
+# Unit tests for "instrumentation.py"
+#
+
+import cProfile
+import pstats
+
+import pytest
+
+from bloom_filter import BloomPrefilter
+from instrumentation import (
+    Instrumentation,
+    LatencyHistogram,
+    TracemallocHook,
+    cprofile_hook,
+    prometheus_text
+)
+from sequence_db import SequenceDb
+from exceptions.invalid_sample_ex import InvalidSample
+
+#
+# Test cases for "LatencyHistogram"
+#
+def test_latency_histogram_percentile_when_empty_then_none():
+    assert LatencyHistogram().percentile(50) is None
+
+def test_latency_histogram_percentile_when_durations_then_bucket_upper_bound():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.record(0.0000015)
+    for _ in range(10):
+        histogram.record(0.003)
+
+    assert histogram.percentile(50) == 0.000002
+    assert histogram.percentile(90) == 0.000002
+    assert histogram.percentile(99) == 0.003
+    assert histogram.count == 100
+
+#
+# Test cases for "Instrumentation"
+#
+def test_instrumentation_when_no_instrumentation_then_methods_not_wrapped():
+    db = SequenceDb()
+
+    assert "find" not in vars(db)
+    assert db.stats() is None
+
+def test_instrumentation_when_operations_then_counted():
+    db = SequenceDb(instrumentation=Instrumentation())
+    (_, sequence_id) = db.insert("ACGTACGT")
+    db.insert("ACGTACGT")
+    db.get(sequence_id)
+    db.find("CGT")
+    with pytest.raises(InvalidSample):
+        db.find("XX")
+    db.overlap("GGAC", sequence_id)
+
+    operations = db.stats()["operations"]
+    assert operations["insert"]["count"] == 2
+    assert operations["get"]["count"] == 1
+    assert (operations["find"]["count"], operations["find"]["errors"]) == (2, 1)
+    assert operations["overlap"]["count"] == 1
+    assert operations["find"]["p50"] <= operations["find"]["max"]
+
+def test_instrumentation_when_finds_then_paths_and_bases_scanned():
+    db = SequenceDb(kmer_size=4, cache_size=10, instrumentation=Instrumentation())
+    db.insert_many(["ACGTACGT", "TTTTGGGG", "CCCCAAAA", "GGGGCCCC"])
+
+    db.find("CGTA")
+    db.find("CG")
+    db.find("CG")
+
+    find = db.stats()["find"]
+    assert find["paths"] == {"suffix_index": 0, "kmer_index": 1, "bloom_filter": 0, "scan": 1}
+    assert find["index_hit_rate"] == 0.5
+    assert find["bases_scanned"] == 8 + 32
+    assert db.stats()["caches"]["find"]["hit_rate"] == 1 / 3
+
+def test_instrumentation_when_slow_query_threshold_then_slow_queries_logged():
+    instrumentation = Instrumentation(slow_query_threshold=0)
+    db = SequenceDb(instrumentation=instrumentation)
+
+    db.find("A" * 500)
+
+    [slow_query] = db.stats()["slow_queries"]
+    assert slow_query.operation == "find"
+    assert slow_query.argument == "A" * 100
+
+def test_instrumentation_when_hooks_then_run_around_calls():
+    instrumentation = Instrumentation()
+    profiler = cProfile.Profile()
+    memory = TracemallocHook()
+    instrumentation.add_hook("find", cprofile_hook(profiler))
+    instrumentation.add_hook("insert", memory)
+    db = SequenceDb(instrumentation=instrumentation)
+
+    db.insert("ACGT" * 1000)
+    db.find("CG")
+
+    assert len(memory.peaks) == 1 and memory.peaks[0] > 0
+    functions = [function for (_, _, function) in pstats.Stats(profiler).stats]
+    assert "_find" in functions
+    with pytest.raises(ValueError):
+        instrumentation.add_hook("unknown", memory)
+
+def test_prometheus_text_when_stats_then_metrics():
+    db = SequenceDb(cache_size=10, instrumentation=Instrumentation())
+    db.insert("ACGT")
+    db.find("CG")
+
+    text = prometheus_text(db.stats())
+
+    assert 'sequence_db_operations_total{operation="find"} 1' in text
+    assert 'sequence_db_operation_seconds_bucket{operation="find",le="+Inf"} 1' in text
+    assert 'sequence_db_operation_seconds_count{operation="insert"} 1' in text
+    assert "sequence_db_bases_scanned_total 4" in text
+    assert 'sequence_db_cache_misses_total{cache="find"} 1' in text
+
+def test_instrumentation_when_prefilter_then_prefilter_stats():
+    db = SequenceDb(prefilter=BloomPrefilter(4, 0.01), instrumentation=Instrumentation())
+    db.insert_many(["ACGTACGTAAAA", "TTTTGGGGCCCC", "CCCCAAAATTTT", "GGGGCCCCAAAA"])
+
+    assert db.find("ACGTACG") == ["1"]
+    db.find("CG")
+
+    stats = db.stats()
+    assert stats["find"]["paths"] == {"suffix_index": 0, "kmer_index": 0, "bloom_filter": 1, "scan": 1}
+    prefilter = stats["prefilter"]
+    assert (prefilter["queries"], prefilter["checked"]) == (1, 4)
+    assert prefilter["rejected"] + prefilter["false_positives"] == 3
+    assert prefilter["rejection_rate"] == prefilter["rejected"] / 4
+    assert prefilter["memory_size"] > 0
+    assert "sequence_db_prefilter_checked_total 4" in prometheus_text(stats)
+    assert SequenceDb(instrumentation=Instrumentation()).stats()["prefilter"] is None
@@ -0,0 +1,80 @@
+#
+# Unit tests for "kmer_index.py"
+#
+
+import pytest
+
+from kmer_index import (
+    KmerIndex,
+    canonical_kmers,
+    kmers
+)
+
+#
+# Test cases for "kmers"
+#
+def test_kmers_when_sequence_shorter_than_k_then_empty():
+    assert kmers("ACG", 4) == set()
+
+def test_kmers_when_repeated_kmers_then_distinct_kmers():
+    assert kmers("AAAAC", 3) == {"AAA", "AAC"}
+
+#
+# Test cases for "KmerIndex"
+#
+def test_kmer_index_when_invalid_size_then_exception():
+    with pytest.raises(ValueError):
+        KmerIndex(0)
+
+def test_kmer_index_candidates_when_sample_shorter_than_k_then_none():
+    index = KmerIndex(4)
+    index.add("1", "ACGTACGT")
+
+    assert index.candidates("ACG") is None
+
+def test_kmer_index_candidates_when_unknown_kmer_then_empty():
+    index = KmerIndex(4)
+    index.add("1", "ACGTACGT")
+
+    assert index.candidates("TTTT") == []
+
+def test_kmer_index_candidates_when_all_kmers_present_then_candidates_in_insertion_order():
+    index = KmerIndex(3)
+    index.add("1", "ACGTTT")
+    index.add("2", "CCCCCC")
+    index.add("3", "TTTACG")
+
+    assert index.candidates("ACGTTT") == ["1", "3"]
+    assert index.candidates("CCCC") == ["2"]
+
+#
+# Test cases for the canonical k-mers
+#
+def test_canonical_kmers_when_sequence_then_smallest_of_each_kmer_and_reverse_complement():
+    # "AAC" / "GTT", "ACC" / "GGT", "CCT" / "AGG"
+    assert canonical_kmers("AACCT", 3) == {"AAC", "ACC", "AGG"}
+    assert canonical_kmers("AC", 3) == set()
+
+def test_canonical_kmers_when_reverse_complement_then_same_kmers():
+    assert canonical_kmers("AACCTGA", 4) == canonical_kmers("TCAGGTT", 4)
+
+def test_canonical_kmer_index_candidates_when_reverse_complement_sample_then_candidates_of_both_strands():
+    index = KmerIndex(3, canonical=True)
+    index.add("1", "AACCTG")
+    index.add("2", "CAGGTT")
+    index.add("3", "GGGGGG")
+
+    assert index.candidates("AACC") == ["1", "2"]
+    assert index.candidates("GGTT") == ["1", "2"]
+    assert index.candidates("CCCC") == ["3"]
+
+def test_kmer_index_remove_then_sequence_no_longer_candidate():
+    index = KmerIndex(3)
+    index.add("1", "ACGTTT")
+    index.add("2", "TTTACG")
+    index.remove("1", "ACGTTT")
+
+    assert index.candidates("ACG") == ["2"]
+    # The k-mers only found in the removed sequence are dropped.
+    assert index.candidates("CGT") == []
+    assert len(index) == 4
@@ -0,0 +1,108 @@
+#
+# Unit tests for "overlap_graph.py"
+#
+
+import random
+
+import pytest
+
+from overlap_graph import (
+    AssemblyPath,
+    OverlapGraph,
+    spell
+)
+
+
+def items(*sequences):
+    return [(f"{id}", sequence) for (id, sequence) in enumerate(sequences, 1)]
+
+#
+# Test cases for "spell"
+#
+def test_spell_when_path_then_reads_joined_without_overlaps():
+    sequences = {"1": "ACGTAC", "2": "TACGGA", "3": "GGATTT"}
+
+    assert spell(AssemblyPath(["1", "2", "3"], [3, 3]), sequences) == "ACGTACGGATTT"
+    assert spell(AssemblyPath(["2"], []), sequences) == "TACGGA"
+
+#
+# Test cases for "OverlapGraph"
+#
+def test_overlap_graph_when_invalid_minimum_overlap_then_exception():
+    with pytest.raises(ValueError):
+        OverlapGraph([], 0)
+
+def test_overlap_graph_when_empty_then_no_reads_and_paths():
+    graph = OverlapGraph([], 3)
+
+    assert (len(graph), graph.edge_count()) == (0, 0)
+    assert graph.greedy_paths() == []
+
+def test_overlap_graph_successors_when_overlaps_then_longest_overlap_of_each_read_first():
+    graph = OverlapGraph(items("AACCGGTT", "CGGTTAAC", "GTTACCCC", "TTTTTTTT"), 3)
+
+    assert graph.successors("1") == [("2", 5), ("3", 3)]
+    assert graph.successors("2") == [("1", 3)]
+    assert graph.successors("4") == []
+    assert graph.edge_count() == 3
+    assert graph.memory_size() > 0
+
+def test_overlap_graph_when_overlap_shorter_than_minimum_then_no_edge():
+    graph = OverlapGraph(items("AACCGGTT", "GTTACCCC"), 4)
+
+    assert graph.successors("1") == []
+
+def test_overlap_graph_when_contained_or_self_overlap_then_only_proper_overlaps():
+    # "ACA" overlaps itself, and the second read is a suffix of the first one (only "CA" is a proper overlap).
+    graph = OverlapGraph(items("ACACA", "CACA"), 2)
+
+    assert graph.successors("1") == [("2", 2)]
+    assert graph.successors("2") == [("1", 3)]
+
+def test_overlap_graph_when_unknown_read_then_exception():
+    with pytest.raises(KeyError):
+        OverlapGraph(items("ACGT"), 2).successors("2")
+
+def test_overlap_graph_when_random_reads_then_same_overlaps_as_all_pairs():
+    generator = random.Random(61)
+    genome = "".join(generator.choices("ACGT", k=400))
+    sequences = list(dict.fromkeys(
+        genome[start:start + generator.randint(10, 40)] for start in (generator.randrange(380) for _ in range(60))
+    ))
+    graph = OverlapGraph(items(*sequences), 5)
+
+    for (source, read) in items(*sequences):
+        expected = []
+        for (target, other) in items(*sequences):
+            lengths = [
+                length for length in range(min(len(read), len(other)) - 1, 4, -1) if read[-length:] == other[:length]
+            ]
+            if target != source and lengths:
+                expected.append((target, lengths[0]))
+        assert sorted(graph.successors(source), key=lambda edge: int(edge[0])) == expected
+
+def test_overlap_graph_greedy_paths_when_tiled_reads_then_single_path():
+    genome = "".join(random.Random(67).choices("ACGT", k=300))
+    sequences = [genome[start:start + 50] for start in range(0, 251, 10)]
+    random.Random(71).shuffle(sequences)
+    graph = OverlapGraph(items(*sequences), 15)
+
+    [path] = graph.greedy_paths()
+
+    assert spell(path, dict(items(*sequences))) == genome
+    assert set(path.overlaps) == {40}
+
+def test_overlap_graph_greedy_paths_when_cycle_then_broken():
+    # Each read overlaps the next one, and the last one overlaps the first one.
+    graph = OverlapGraph(items("AAACCC", "CCCGGG", "GGGAAA"), 3)
+
+    [path] = graph.greedy_paths()
+
+    assert path == AssemblyPath(["1", "2", "3"], [3, 3])
+
+def test_overlap_graph_greedy_paths_when_branches_then_longest_overlaps_taken():
+    graph = OverlapGraph(items("ACGTACGG", "TACGGTTT", "CGGCCCCC", "GGTTTAAA"), 3)
+
+    paths = graph.greedy_paths()
+
+    assert paths == [AssemblyPath(["1", "2", "4"], [5, 5]), AssemblyPath(["3"], [])]
@@ -0,0 +1,61 @@
+#
+# Unit tests for "overlap_index.py"
+#
+
+import pytest
+
+from overlap_index import OverlapIndex
+
+SEQUENCES = {
+    "1": "ACATAGA",
+    "2": "AGATTTT",
+    "3": "CCCCCAC",
+}
+
+
+def build_index(max_length):
+    index = OverlapIndex(max_length)
+    for (id, sequence) in SEQUENCES.items():
+        index.add(id, sequence)
+    return index
+
+def get_prefix(id, length):
+    return SEQUENCES[id][:length]
+
+def get_suffix(id, length):
+    return SEQUENCES[id][-length:]
+
+#
+# Test cases for "OverlapIndex"
+#
+def test_overlap_index_when_invalid_length_then_exception():
+    with pytest.raises(ValueError):
+        OverlapIndex(0)
+
+def test_prefix_overlaps_when_sample_ends_with_prefixes_then_longest_lengths():
+    index = build_index(4)
+
+    assert index.prefix_overlaps("TTAGA", 2, get_prefix) == {"2": 3}
+    assert index.prefix_overlaps("TTACATA", 2, get_prefix) == {"1": 5}
+    assert index.prefix_overlaps("TTACATA", 6, get_prefix) == {}
+
+def test_suffix_overlaps_when_sample_starts_with_suffixes_then_longest_lengths():
+    index = build_index(2)
+
+    assert index.suffix_overlaps("CACGG", 2, get_suffix) == {"3": 3}
+    assert index.suffix_overlaps("ATAGAC", 2, get_suffix) == {"1": 5}
+    assert index.suffix_overlaps("ATAGAC", 3, get_suffix) == {"1": 5}
+
+def test_overlaps_when_nothing_overlaps_then_empty():
+    index = build_index(4)
+
+    assert index.prefix_overlaps("GGGG", 2, get_prefix) == {}
+    assert index.suffix_overlaps("GGGG", 2, get_suffix) == {}
+
+def test_overlap_index_remove_then_sequence_no_longer_overlapped():
+    index = build_index(4)
+    index.remove("1", SEQUENCES["1"])
+
+    assert index.prefix_overlaps("TTACA", 2, get_prefix) == {}
+    assert index.suffix_overlaps("AGACC", 2, get_suffix) == {}
+    assert index.suffix_overlaps("ACAG", 2, get_suffix) == {"3": 2}
@@ -0,0 +1,58 @@
+#
+# Unit tests for "parallel_find.py"
+#
+
+import random
+
+import pytest
+
+from parallel_find import ParallelFinder
+from sequence_db import SequenceDb
+from exceptions.invalid_sample_ex import InvalidSample
+
+#
+# Test cases for "ParallelFinder"
+#
+def test_parallel_finder_when_invalid_chunk_size_then_exception():
+    with pytest.raises(ValueError):
+        ParallelFinder(SequenceDb(), chunk_size=0)
+
+def test_parallel_finder_when_invalid_sample_then_exception():
+    with ParallelFinder(SequenceDb(), workers=1) as finder:
+        with pytest.raises(InvalidSample):
+            finder.find("QQ")
+
+def test_parallel_finder_when_empty_database_then_empty_list():
+    with ParallelFinder(SequenceDb(), workers=1) as finder:
+        assert finder.find("ACG") == []
+
+def test_parallel_finder_when_sample_across_sequences_then_no_match():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("AAAC")
+    (result2, sequence_id2) = db.insert("GTTT")
+
+    with ParallelFinder(db, workers=2, chunk_size=1) as finder:
+        assert finder.find("CG") == []
+        assert finder.find("ac") == [sequence_id1]
+
+def test_parallel_finder_when_random_sequences_then_same_results_as_find():
+    generator = random.Random(13)
+    db = SequenceDb()
+    for _ in range(300):
+        db.insert("".join(generator.choices("ACGT", k=generator.randint(1, 30))))
+
+    with ParallelFinder(db, workers=2, chunk_size=37) as finder:
+        for _ in range(50):
+            sample = "".join(generator.choices("ACGT", k=generator.randint(1, 6)))
+            assert finder.find(sample) == db.find(sample)
+
+def test_parallel_finder_when_refreshed_then_new_sequences_found():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("ACATAGA")
+
+    with ParallelFinder(db, workers=1) as finder:
+        (result2, sequence_id2) = db.insert("CCCTAGA")
+        assert finder.find("TAGA") == [sequence_id1]
+
+        finder.refresh()
+        assert finder.find("TAGA") == [sequence_id1, sequence_id2]
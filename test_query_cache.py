@@ -0,0 +1,57 @@
+#
+# Unit tests for "query_cache.py"
+#
+
+import pytest
+
+from query_cache import (
+    CacheStats,
+    QueryCache
+)
+
+#
+# Test cases for "QueryCache"
+#
+def test_query_cache_when_invalid_size_then_exception():
+    with pytest.raises(ValueError):
+        QueryCache(0)
+
+def test_query_cache_get_when_cached_then_hit_otherwise_miss():
+    cache = QueryCache(2)
+    cache.put("ACGT", ["1"])
+
+    assert cache.get("ACGT") == ["1"]
+    assert cache.get("TTTT") is None
+    assert cache.get("TTTT", "default") == "default"
+    assert cache.stats() == CacheStats(hits=1, misses=2, entries=1, size=1)
+
+def test_query_cache_put_when_too_many_entries_then_least_recently_used_evicted():
+    cache = QueryCache(2)
+    cache.put("A", [])
+    cache.put("C", [])
+    cache.get("A")
+    cache.put("G", [])
+
+    assert cache.keys() == ["A", "G"]
+
+def test_query_cache_put_when_too_large_then_least_recently_used_evicted():
+    cache = QueryCache(10, max_size=3)
+    cache.put("A", ["1", "2"], 2)
+    cache.put("C", ["3"], 1)
+    cache.put("G", ["4"], 1)
+
+    assert cache.keys() == ["C", "G"]
+    assert cache.stats().size == 2
+
+def test_query_cache_append_when_cached_then_result_and_size_updated():
+    cache = QueryCache(10, max_size=3)
+    cache.put("A", ["1"], 1)
+    cache.put("C", ["2"], 1)
+    cache.append("A", "3")
+    cache.append("T", "4")
+
+    assert cache.get("A") == ["1", "3"]
+    assert "T" not in cache
+    cache.append("C", "5")
+    # The size limit is exceeded: the least recently used result is evicted.
+    assert cache.keys() == ["A"]
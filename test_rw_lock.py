@@ -0,0 +1,68 @@
+#
+# Unit tests for "rw_lock.py"
+#
+
+import threading
+
+from rw_lock import ReadWriteLock
+
+#
+# Test cases for "ReadWriteLock"
+#
+def test_read_lock_when_held_by_a_reader_then_other_readers_not_blocked():
+    lock = ReadWriteLock()
+    entered = threading.Event()
+
+    def reader():
+        with lock.read():
+            entered.set()
+
+    with lock.read():
+        thread = threading.Thread(target=reader)
+        thread.start()
+        assert entered.wait(5)
+    thread.join()
+
+def test_write_lock_when_held_by_a_reader_then_writer_waits():
+    lock = ReadWriteLock()
+    events = []
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    with lock.read():
+        thread = threading.Thread(target=writer)
+        thread.start()
+        thread.join(0.1)
+        events.append("read done")
+    thread.join()
+
+    assert events == ["read done", "write"]
+
+def test_read_lock_when_writer_waiting_then_new_reader_waits_for_writer():
+    lock = ReadWriteLock()
+    events = []
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    def reader():
+        with lock.read():
+            events.append("second read")
+
+    with lock.read():
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        # Wait for the writer to be queued.
+        while not lock._waiting_writers:
+            pass
+        reader_thread = threading.Thread(target=reader)
+        reader_thread.start()
+        reader_thread.join(0.1)
+        events.append("first read done")
+    writer_thread.join()
+    reader_thread.join()
+
+    assert events == ["first read done", "write", "second read"]
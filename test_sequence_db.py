@@ -2,11 +2,26 @@
 # Unit tests for "sequence_db.py"
 #
 
+import random
+import threading
+
 import pytest
 
+import sequence_db
+import sequence_storage
 from sequence_db import (
+    ApproxMatch,
     InsertResult,
-    SequenceDb
+    Occurrence,
+    OverlapType,
+    SequenceDb,
+    Strand,
+    StrandMatch
+)
+from bloom_filter import BloomPrefilter
+from sequence_storage import (
+    PackedStorage,
+    StringStorage
 )
 from exceptions.invalid_sample_ex import InvalidSample
 from exceptions.invalid_sequence_ex import InvalidSequence
@@ -71,6 +86,24 @@ def test_inset_when_sequence_different_case_then_persisted_first_time_and_same_i
     assert result2 == InsertResult.ALREADY_PRESENT
     assert sequence_id1 == sequence_id2
 
+def test_insert_when_hash_collision_then_both_persisted_and_duplicates_detected(monkeypatch):
+    # Force every sequence to share the same hash.
+    monkeypatch.setattr("sequence_db.hash", lambda sequence: 0, raising=False)
+    db = SequenceDb()
+    sequence1 = "ACATAGA"
+    sequence2 = "AAGATTT"
+
+    (result1, sequence_id1) = db.insert(sequence1)
+    (result2, sequence_id2) = db.insert(sequence2)
+    (result3, sequence_id3) = db.insert(sequence2)
+
+    assert len(db) == 2
+    assert result1 == InsertResult.INSERTED
+    assert result2 == InsertResult.INSERTED
+    assert result3 == InsertResult.ALREADY_PRESENT
+    assert sequence_id1 != sequence_id2
+    assert sequence_id3 == sequence_id2
+
 #
 # Test cases for "get"
 #
@@ -249,3 +282,841 @@ def test_overlap_given_prefix_sample_different_case_then_True():
     is_overlap = db.overlap(sample, sequence_id)
 
     assert is_overlap
+
+def test_overlap_given_overlap_shorter_than_minimum_then_False():
+    db = SequenceDb()
+    sample = "TTAC"
+    sequence = "ACATAGA"
+
+    (result, sequence_id) = db.insert(sequence)
+
+    assert db.overlap(sample, sequence_id, 2)
+    assert not db.overlap(sample, sequence_id, 3)
+
+#
+# Test cases for "overlap_details"
+#
+def test_overlap_details_given_no_overlap_then_none():
+    db = SequenceDb()
+    (result, sequence_id) = db.insert("ACATAGA")
+
+    assert db.overlap_details("CCCC", sequence_id) is None
+
+def test_overlap_details_given_prefix_sample_then_prefix_overlap():
+    db = SequenceDb()
+    (result, sequence_id) = db.insert("ACATAGA")
+
+    overlap = db.overlap_details("ttACA", sequence_id)
+
+    assert overlap.overlap_type == OverlapType.PREFIX
+    assert overlap.overlap == "ACA"
+    assert overlap.length == 3
+    assert overlap.prefix_overlap == "ACA"
+    assert overlap.suffix_overlap is None
+
+def test_overlap_details_given_suffix_sample_then_suffix_overlap():
+    db = SequenceDb()
+    (result, sequence_id) = db.insert("ACATAGA")
+
+    overlap = db.overlap_details("AGATT", sequence_id)
+
+    assert overlap.overlap_type == OverlapType.SUFFIX
+    assert overlap.overlap == "AGA"
+    assert overlap.suffix_overlap == "AGA"
+    assert overlap.prefix_overlap is None
+
+def test_overlap_details_given_prefix_suffix_sample_then_both_and_longest_overlap():
+    db = SequenceDb()
+    (result, sequence_id) = db.insert("AGATAGA")
+
+    overlap = db.overlap_details("TAGAT", sequence_id)
+
+    assert overlap.overlap_type == OverlapType.BOTH
+    assert overlap.prefix_overlap == "AGAT"
+    assert overlap.suffix_overlap == "TAGA"
+    assert overlap.length == 4
+
+#
+# Test cases for the packed storage engine
+#
+def test_packed_storage_insert_get_find_overlap_then_same_results():
+    db = SequenceDb(PackedStorage())
+    sequence1 = "ACATAGA"
+    sequence2 = "ccctaga"
+
+    (result1, sequence_id1) = db.insert(sequence1)
+    (result2, sequence_id2) = db.insert(sequence2)
+    (result3, sequence_id3) = db.insert(sequence2)
+
+    assert result3 == InsertResult.ALREADY_PRESENT
+    assert sequence_id3 == sequence_id2
+    assert db.get(sequence_id2) == "CCCTAGA"
+    assert db.find("taga") == [sequence_id1, sequence_id2]
+    assert db.overlap("TTCC", sequence_id2)
+    assert not db.overlap("TTGG", sequence_id2)
+
+#
+# Test cases for the k-mer index
+#
+def test_kmer_index_find_when_random_sequences_then_same_results_as_scan():
+    generator = random.Random(11)
+    db = SequenceDb()
+    indexed_db = SequenceDb(kmer_size=4)
+    for _ in range(300):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(1, 30)))
+        db.insert(sequence)
+        indexed_db.insert(sequence)
+
+    for _ in range(300):
+        sample = "".join(generator.choices("ACGTacgt", k=generator.randint(1, 10)))
+        assert indexed_db.find(sample) == db.find(sample)
+
+def test_kmer_index_find_when_packed_storage_then_same_results_as_scan():
+    db = SequenceDb(PackedStorage(), kmer_size=3)
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("CCCTAGA")
+
+    assert db.find("TAGA") == [sequence_id1, sequence_id2]
+    assert db.find("CATA") == [sequence_id1]
+    assert db.find("TA") == [sequence_id1, sequence_id2]
+
+#
+# Test cases for "build_index"
+#
+def test_build_index_when_sequences_inserted_after_then_found():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    db.build_index()
+    (result2, sequence_id2) = db.insert("CCCTAGA")
+
+    assert db.find("taga") == [sequence_id1, sequence_id2]
+    assert db.find("CCC") == [sequence_id2]
+
+def test_build_index_when_rebuilt_then_same_results():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    db.build_index()
+    (result2, sequence_id2) = db.insert("CCCTAGA")
+    db.build_index()
+
+    assert db.find("TAGA") == [sequence_id1, sequence_id2]
+
+def test_drop_index_then_same_results():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    db.build_index()
+    db.drop_index()
+
+    assert db.find("CAT") == [sequence_id1]
+
+#
+# Test cases for "find_many"
+#
+def test_find_many_when_no_sample_then_empty():
+    db = SequenceDb()
+    db.insert("ACATAGA")
+
+    (matches, invalid_samples) = db.find_many([])
+
+    assert matches == {}
+    assert invalid_samples == []
+
+def test_find_many_when_samples_then_same_results_as_find():
+    db = SequenceDb()
+    db.insert("ACATAGA")
+    db.insert("CCCTAGA")
+    db.insert("GGGGGGG")
+    samples = ["TAGA", "cat", "GG", "TTTT", "CATA"]
+
+    (matches, invalid_samples) = db.find_many(samples)
+
+    assert invalid_samples == []
+    assert matches == {sample: db.find(sample) for sample in samples}
+
+def test_find_many_when_invalid_samples_then_reported_and_others_found():
+    db = SequenceDb()
+    (result, sequence_id) = db.insert("ACATAGA")
+
+    (matches, invalid_samples) = db.find_many(["TAG", "QQQ", None])
+
+    assert matches == {"TAG": [sequence_id]}
+    assert [e.sample for e in invalid_samples] == ["QQQ", None]
+    assert all(isinstance(e, InvalidSample) for e in invalid_samples)
+
+#
+# Test cases for "overlap_all"
+#
+def test_overlap_all_given_invalid_sample_then_exception():
+    db = SequenceDb()
+
+    with pytest.raises(InvalidSample):
+        db.overlap_all("QQ")
+
+def test_overlap_all_given_sample_then_overlapped_sequences():
+    db = SequenceDb(overlap_index_size=3)
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("AGATTTT")
+    (result3, sequence_id3) = db.insert("GGGGGGG")
+
+    overlaps = db.overlap_all("tttacat")
+
+    assert list(overlaps) == [sequence_id1, sequence_id2]
+    assert overlaps[sequence_id1].overlap_type == OverlapType.PREFIX
+    assert overlaps[sequence_id1].prefix_overlap == "ACAT"
+    assert overlaps[sequence_id2].overlap_type == OverlapType.SUFFIX
+    assert overlaps[sequence_id2].suffix_overlap == "TTT"
+
+def test_overlap_all_given_random_sequences_then_same_results_as_overlap_details():
+    generator = random.Random(19)
+    db = SequenceDb()
+    indexed_db = SequenceDb(overlap_index_size=3)
+    for _ in range(200):
+        sequence = "".join(generator.choices("ACG", k=generator.randint(1, 12)))
+        db.insert(sequence)
+        indexed_db.insert(sequence)
+
+    for _ in range(100):
+        sample = "".join(generator.choices("ACG", k=generator.randint(1, 8)))
+        minimum_overlap = generator.randint(1, 4)
+        expected = {}
+        for id in db.database:
+            overlap = db.overlap_details(sample, id, minimum_overlap)
+            if overlap is not None:
+                expected[id] = overlap
+
+        assert db.overlap_all(sample, minimum_overlap) == expected
+        assert indexed_db.overlap_all(sample, minimum_overlap) == expected
+
+#
+# Test cases for "build_overlap_graph" and "assemble"
+#
+def test_assemble_when_overlapping_reads_then_contigs():
+    db = SequenceDb(PackedStorage())
+    genome = "".join(random.Random(73).choices("ACGT", k=200))
+    db.insert_many([genome[100:160], genome[:60], genome[140:200], genome[40:120], "TTTTTTTTTT"])
+
+    graph = db.build_overlap_graph(minimum_overlap=15)
+    contigs = db.assemble(graph)
+
+    assert graph.successors("2") == [("4", 20)]
+    assert [contig.sequence for contig in contigs] == [genome, "TTTTTTTTTT"]
+    assert contigs[0].sequence_ids == ["2", "4", "1", "3"]
+
+def test_assemble_when_sequence_deleted_since_graph_built_then_exception():
+    db = SequenceDb()
+    db.insert_many(["ACGTACGT", "ACGTTTTT"])
+    graph = db.build_overlap_graph(minimum_overlap=4)
+    db.delete("2")
+
+    with pytest.raises(InvalidSequenceId):
+        db.assemble(graph)
+
+#
+# Test cases for "find_positions" and "count"
+#
+def test_find_positions_when_invalid_sample_then_exception():
+    db = SequenceDb()
+    with pytest.raises(InvalidSample):
+        db.find_positions("ACX")
+    with pytest.raises(InvalidSample):
+        db.count("")
+
+def test_find_positions_when_overlapping_occurrences_then_all_positions():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("AAAAC")
+    (result2, sequence_id2) = db.insert("CACACA")
+    db.insert("GGGG")
+
+    assert db.find_positions("aa") == [Occurrence(sequence_id1, start) for start in range(3)]
+    assert db.find_positions("ACA") == [Occurrence(sequence_id2, 1), Occurrence(sequence_id2, 3)]
+    assert db.find_positions("TT") == []
+    assert (db.count("A"), db.count("AA"), db.count("CA"), db.count("TT")) == (7, 3, 3, 0)
+
+@pytest.mark.parametrize("options", [
+    {}, {"kmer_size": 3}, {"storage": PackedStorage()}, {"cache_size": 10}, {"prefilter": BloomPrefilter(3)}
+])
+def test_find_positions_when_random_sequences_then_same_as_scan(options):
+    generator = random.Random(79)
+    db = SequenceDb(**options)
+    suffix_db = SequenceDb()
+    sequences = ["".join(generator.choices("AC", k=generator.randint(1, 30))) for _ in range(150)]
+    db.insert_many(sequences)
+    suffix_db.insert_many(sequences[:100])
+    suffix_db.build_index()
+    suffix_db.insert_many(sequences[100:])
+
+    for _ in range(100):
+        sample = "".join(generator.choices("AC", k=generator.randint(1, 6)))
+        db.find(sample)
+        expected = [
+            Occurrence(id, start) for id in db.database
+            for start in range(len(db.get(id))) if db.get(id).startswith(sample, start)
+        ]
+        for database in (db, suffix_db):
+            assert database.find_positions(sample) == expected
+            assert database.count(sample) == len(expected)
+
+#
+# Test cases for "insert_many"
+#
+def test_insert_many_when_sequences_then_results_in_order():
+    db = SequenceDb()
+    (result, sequence_id) = db.insert("ACATAGA")
+
+    results = db.insert_many(["AAGATTT", "QQ", "acataga", "aagattt", None])
+
+    assert len(db) == 2
+    assert results[0][0] == InsertResult.INSERTED
+    assert results[1] == (InsertResult.INVALID, None)
+    assert results[2] == (InsertResult.ALREADY_PRESENT, sequence_id)
+    assert results[3] == (InsertResult.ALREADY_PRESENT, results[0][1])
+    assert results[4] == (InsertResult.INVALID, None)
+
+#
+# Test cases for the thread-safe mode
+#
+def test_thread_safe_when_concurrent_inserts_and_finds_then_unique_ids_and_all_sequences_stored():
+    db = SequenceDb(kmer_size=4, thread_safe=True)
+    generator = random.Random(13)
+    sequences = list({"".join(generator.choices("ACGT", k=20)) for _ in range(2000)})
+    batches = [sequences[index::8] for index in range(8)]
+    results = [None] * len(batches)
+    errors = []
+
+    def writer(index):
+        results[index] = [db.insert(sequence) for sequence in batches[index]]
+
+    def reader():
+        try:
+            for _ in range(50):
+                for id in db.find("ACGT"):
+                    assert "ACGT" in db.get(id)
+        except Exception as ex:
+            errors.append(ex)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(len(batches))]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    ids = [sequence_id for batch_results in results for (_, sequence_id) in batch_results]
+    assert len(set(ids)) == len(sequences)
+    assert len(db) == len(sequences)
+    assert db.sequence_id == len(sequences)
+    for (batch, batch_results) in zip(batches, results):
+        for (sequence, (result, sequence_id)) in zip(batch, batch_results):
+            assert result == InsertResult.INSERTED
+            assert db.get(sequence_id) == sequence
+
+def test_thread_safe_when_same_sequence_inserted_concurrently_then_stored_once():
+    db = SequenceDb(thread_safe=True)
+    results = []
+
+    def writer():
+        results.extend(db.insert_many(["ACGTACGT"] * 100))
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(db) == 1
+    assert {sequence_id for (_, sequence_id) in results} == {"1"}
+
+#
+# Test cases for the query caches
+#
+def test_find_when_cached_then_hit_and_updated_by_inserts():
+    db = SequenceDb(cache_size=10)
+    (_, sequence_id1) = db.insert("ACGTACGT")
+
+    assert db.find("gta") == [sequence_id1]
+    assert db.find("GTA") == [sequence_id1]
+    (_, sequence_id2) = db.insert("TTGTAA")
+    db.insert("CCCC")
+    found = db.find("GTA")
+    found.append("mutated")
+
+    assert db.find("GTA") == [sequence_id1, sequence_id2]
+    stats = db.cache_stats()["find"]
+    assert (stats.hits, stats.misses, stats.entries) == (3, 1, 1)
+
+def test_find_when_cached_with_random_inserts_then_same_results_as_uncached():
+    generator = random.Random(23)
+    db = SequenceDb()
+    cached_db = SequenceDb(kmer_size=3, cache_size=5)
+    samples = ["".join(generator.choices("ACG", k=generator.randint(1, 4))) for _ in range(20)]
+    for _ in range(300):
+        sequence = "".join(generator.choices("ACG", k=generator.randint(1, 10)))
+        db.insert(sequence)
+        cached_db.insert(sequence)
+        sample = generator.choice(samples)
+        assert cached_db.find(sample) == db.find(sample)
+
+def test_overlap_when_cached_then_hit_and_same_results():
+    db = SequenceDb(cache_size=10)
+    (_, sequence_id) = db.insert("ACGTTT")
+
+    assert db.overlap_details("GGAC", sequence_id) == db.overlap_details("ggac", sequence_id)
+    assert db.overlap("GGGG", sequence_id) is False
+    assert db.overlap("GGGG", sequence_id) is False
+    with pytest.raises(InvalidSequenceId):
+        db.overlap("GGGG", "42")
+
+    stats = db.cache_stats()["overlap"]
+    assert (stats.hits, stats.misses, stats.entries) == (2, 3, 2)
+
+def test_overlap_when_replaced_during_overlap_then_stale_result_not_cached(monkeypatch):
+    db = SequenceDb(thread_safe=True, cache_size=10)
+    (_, sequence_id) = db.insert("ACGTTT")
+    overlap_suffix = sequence_db.overlap_suffix
+    threads = []
+
+    # A replacement while the overlap is computed must wait for the result to be cached, and then discard it.
+    def overlap_suffix_during_replace(*arguments):
+        if not threads:
+            threads.append(threading.Thread(target=lambda: db.replace(sequence_id, "GGGGGG")))
+            threads[0].start()
+            threads[0].join(0.2)
+        return overlap_suffix(*arguments)
+    monkeypatch.setattr(sequence_db, "overlap_suffix", overlap_suffix_during_replace)
+    stale_result = db.overlap_details("TTTCAA", sequence_id)
+    threads[0].join()
+    uncached_db = SequenceDb()
+    uncached_db.insert("GGGGGG")
+
+    assert db.overlap_details("TTTCAA", sequence_id) == uncached_db.overlap_details("TTTCAA", "1") is None
+    assert stale_result is not None
+
+def test_cache_stats_when_no_cache_then_none():
+    assert SequenceDb().cache_stats() is None
+
+#
+# Test cases for "iter_find" and "find_count"
+#
+def test_iter_find_when_invalid_sample_then_exception_before_iterating():
+    db = SequenceDb()
+
+    with pytest.raises(InvalidSample):
+        db.iter_find("ACGX")
+
+def test_iter_find_when_invalid_cursor_then_exception():
+    db = SequenceDb()
+
+    with pytest.raises(InvalidSequenceId):
+        db.iter_find("ACG", after_id="abc")
+
+def test_iter_find_when_pages_then_same_results_as_find(monkeypatch):
+    monkeypatch.setattr("sequence_db.ITER_FIND_CHUNK_SIZE", 7)
+    generator = random.Random(29)
+    sequences = ["".join(generator.choices("ACGT", k=12)) for _ in range(100)]
+    for db in (SequenceDb(), SequenceDb(kmer_size=2), SequenceDb(cache_size=4), SequenceDb(storage=PackedStorage())):
+        db.insert_many(sequences)
+        if db._find_cache is not None:
+            db.find("AC")
+        expected = db.find("AC")
+
+        assert list(db.iter_find("ac")) == expected
+        assert db.find_count("AC") == len(expected)
+        pages = []
+        after_id = None
+        while True:
+            page = list(db.iter_find("AC", limit=10, after_id=after_id))
+            if not page:
+                break
+            pages.extend(page)
+            after_id = page[-1]
+        assert pages == expected
+
+def test_iter_find_when_suffix_index_then_same_results_as_find():
+    db = SequenceDb()
+    db.insert_many(["ACGT", "TTTT", "GACG", "ACGA"])
+    db.build_index()
+    db.insert("CACGC")
+
+    assert list(db.iter_find("ACG", after_id="1")) == ["3", "4", "5"]
+    assert db.find_count("ACG") == 4
+
+def test_iter_find_when_iteration_stopped_then_remaining_sequences_not_searched(monkeypatch):
+    monkeypatch.setattr("sequence_db.ITER_FIND_CHUNK_SIZE", 10)
+    db = SequenceDb()
+    db.insert_many(f"AC{'G' * length}" for length in range(100))
+    searched = []
+    original_find = db.database.find
+    monkeypatch.setattr(db.database, "find", lambda sample, ids=None: searched.extend(ids) or original_find(sample, ids))
+
+    assert list(db.iter_find("AC", limit=3)) == ["1", "2", "3"]
+    assert len(searched) == 10
+
+#
+# Test cases for "find_approx"
+#
+def test_find_approx_when_invalid_sample_then_exception():
+    db = SequenceDb()
+
+    with pytest.raises(InvalidSample):
+        db.find_approx("ACGX", 1)
+
+def test_find_approx_when_negative_errors_then_exception():
+    db = SequenceDb()
+
+    with pytest.raises(ValueError):
+        db.find_approx("ACGT", max_edits=-1)
+
+def test_find_approx_when_mismatches_then_best_match_of_each_sequence():
+    db = SequenceDb()
+    db.insert_many(["TTACGTACTT", "ACCTAC", "GGGGGG", "ACGAAC"])
+
+    matches = db.find_approx("acgtac", max_mismatches=1)
+
+    assert matches == [ApproxMatch("1", 2, 0), ApproxMatch("2", 0, 1), ApproxMatch("4", 0, 1)]
+
+def test_find_approx_when_edits_then_insertions_and_deletions_allowed():
+    db = SequenceDb()
+    db.insert_many(["TTACGTTACTT", "ACGAC", "GGGGGG"])
+
+    matches = db.find_approx("ACGTAC", max_edits=1)
+
+    assert matches == [ApproxMatch("1", 2, 1), ApproxMatch("2", 0, 1)]
+
+def test_find_approx_when_kmer_index_then_same_results_as_scan():
+    generator = random.Random(31)
+    db = SequenceDb()
+    indexed_db = SequenceDb(kmer_size=3)
+    for _ in range(300):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(5, 40)))
+        db.insert(sequence)
+        indexed_db.insert(sequence)
+
+    for _ in range(50):
+        sample = "".join(generator.choices("ACGT", k=generator.randint(6, 12)))
+        errors = generator.randint(0, 2)
+        assert indexed_db.find_approx(sample, errors) == db.find_approx(sample, errors)
+        assert indexed_db.find_approx(sample, max_edits=errors) == db.find_approx(sample, max_edits=errors)
+        if errors == 0:
+            assert [match.sequence_id for match in db.find_approx(sample)] == db.find(sample)
+
+#
+# Test cases for the strands
+#
+def test_find_when_reverse_strand_then_sequences_containing_reverse_complement():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("TTAACCTG")
+    (result2, sequence_id2) = db.insert("CAGGTTAA")
+
+    assert db.find("AACC") == [sequence_id1]
+    assert db.find("aacc", Strand.REVERSE) == [sequence_id2]
+    assert db.find("AACC", "reverse") == [sequence_id2]
+
+def test_find_when_both_strands_then_matched_strand_of_each_sequence():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("TTAACCTG")
+    (result2, sequence_id2) = db.insert("CAGGTTAA")
+    (result3, sequence_id3) = db.insert("AACCGGTT")
+    db.insert("GGGGGGGG")
+
+    assert db.find("AACC", Strand.BOTH) == [
+        StrandMatch(sequence_id1, Strand.FORWARD),
+        StrandMatch(sequence_id2, Strand.REVERSE),
+        StrandMatch(sequence_id3, Strand.BOTH)
+    ]
+
+def test_find_when_both_strands_and_palindrome_then_both():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("TTGAATTCTT")
+
+    assert db.find("GAATTC", Strand.BOTH) == [StrandMatch(sequence_id1, Strand.BOTH)]
+
+def test_find_when_both_strands_and_canonical_index_then_single_lookup_and_single_pass(monkeypatch):
+    db = SequenceDb(PackedStorage(), kmer_size=4, canonical_kmers=True)
+    (result1, sequence_id1) = db.insert("TTAACCTG")
+    (result2, sequence_id2) = db.insert("CAGGTTAA")
+    (result3, sequence_id3) = db.insert("AACCGGTT")
+    db.insert("GGGGGGGG")
+    lookups = []
+    candidates = db._kmer_index.candidates
+    monkeypatch.setattr(db._kmer_index, "candidates", lambda sample: lookups.append(sample) or candidates(sample))
+    # The candidates are verified once for both strands, not searched for each strand.
+    monkeypatch.setattr(sequence_storage, "find_packed", None)
+
+    assert db.find("AACC", Strand.BOTH) == [
+        StrandMatch(sequence_id1, Strand.FORWARD),
+        StrandMatch(sequence_id2, Strand.REVERSE),
+        StrandMatch(sequence_id3, Strand.BOTH)
+    ]
+    assert lookups == ["AACC"]
+
+def test_find_when_unknown_strand_then_exception():
+    db = SequenceDb()
+
+    with pytest.raises(ValueError):
+        db.find("ACGT", "sideways")
+
+@pytest.mark.parametrize("canonical_kmers", [False, True])
+def test_find_when_both_strands_and_indexes_then_same_results_as_scan(canonical_kmers):
+    generator = random.Random(37)
+    db = SequenceDb()
+    indexed_db = SequenceDb(kmer_size=3, canonical_kmers=canonical_kmers)
+    packed_db = SequenceDb(PackedStorage())
+    suffix_db = SequenceDb()
+    prefiltered_db = SequenceDb(prefilter=BloomPrefilter(3))
+    for _ in range(300):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(1, 30)))
+        for database in (db, indexed_db, packed_db, suffix_db, prefiltered_db):
+            database.insert(sequence)
+        if len(suffix_db) == 200:
+            suffix_db.build_index()
+
+    for _ in range(200):
+        sample = "".join(generator.choices("ACGTacgt", k=generator.randint(1, 8)))
+        expected = db.find(sample, Strand.BOTH)
+        forward = set(db.find(sample))
+        reverse = set(db.find(sample, Strand.REVERSE))
+        assert {id for (id, strand) in expected if strand != Strand.REVERSE} == forward
+        assert {id for (id, strand) in expected if strand != Strand.FORWARD} == reverse
+        assert indexed_db.find(sample, Strand.BOTH) == expected
+        assert indexed_db.find(sample, Strand.REVERSE) == db.find(sample, Strand.REVERSE)
+        assert packed_db.find(sample, Strand.BOTH) == expected
+        assert suffix_db.find(sample, Strand.BOTH) == expected
+        assert prefiltered_db.find(sample, Strand.BOTH) == expected
+
+def test_overlap_when_strands_then_overlap_of_each_strand():
+    db = SequenceDb()
+    (result, sequence_id) = db.insert("ACCTGGA")
+
+    # "TTACC" overlaps the prefix, its reverse complement "GGTAA" overlaps nothing.
+    assert db.overlap("TTACC", sequence_id, 3, Strand.REVERSE) == False
+    assert db.overlap("TTACC", sequence_id, 3, Strand.BOTH) == Strand.FORWARD
+    # "AATCC" overlaps nothing, its reverse complement "GGATT" overlaps the suffix.
+    assert db.overlap("AATCC", sequence_id, 3) == False
+    assert db.overlap("AATCC", sequence_id, 3, "reverse") == True
+    assert db.overlap("AATCC", sequence_id, 3, Strand.BOTH) == Strand.REVERSE
+    assert db.overlap("CCCCC", sequence_id, 3, Strand.BOTH) is None
+
+def test_overlap_when_strands_and_invalid_sample_then_exception():
+    db = SequenceDb()
+    (result, sequence_id) = db.insert("ACCTGGA")
+
+    with pytest.raises(InvalidSample):
+        db.overlap("ACXT", sequence_id, strand=Strand.BOTH)
+
+#
+# Test cases for "delete", "replace" and "compact"
+#
+def test_delete_when_unknown_id_then_exception():
+    db = SequenceDb()
+
+    with pytest.raises(InvalidSequenceId):
+        db.delete("1")
+
+def test_delete_then_sequence_gone_and_id_not_reused():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("CCCTAGA")
+    db.delete(sequence_id2)
+
+    (result3, sequence_id3) = db.insert("CCCTAGA")
+
+    assert len(db) == 2
+    assert result3 == InsertResult.INSERTED
+    assert sequence_id3 not in (sequence_id1, sequence_id2)
+    assert db.find("TAGA") == [sequence_id1, sequence_id3]
+    with pytest.raises(InvalidSequenceId):
+        db.get(sequence_id2)
+    with pytest.raises(InvalidSequenceId):
+        db.overlap("TTAC", sequence_id2)
+
+def test_replace_when_invalid_sequence_or_unknown_id_then_exception():
+    db = SequenceDb()
+    (result, sequence_id) = db.insert("ACATAGA")
+
+    with pytest.raises(InvalidSequence):
+        db.replace(sequence_id, "ACXT")
+    with pytest.raises(InvalidSequenceId):
+        db.replace("2", "ACGT")
+
+def test_replace_then_new_sequence_under_same_id():
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("CCCTAGA")
+
+    assert db.replace(sequence_id1, "ggggaga") == (InsertResult.REPLACED, sequence_id1)
+    assert db.replace(sequence_id1, "CCCTAGA") == (InsertResult.ALREADY_PRESENT, sequence_id2)
+    assert db.get(sequence_id1) == "GGGGAGA"
+    assert db.find("AGA") == [sequence_id1, sequence_id2]
+    assert db.insert("ACATAGA")[0] == InsertResult.INSERTED
+    assert db.insert("GGGGAGA") == (InsertResult.ALREADY_PRESENT, sequence_id1)
+
+def test_delete_and_replace_when_cached_then_cached_results_updated():
+    db = SequenceDb(cache_size=10)
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("CCCTAGA")
+    assert db.find("TAGA") == [sequence_id1, sequence_id2]
+    assert db.overlap("TTAC", sequence_id1)
+
+    db.delete(sequence_id2)
+    db.replace(sequence_id1, "GGGGGG")
+
+    assert db.find("TAGA") == []
+    assert db.find("GGG") == [sequence_id1]
+    assert not db.overlap("TTAC", sequence_id1)
+
+def build_changed_databases(generator):
+    databases = [
+        SequenceDb(),
+        SequenceDb(kmer_size=3),
+        SequenceDb(kmer_size=3, canonical_kmers=True),
+        SequenceDb(PackedStorage(), kmer_size=3),
+        SequenceDb(overlap_index_size=4),
+        SequenceDb(cache_size=20),
+        SequenceDb(kmer_size=4, prefilter=BloomPrefilter(3, 0.1)),
+        SequenceDb()
+    ]
+    suffix_db = databases[-1]
+    # A model of the expected sequences, by ID.
+    expected = {}
+    for step in range(600):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(1, 30)))
+        operation = generator.random()
+        if operation < 0.2 and expected:
+            sequence_id = generator.choice(list(expected))
+            results = {db.delete(sequence_id) for db in databases}
+            del expected[sequence_id]
+        elif operation < 0.4 and expected:
+            sequence_id = generator.choice(list(expected))
+            results = {db.replace(sequence_id, sequence) for db in databases}
+            if sequence not in expected.values():
+                expected[sequence_id] = sequence
+        else:
+            results = {db.insert(sequence) for db in databases}
+            expected[next(iter(results))[1]] = sequence
+        # Every database gives the same result.
+        assert len(results) == 1
+        if step == 300:
+            suffix_db.build_index()
+        if step % 50 == 0:
+            databases[1].find("ACG")
+            databases[5].find("ACG")
+    return (databases, expected)
+
+def assert_same_results(databases, expected, generator):
+    for db in databases:
+        assert list(db.database.items()) == list(expected.items())
+    for _ in range(100):
+        sample = "".join(generator.choices("ACGT", k=generator.randint(1, 6)))
+        found_ids = [id for (id, sequence) in expected.items() if sample in sequence]
+        positions = [
+            Occurrence(id, start) for (id, sequence) in expected.items()
+            for start in range(len(sequence)) if sequence.startswith(sample, start)
+        ]
+        for db in databases:
+            assert db.find(sample) == found_ids
+            assert list(db.iter_find(sample)) == found_ids
+            assert db.find_count(sample) == len(found_ids)
+            assert db.find_many([sample])[0][sample] == found_ids
+            assert db.find_positions(sample) == positions
+            assert db.count(sample) == len(positions)
+        both = databases[0].find(sample, Strand.BOTH)
+        for db in databases[1:]:
+            assert db.find(sample, Strand.BOTH) == both
+        overlaps = databases[0].overlap_all(sample)
+        assert databases[4].overlap_all(sample) == overlaps
+
+def test_delete_and_replace_when_random_changes_then_same_results_as_model():
+    generator = random.Random(41)
+    (databases, expected) = build_changed_databases(generator)
+
+    assert_same_results(databases, expected, generator)
+
+def test_compact_when_random_changes_then_same_results_and_space_reclaimed():
+    generator = random.Random(43)
+    (databases, expected) = build_changed_databases(generator)
+    packed_size = databases[3].database.memory_size()
+
+    for db in databases:
+        db.compact()
+
+    assert_same_results(databases, expected, generator)
+    assert databases[3].database.dead_size() == 0
+    assert databases[3].database.memory_size() < packed_size
+    # Nothing left to compact.
+    storage = databases[3].database
+    databases[3].compact()
+    assert databases[3].database is storage
+
+@pytest.mark.parametrize("storage_class", [StringStorage, PackedStorage])
+def test_compact_when_changed_during_compaction_then_not_blocked_and_changes_applied(monkeypatch, storage_class):
+    generator = random.Random(79)
+    db = SequenceDb(storage_class(), kmer_size=3, thread_safe=True)
+    expected = {}
+    for sequence in {"".join(generator.choices("ACGT", k=generator.randint(4, 20))) for _ in range(60)}:
+        (_, sequence_id) = db.insert(sequence)
+        expected[sequence_id] = sequence
+    db.build_index()
+    for sequence_id in generator.sample(list(expected), 15):
+        db.delete(sequence_id)
+        del expected[sequence_id]
+    compacted = storage_class.compacted
+    calls = []
+
+    # The compaction of the view doesn't hold any lock: the changes made meanwhile are not blocked.
+    def change(sequence_id):
+        if sequence_id in expected and generator.random() < 0.5:
+            db.delete(sequence_id)
+            del expected[sequence_id]
+        elif sequence_id in expected:
+            sequence = "".join(generator.choices("ACGT", k=25))
+            db.replace(sequence_id, sequence)
+            expected[sequence_id] = sequence
+        else:
+            (_, new_id) = db.insert("".join(generator.choices("ACGT", k=22)))
+            expected[new_id] = db.get(new_id)
+
+    def compacted_with_changes(storage):
+        calls.append(storage)
+        if len(calls) == 1:
+            thread = threading.Thread(target=lambda: [change(f"{id}") for id in range(1, 90, 3)])
+            thread.start()
+            thread.join(5)
+            assert not thread.is_alive()
+        return compacted(storage)
+    monkeypatch.setattr(storage_class, "compacted", compacted_with_changes)
+    db.compact()
+
+    # Compacted once, the changes made meanwhile are applied to the compacted storage and index.
+    assert len(calls) == 1
+    assert list(db.database.items()) == sorted(expected.items(), key=lambda item: int(item[0]))
+    for sample in ["ACG", "TTA", "GGCA", "CA", "TTTT"]:
+        found_ids = [id for (id, sequence) in sorted(expected.items(), key=lambda item: int(item[0]))
+                     if sample in sequence]
+        assert db.find(sample) == found_ids
+        assert db.find_count(sample) == len(found_ids)
+    db.compact()
+    assert db._tombstones == 0
+
+def test_find_when_prefilter_then_same_results_as_scan():
+    generator = random.Random(47)
+    db = SequenceDb()
+    prefilter = BloomPrefilter(4, 0.05)
+    prefiltered_db = SequenceDb(PackedStorage(), prefilter=prefilter)
+    for _ in range(200):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(1, 200)))
+        db.insert(sequence)
+        prefiltered_db.insert(sequence)
+
+    for _ in range(200):
+        sample = "".join(generator.choices("ACGT", k=generator.randint(1, 10)))
+        assert prefiltered_db.find(sample) == db.find(sample)
+        assert prefiltered_db.find_count(sample) == db.find_count(sample)
+        assert list(prefiltered_db.iter_find(sample)) == db.find(sample)
+        assert prefiltered_db.find_approx(sample, 1) == db.find_approx(sample, 1)
+
+    stats = prefiltered_db.prefilter_stats()
+    assert stats.rejected > 0
+    assert stats.filters == 200
+    assert stats.memory_size == prefilter.memory_size()
+    assert db.prefilter_stats() is None
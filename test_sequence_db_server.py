@@ -0,0 +1,158 @@
+#
+# Unit tests for "sequence_db_server.py" and "sequence_db_client.py"
+#
+
+import asyncio
+
+import pytest
+
+from sequence_db import (
+    InsertResult,
+    SequenceDb
+)
+from sequence_db_client import SequenceDbClient
+from sequence_db_server import SequenceDbServer
+from sharded_sequence_db import ShardedSequenceDb
+from exceptions.internal_error_ex import InternalError
+from exceptions.invalid_request_ex import InvalidRequest
+from exceptions.invalid_sample_ex import InvalidSample
+from exceptions.invalid_sequence_ex import InvalidSequence
+from exceptions.invalid_sequence_id_ex import InvalidSequenceId
+
+
+# Run a test coroutine against a server listening on a free TCP port.
+def run_with_server(test, db=None):
+    async def run():
+        server = SequenceDbServer(db if db is not None else SequenceDb(thread_safe=True))
+        port = await server.start(port=0)
+        try:
+            async with await SequenceDbClient.connect(port=port) as client:
+                await test(server, client)
+        finally:
+            await server.close()
+    asyncio.run(run())
+
+#
+# Test cases for the requests
+#
+def test_server_when_insert_get_find_overlap_then_same_results_as_database():
+    async def test(server, client):
+        (result, sequence_id) = await client.insert("acgtac")
+        assert (result, sequence_id) == (InsertResult.INSERTED, "1")
+        assert await client.insert("ACGTAC") == (InsertResult.ALREADY_PRESENT, "1")
+        assert await client.get(sequence_id) == "ACGTAC"
+        assert await client.find("gta") == ["1"]
+        assert await client.find("TTT") == []
+        assert await client.overlap("TTAC", sequence_id) is True
+        assert await client.overlap("GGGG", sequence_id, 3) is False
+    run_with_server(test)
+
+def test_server_when_invalid_values_then_exceptions_raised_by_client():
+    async def test(server, client):
+        with pytest.raises(InvalidSequence):
+            await client.insert("ACGQ")
+        with pytest.raises(InvalidSequenceId):
+            await client.get("42")
+        with pytest.raises(InvalidSample) as info:
+            await client.find("XX")
+        assert info.value.sample == "XX"
+        with pytest.raises(InvalidRequest):
+            await client._request("delete", "1")
+        with pytest.raises(InvalidRequest):
+            await client._request("get")
+        # The connection is still usable after errors.
+        assert await client.find("A") == []
+    run_with_server(test)
+
+def test_server_when_pipelined_requests_then_responses_in_request_order():
+    async def test(server, client):
+        sequences = [f"ACGT{'A' * length}C" for length in range(50)]
+        results = await asyncio.gather(*(client.insert(sequence) for sequence in sequences))
+        assert [sequence_id for (_, sequence_id) in results] == [f"{index}" for index in range(1, 51)]
+
+        samples = [f"T{'A' * length}C" for length in range(50)]
+        found = await asyncio.gather(*(client.find(sample) for sample in samples))
+        assert found == [[f"{length + 1}"] for length in range(50)]
+    run_with_server(test)
+
+def test_server_when_concurrent_finds_then_coalesced_into_batches():
+    db = SequenceDb(thread_safe=True)
+    db.insert_many(["ACGTACGT", "TTTTGGGG", "CCCCAAAA"])
+
+    async def test(server, client):
+        samples = ["ACG", "GGG", "CCA", "acg", "TTTT"] * 20
+        found = await asyncio.gather(*(client.find(sample) for sample in samples))
+        assert found == [db.find(sample) for sample in samples]
+        assert server.finds.batch_count < len(samples)
+        assert 1 <= server.finds.scan_count <= server.finds.batch_count
+    run_with_server(test, db)
+
+def test_server_when_concurrent_indexed_finds_then_looked_up_without_scan():
+    db = SequenceDb(kmer_size=3, thread_safe=True)
+    db.insert_many(["ACGTACGT", "TTTTGGGG", "CCCCAAAA"])
+
+    async def test(server, client):
+        samples = ["ACGT", "TTGG", "CCAA", "acgt", "AAAA"] * 20
+        found = await asyncio.gather(*(client.find(sample) for sample in samples))
+        assert found == [db.find(sample) for sample in samples]
+        assert server.finds.scan_count == 0
+        # The samples shorter than the k-mers are still scanned together.
+        found = await asyncio.gather(*(client.find(sample) for sample in ["AC", "GG", "CA"]))
+        assert found == [["1"], ["2"], ["3"]]
+        assert server.finds.scan_count == 1
+    run_with_server(test, db)
+
+def test_server_when_sharded_database_then_same_results_as_database():
+    db = ShardedSequenceDb(prefix_length=1, kmer_size=3, thread_safe=True)
+    db.insert_many(["ACGTACGT", "TTTTGGGG", "CCCCAAAA"])
+
+    async def test(server, client):
+        assert await client.insert("gggtac") == (InsertResult.INSERTED, "G-1")
+        assert await client.get("G-1") == "GGGTAC"
+        samples = ["ACGT", "TTGG", "CCAA", "GTAC", "AC", "GG"] * 10
+        found = await asyncio.gather(*(client.find(sample) for sample in samples))
+        assert found == [db.find(sample) for sample in samples]
+        assert await client.overlap("TTGG", "G-1") is True
+        with pytest.raises(InvalidSequenceId):
+            await client.get("X-1")
+    run_with_server(test, db)
+    db.close()
+
+def test_server_when_unexpected_error_then_internal_error_logged(caplog):
+    db = SequenceDb(thread_safe=True)
+
+    def failing_get(sequence_id):
+        raise RuntimeError("bug")
+    db.get = failing_get
+
+    async def test(server, client):
+        with pytest.raises(InternalError) as info:
+            await client.get("1")
+        assert "bug" in info.value.error
+        assert "Request failed" in caplog.text
+        with pytest.raises(InvalidRequest):
+            await client._request("get", "1", "2")
+        with pytest.raises(InvalidSequenceId):
+            await client._request("overlap", "ACGT", ["1"])
+        # The connection is still usable after errors.
+        assert await client.find("A") == []
+    run_with_server(test, db)
+
+def test_server_when_malformed_line_then_invalid_request():
+    async def test(server, client):
+        future = asyncio.get_running_loop().create_future()
+        client._waiting.append(future)
+        client._writer.write(b"not json\n")
+        assert (await future)["error"] == "InvalidRequest"
+    run_with_server(test)
+
+def test_server_when_unhashable_command_then_invalid_request_and_connection_kept():
+    async def test(server, client):
+        for request in (b'[["x"]]\n', b'[{"a": 1}]\n'):
+            future = asyncio.get_running_loop().create_future()
+            client._waiting.append(future)
+            client._writer.write(request)
+            assert (await future)["error"] == "InvalidRequest"
+        # The following requests still get their response.
+        assert await asyncio.wait_for(client.insert("ACGT"), 5) == (InsertResult.INSERTED, "1")
+    run_with_server(test)
@@ -0,0 +1,90 @@
+#
+# Unit tests for "sequence_loader.py"
+#
+
+import gzip
+
+import pytest
+
+from sequence_db import SequenceDb
+from sequence_loader import (
+    FileFormat,
+    LoadSummary,
+    load_file,
+    load_sequences,
+    read_fasta,
+    read_lines,
+    read_sequences
+)
+
+FASTA = """>read1 first read
+ACGT
+ACGT
+; comment
+>read2
+ttag
+
+>read3
+ACGT
+ACGT
+>read4
+ACQT
+"""
+
+#
+# Test cases for the readers
+#
+def test_read_fasta_when_multiline_records_then_joined_sequences():
+    sequences = list(read_fasta(FASTA.splitlines()))
+
+    assert sequences == ["ACGTACGT", "ttag", "ACGTACGT", "ACQT"]
+
+def test_read_lines_when_blank_lines_then_ignored():
+    sequences = list(read_lines(["ACGT\n", "\n", "  TTAG \n"]))
+
+    assert sequences == ["ACGT", "TTAG"]
+
+def test_read_sequences_when_fasta_file_then_format_detected(tmp_path):
+    path = tmp_path / "reads.fasta"
+    path.write_text(FASTA)
+
+    assert list(read_sequences(path)) == ["ACGTACGT", "ttag", "ACGTACGT", "ACQT"]
+
+def test_read_sequences_when_gzip_lines_file_then_decompressed(tmp_path):
+    path = tmp_path / "reads.txt.gz"
+    with gzip.open(path, "wt") as file:
+        file.write("ACGT\nTTAG\n")
+
+    assert list(read_sequences(path)) == ["ACGT", "TTAG"]
+
+def test_read_sequences_when_format_forced_then_format_used(tmp_path):
+    path = tmp_path / "reads.txt"
+    path.write_text(">ACGT\nTTAG\n")
+
+    assert list(read_sequences(path, FileFormat.LINES)) == [">ACGT", "TTAG"]
+
+#
+# Test cases for the loaders
+#
+def test_load_sequences_when_invalid_batch_size_then_exception():
+    with pytest.raises(ValueError):
+        load_sequences(SequenceDb(), ["ACGT"], 0)
+
+def test_load_sequences_when_several_batches_then_summary():
+    db = SequenceDb()
+
+    summary = load_sequences(db, ["ACGT", "TTAG", "acgt", "QQ", None, "GG"], batch_size=2)
+
+    assert summary == LoadSummary(inserted=3, already_present=1, invalid=2, bases=16)
+    assert len(db) == 3
+
+def test_load_file_when_fasta_file_then_summary(tmp_path):
+    db = SequenceDb()
+    path = tmp_path / "reads.fasta.gz"
+    with gzip.open(path, "wt") as file:
+        file.write(FASTA)
+
+    summary = load_file(db, path, batch_size=3)
+
+    assert summary == LoadSummary(inserted=2, already_present=1, invalid=1, bases=24)
+    assert db.find("ACGTACGT") == ["1"]
@@ -0,0 +1,215 @@
+#
+# Unit tests for "sequence_storage.py"
+#
+
+import random
+
+import pytest
+
+from sequence_storage import (
+    PackedStorage,
+    StringStorage,
+    find_offsets,
+    pack_sequence,
+    unpack_sequence
+)
+
+#
+# Test cases for "pack_sequence" and "unpack_sequence"
+#
+def test_pack_sequence_when_4_bases_then_one_byte():
+    packed = pack_sequence("ACGT")
+
+    assert packed == bytes([0b00011011])
+
+def test_pack_sequence_when_partial_byte_then_padded():
+    packed = pack_sequence("ACGTC")
+
+    assert packed == bytes([0b00011011, 0b01000000])
+
+def test_unpack_sequence_when_packed_then_original_sequence():
+    sequence = "ACGTTGCAAC"
+
+    unpacked = unpack_sequence(pack_sequence(sequence), 0, len(sequence))
+
+    assert unpacked == sequence
+
+def test_unpack_sequence_when_range_then_only_range():
+    sequence = "ACGTTGCAAC"
+
+    unpacked = unpack_sequence(pack_sequence(sequence), 3, 9)
+
+    assert unpacked == sequence[3:9]
+
+#
+# Test cases for "PackedStorage"
+#
+def test_packed_storage_when_sequences_set_then_same_sequences_get():
+    storage = PackedStorage()
+    storage["1"] = "ACGTA"
+    storage["2"] = "TTT"
+
+    assert len(storage) == 2
+    assert "1" in storage
+    assert "3" not in storage
+    assert storage["1"] == "ACGTA"
+    assert storage["2"] == "TTT"
+    assert list(storage.items()) == [("1", "ACGTA"), ("2", "TTT")]
+
+def test_packed_storage_when_unknown_id_then_key_error():
+    storage = PackedStorage()
+
+    with pytest.raises(KeyError):
+        storage["1"]
+
+def test_packed_storage_prefix_suffix_then_sequence_ends():
+    storage = PackedStorage()
+    storage["1"] = "ACGTACCGT"
+
+    assert storage.prefix("1", 6) == "ACGTAC"
+    assert storage.suffix("1", 6) == "TACCGT"
+    assert storage.prefix("1", 20) == "ACGTACCGT"
+    assert storage.suffix("1", 20) == "ACGTACCGT"
+
+def test_packed_storage_find_when_sample_across_sequences_then_no_match():
+    storage = PackedStorage()
+    storage["1"] = "AAAC"
+    storage["2"] = "GTTT"
+
+    assert storage.find("CG") == []
+    assert storage.find("AC") == ["1"]
+
+def test_packed_storage_find_when_sample_in_padding_then_no_match():
+    storage = PackedStorage()
+    storage["1"] = "CCCCC"
+
+    assert storage.find("CA") == []
+
+def test_packed_storage_find_when_random_sequences_then_same_as_string_storage():
+    generator = random.Random(7)
+    packed = PackedStorage()
+    strings = StringStorage()
+    for id in range(200):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(1, 40)))
+        packed[str(id)] = sequence
+        strings[str(id)] = sequence
+
+    for _ in range(200):
+        sample = "".join(generator.choices("ACGT", k=generator.randint(1, 12)))
+        assert packed.find(sample) == strings.find(sample)
+        assert packed.find_count(sample) == strings.find_count(sample) == len(strings.find(sample))
+
+def test_find_both_when_random_sequences_then_same_as_find_of_each_strand():
+    generator = random.Random(19)
+    packed = PackedStorage()
+    strings = StringStorage()
+    for id in range(200):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(1, 40)))
+        packed[str(id)] = sequence
+        strings[str(id)] = sequence
+
+    for _ in range(100):
+        sample = "".join(generator.choices("ACGT", k=generator.randint(1, 8)))
+        reverse_sample = sample[::-1]
+        (forward, reverse) = (set(strings.find(sample)), set(strings.find(reverse_sample)))
+        expected = [(id, id in forward, id in reverse) for id in strings if id in forward or id in reverse]
+        assert strings.find_both(sample, reverse_sample) == expected
+        assert packed.find_both(sample, reverse_sample) == expected
+        ids = [id for id in strings if int(id) % 3 == 0]
+        assert packed.find_both(sample, reverse_sample, ids) == strings.find_both(sample, reverse_sample, ids)
+
+def test_packed_storage_when_deleted_and_replaced_then_live_sequences_in_insertion_order():
+    storage = PackedStorage()
+    storage["1"] = "ACGTACGT"
+    storage["2"] = "CCCCGGGG"
+    storage["3"] = "TTTTACGT"
+    del storage["2"]
+    storage["1"] = "GGGGAAAA"
+
+    assert len(storage) == 2
+    assert "2" not in storage
+    assert list(storage.items()) == [("1", "GGGGAAAA"), ("3", "TTTTACGT")]
+    assert storage.find("ACGT") == ["3"]
+    assert storage.find("A") == ["1", "3"]
+    assert storage.find_count("CCCC") == 0
+    assert storage.dead_size() == 4
+    with pytest.raises(KeyError):
+        del storage["2"]
+
+def test_packed_storage_compacted_then_same_sequences_without_dead_space():
+    generator = random.Random(13)
+    storage = PackedStorage()
+    strings = StringStorage()
+    for id in range(200):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(1, 40)))
+        storage[str(id)] = sequence
+        strings[str(id)] = sequence
+    for id in generator.sample(range(200), 50):
+        del storage[str(id)]
+        del strings[str(id)]
+    for id in generator.sample(list(strings), 50):
+        sequence = "".join(generator.choices("ACGT", k=generator.randint(1, 40)))
+        storage[id] = sequence
+        strings[id] = sequence
+
+    compacted = storage.compacted()
+
+    for packed in (storage, compacted):
+        assert list(packed.items()) == list(strings.items())
+        for _ in range(50):
+            sample = "".join(generator.choices("ACGT", k=generator.randint(1, 6)))
+            assert packed.find(sample) == strings.find(sample)
+            assert packed.find_count(sample) == strings.find_count(sample)
+    assert compacted.dead_size() == 0
+    assert compacted.memory_size() < storage.memory_size()
+
+@pytest.mark.parametrize("storage_class", [StringStorage, PackedStorage])
+def test_storage_view_when_changed_afterwards_then_view_unchanged(storage_class):
+    storage = storage_class()
+    for (id, sequence) in enumerate(["ACATAGA", "CCCTAGA", "GGGTAGA"], 1):
+        storage[str(id)] = sequence
+
+    view = storage.view()
+    del storage["1"]
+    storage["2"] = "TTTTAGA"
+    storage["4"] = "AAAAAAA"
+
+    assert list(view.items()) == [("1", "ACATAGA"), ("2", "CCCTAGA"), ("3", "GGGTAGA")]
+    assert list(view.compacted().items()) == list(view.items())
+    assert list(storage.items()) == [("2", "TTTTAGA"), ("3", "GGGTAGA"), ("4", "AAAAAAA")]
+
+#
+# Test cases for "find_occurrences" and "count_occurrences"
+#
+def test_find_offsets_when_overlapping_occurrences_then_all_offsets():
+    assert find_offsets("AAAAA", "AA", 1) == [0, 1, 2, 3]
+    assert find_offsets("CACACAGCA", "CACA", 2) == [0, 2]
+    assert find_offsets("ACGT", "TT", 2) == []
+
+def test_find_occurrences_when_random_sequences_then_same_as_scan():
+    generator = random.Random(29)
+    packed = PackedStorage()
+    strings = StringStorage()
+    for id in range(200):
+        sequence = "".join(generator.choices("AC", k=generator.randint(1, 40)))
+        packed[str(id)] = sequence
+        strings[str(id)] = sequence
+    del packed["5"]
+    del strings["5"]
+    packed["7"] = strings["7"] = "CACACACA"
+
+    for _ in range(100):
+        sample = "".join(generator.choices("AC", k=generator.randint(1, 6)))
+        expected = [
+            (id, [start for start in range(len(sequence)) if sequence.startswith(sample, start)])
+            for (id, sequence) in strings.items() if sample in sequence
+        ]
+        count = sum(len(offsets) for (_, offsets) in expected)
+        ids = list(strings)[::3]
+        for storage in (strings, packed):
+            assert storage.find_occurrences(sample) == expected
+            assert storage.count_occurrences(sample) == count
+            assert storage.find_occurrences(sample, ids) == [match for match in expected if match[0] in ids]
+            assert storage.count_occurrences(sample, ids) == sum(
+                len(offsets) for (id, offsets) in expected if id in ids
+            )
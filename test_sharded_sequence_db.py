@@ -0,0 +1,370 @@
+#
+# Unit tests for "sharded_sequence_db.py"
+#
+
+import os
+import random
+
+import pytest
+
+from bloom_filter import BloomPrefilter
+from instrumentation import Instrumentation
+from sequence_db import (
+    ApproxMatch,
+    InsertResult,
+    Occurrence,
+    Strand,
+    StrandMatch
+)
+from sharded_sequence_db import ShardedSequenceDb
+from snapshot import InvalidSnapshot
+from exceptions.invalid_sample_ex import InvalidSample
+from exceptions.invalid_sequence_ex import InvalidSequence
+from exceptions.invalid_sequence_id_ex import InvalidSequenceId
+
+#
+# Test cases for the shards
+#
+def test_sharded_db_when_invalid_prefix_length_then_exception():
+    with pytest.raises(ValueError):
+        ShardedSequenceDb(0)
+
+def test_sharded_db_when_prefix_length_then_4_power_shards():
+    with ShardedSequenceDb(2) as db:
+        assert len(db.shards) == 16
+
+#
+# Test cases for "insert"
+#
+def test_insert_when_invalid_sequence_then_exception():
+    with ShardedSequenceDb() as db:
+        with pytest.raises(InvalidSequence):
+            db.insert("QWACATAGA")
+
+def test_insert_when_new_sequence_then_id_starts_with_shard_key():
+    with ShardedSequenceDb(2) as db:
+        (result, sequence_id) = db.insert("acATAGA")
+
+        assert len(db) == 1
+        assert result == InsertResult.INSERTED
+        assert sequence_id.startswith("AC-")
+
+def test_insert_when_sequence_shorter_than_shard_key_then_padded_shard_key():
+    with ShardedSequenceDb(3) as db:
+        (result, sequence_id) = db.insert("C")
+
+        assert sequence_id.startswith("CAA-")
+        assert db.get(sequence_id) == "C"
+
+def test_insert_when_sequence_inserted_twice_then_same_id():
+    with ShardedSequenceDb() as db:
+        (result1, sequence_id1) = db.insert("ACATAGA")
+        (result2, sequence_id2) = db.insert("acataga")
+
+        assert len(db) == 1
+        assert result2 == InsertResult.ALREADY_PRESENT
+        assert sequence_id1 == sequence_id2
+
+#
+# Test cases for "get"
+#
+def test_get_when_unknown_shard_then_exception():
+    with ShardedSequenceDb() as db:
+        with pytest.raises(InvalidSequenceId):
+            db.get("X-1")
+
+def test_get_when_unknown_id_then_exception_with_full_id():
+    with ShardedSequenceDb() as db:
+        db.insert("ACATAGA")
+
+        with pytest.raises(InvalidSequenceId) as e:
+            db.get("A-2")
+        assert e.value.sequence_id == "A-2"
+
+def test_get_when_missing_separator_then_exception():
+    with ShardedSequenceDb() as db:
+        with pytest.raises(InvalidSequenceId):
+            db.get("A")
+
+#
+# Test cases for "find" and "find_many"
+#
+def test_find_when_invalid_sample_then_exception():
+    with ShardedSequenceDb() as db:
+        with pytest.raises(InvalidSample):
+            db.find(None)
+
+def test_find_when_matches_in_several_shards_then_all_results():
+    with ShardedSequenceDb() as db:
+        (result1, sequence_id1) = db.insert("ACATAGA")
+        (result2, sequence_id2) = db.insert("CCCTAGA")
+        (result3, sequence_id3) = db.insert("GGGGGGG")
+
+        assert db.find("taga") == [sequence_id1, sequence_id2]
+        assert db.find("TTTT") == []
+
+def test_find_many_when_samples_then_same_results_as_find():
+    with ShardedSequenceDb() as db:
+        db.insert("ACATAGA")
+        db.insert("CCCTAGA")
+        samples = ["TAGA", "CCC", "TTTT"]
+
+        (matches, invalid_samples) = db.find_many(samples + ["QQ"])
+
+        assert matches == {sample: db.find(sample) for sample in samples}
+        assert [e.sample for e in invalid_samples] == ["QQ"]
+
+#
+# Test cases for "overlap"
+#
+def test_overlap_when_prefix_sample_then_true():
+    with ShardedSequenceDb() as db:
+        (result, sequence_id) = db.insert("ACATAGA")
+
+        assert db.overlap("GGAC", sequence_id)
+        assert not db.overlap("GGGG", sequence_id)
+
+def test_overlap_when_unknown_id_then_exception():
+    with ShardedSequenceDb() as db:
+        with pytest.raises(InvalidSequenceId):
+            db.overlap("AGA", "A-1")
+
+def test_overlap_all_when_overlaps_in_several_shards_then_all_results():
+    with ShardedSequenceDb(overlap_index_size=4) as db:
+        (result1, sequence_id1) = db.insert("ACATAGA")
+        (result2, sequence_id2) = db.insert("GATTTTT")
+
+        overlaps = db.overlap_all("AGAT")
+
+        assert set(overlaps) == {sequence_id1, sequence_id2}
+        assert overlaps[sequence_id1].suffix_overlap == "AGA"
+        assert overlaps[sequence_id2].prefix_overlap == "GAT"
+
+def test_sharded_iter_find_when_pages_then_same_results_as_find():
+    db = ShardedSequenceDb(prefix_length=1)
+    db.insert_many(["ACGT", "CACG", "GACG", "TACG", "AACG", "GGGG"])
+    expected = db.find("ACG")
+
+    pages = []
+    after_id = None
+    while True:
+        page = list(db.iter_find("ACG", limit=2, after_id=after_id))
+        if not page:
+            break
+        pages.extend(page)
+        after_id = page[-1]
+
+    assert pages == expected
+    assert db.find_count("ACG") == 5
+    with pytest.raises(InvalidSequenceId):
+        db.iter_find("ACG", after_id="A-x")
+
+def test_sharded_iter_find_when_after_id_not_str_then_parsed_as_its_string():
+    db = ShardedSequenceDb(prefix_length=1)
+    db.insert_many(["ACGT", "AACG", "CACG"])
+
+    # An ID given as another type is routed like "get" routes it.
+    class ShardedId:
+        def __init__(self, text):
+            self.text = text
+
+        def __str__(self):
+            return self.text
+
+    assert list(db.iter_find("ACG", after_id=ShardedId("A-1"))) == ["A-2", "C-1"]
+    for after_id in (12, ShardedId("A-x"), ShardedId("A1")):
+        with pytest.raises(InvalidSequenceId):
+            db.iter_find("ACG", after_id=after_id)
+
+def test_sharded_find_when_both_strands_then_matched_strand_with_full_ids():
+    db = ShardedSequenceDb(prefix_length=1, kmer_size=3, canonical_kmers=True)
+    (result1, sequence_id1) = db.insert("TTAACCTG")
+    (result2, sequence_id2) = db.insert("CAGGTTAA")
+
+    assert db.find("AACC", Strand.REVERSE) == [sequence_id2]
+    assert db.find("AACC", Strand.BOTH) == [
+        StrandMatch(sequence_id2, Strand.REVERSE),
+        StrandMatch(sequence_id1, Strand.FORWARD)
+    ]
+    assert db.overlap("TAACC", sequence_id1, 3, Strand.BOTH) == Strand.REVERSE
+
+def test_sharded_find_positions_when_occurrences_then_full_ids_and_count():
+    db = ShardedSequenceDb(prefix_length=1)
+    (result1, sequence_id1) = db.insert("TTACACA")
+    (result2, sequence_id2) = db.insert("ACAGG")
+
+    assert db.find_positions("ACA") == [
+        Occurrence(sequence_id2, 0), Occurrence(sequence_id1, 2), Occurrence(sequence_id1, 4)
+    ]
+    assert db.count("ACA") == 3
+    with pytest.raises(InvalidSample):
+        db.count("ACX")
+
+#
+# Test cases for "delete", "replace" and "compact"
+#
+def test_sharded_delete_when_sequence_then_removed_from_its_shard():
+    db = ShardedSequenceDb(prefix_length=1)
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("CCCTAGA")
+
+    db.delete(sequence_id1)
+
+    assert len(db) == 1
+    assert db.find("TAGA") == [sequence_id2]
+    with pytest.raises(InvalidSequenceId) as exception:
+        db.delete(sequence_id1)
+    assert exception.value.sequence_id == sequence_id1
+    with pytest.raises(InvalidSequenceId):
+        db.delete("X-1")
+
+def test_sharded_replace_when_same_shard_key_then_replaced_with_full_id():
+    db = ShardedSequenceDb(prefix_length=1)
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("AGGTAGA")
+
+    assert db.replace(sequence_id1, "ATTTAGA") == (InsertResult.REPLACED, sequence_id1)
+    assert db.replace(sequence_id1, "aggtaga") == (InsertResult.ALREADY_PRESENT, sequence_id2)
+    assert db.get(sequence_id1) == "ATTTAGA"
+    with pytest.raises(InvalidSequenceId) as exception:
+        db.replace("A-9", "ACCC")
+    assert exception.value.sequence_id == "A-9"
+    with pytest.raises(InvalidSequence):
+        db.replace(sequence_id1, "AXX")
+
+def test_sharded_replace_when_other_shard_key_then_moved_to_its_shard_with_new_id():
+    db = ShardedSequenceDb(prefix_length=1)
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("CCATAGA")
+
+    (result, sequence_id) = db.replace(sequence_id1, "GGATAGA")
+
+    assert (result, sequence_id) == (InsertResult.REPLACED, "G-1")
+    assert db.get(sequence_id) == "GGATAGA"
+    assert db.find("ATAGA") == [sequence_id2, sequence_id]
+    with pytest.raises(InvalidSequenceId):
+        db.get(sequence_id1)
+    with pytest.raises(InvalidSequenceId) as exception:
+        db.replace(sequence_id1, "TTATAGA")
+    assert exception.value.sequence_id == sequence_id1
+    assert len(db) == 2
+
+def test_sharded_replace_when_other_shard_key_and_already_present_then_unchanged():
+    db = ShardedSequenceDb(prefix_length=1)
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("CCATAGA")
+
+    assert db.replace(sequence_id1, "ccataga") == (InsertResult.ALREADY_PRESENT, sequence_id2)
+    assert db.get(sequence_id1) == "ACATAGA"
+    assert len(db) == 2
+
+def test_sharded_compact_when_tombstones_then_every_shard_compacted():
+    db = ShardedSequenceDb(prefix_length=1)
+    ids = [sequence_id for (_, sequence_id) in db.insert_many(["ACATAGA", "CCCTAGA", "GGGTAGA", "TTTTAGA"])]
+    db.delete(ids[0])
+    db.replace(ids[2], "GATTAGA")
+
+    db.compact()
+
+    assert all(shard._tombstones == 0 for shard in db.shards.values())
+    assert db.find("TAGA") == [ids[1], ids[2], ids[3]]
+    assert db.get(ids[2]) == "GATTAGA"
+
+#
+# Test cases for "find_approx"
+#
+def test_sharded_find_approx_when_matches_in_several_shards_then_full_ids():
+    db = ShardedSequenceDb(prefix_length=1, kmer_size=3)
+    (result1, sequence_id1) = db.insert("ACATAGATTT")
+    (result2, sequence_id2) = db.insert("GGCATCGATT")
+
+    assert db.find_approx("CATAGA", max_mismatches=1) == [
+        ApproxMatch(sequence_id1, 1, 0), ApproxMatch(sequence_id2, 2, 1)
+    ]
+    assert db.find_approx("CATGA", max_edits=1) == [ApproxMatch(sequence_id1, 1, 1), ApproxMatch(sequence_id2, 2, 1)]
+    with pytest.raises(ValueError):
+        db.find_approx("ACGT", -1)
+    with pytest.raises(InvalidSample):
+        db.find_approx("ACX")
+
+#
+# Test cases for "save" and "open"
+#
+def test_sharded_open_when_saved_then_sequences_and_ids_recovered(tmp_path):
+    db = ShardedSequenceDb(prefix_length=2)
+    ids = [sequence_id for (_, sequence_id) in db.insert_many(["ACATAGA", "ACCTAGA", "GGGTAGA"])]
+    db.delete(ids[1])
+    db.save(tmp_path / "sharded", packed=True)
+    db.close()
+
+    db = ShardedSequenceDb.open(tmp_path / "sharded", kmer_size=3)
+
+    assert len(os.listdir(tmp_path / "sharded")) == 16
+    assert db.prefix_length == 2
+    assert db.find("TAGA") == [ids[0], ids[2]]
+    assert db.insert("ACTTAGA") == (InsertResult.INSERTED, "AC-3")
+    db.close()
+
+def test_sharded_open_when_shard_snapshots_missing_then_exception(tmp_path):
+    db = ShardedSequenceDb(prefix_length=1)
+    db.save(tmp_path)
+    os.remove(tmp_path / "G.snapshot")
+
+    with pytest.raises(InvalidSnapshot):
+        ShardedSequenceDb.open(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        ShardedSequenceDb.open(tmp_path / "G")
+    db.close()
+
+#
+# Test cases for "build_overlap_graph" and "assemble"
+#
+def test_sharded_assemble_when_reads_in_several_shards_then_contigs_with_full_ids():
+    db = ShardedSequenceDb(prefix_length=1)
+    genome = "".join(random.Random(73).choices("ACGT", k=200))
+    reads = [genome[100:160], genome[:60], genome[140:200], genome[40:120]]
+    ids = [sequence_id for (_, sequence_id) in db.insert_many(reads)]
+
+    graph = db.build_overlap_graph(minimum_overlap=15)
+    contigs = db.assemble(graph)
+
+    assert [contig.sequence for contig in contigs] == [genome]
+    assert sorted(contigs[0].sequence_ids) == sorted(ids)
+    db.delete(ids[0])
+    with pytest.raises(InvalidSequenceId):
+        db.assemble(graph)
+
+#
+# Test cases for the statistics
+#
+def test_sharded_stats_when_instrumented_then_calls_recorded_once_and_finds_of_each_shard():
+    instrumentation = Instrumentation()
+    db = ShardedSequenceDb(prefix_length=1, instrumentation=instrumentation, cache_size=8)
+    db.insert_many(["ACATAGA", "CCCTAGA"])
+    db.find("TAGA")
+    db.find("TAGA")
+
+    stats = db.stats()
+
+    assert stats["operations"]["insert_many"]["count"] == 1
+    assert stats["operations"]["insert"]["count"] == 0
+    assert stats["operations"]["find"]["count"] == 2
+    # The first "find" scans every shard, the second one is answered by their caches.
+    assert stats["find"]["paths"]["scan"] == 4
+    assert stats["find"]["bases_scanned"] == 14
+    assert stats["caches"]["find"] == {"hits": 4, "misses": 4, "hit_rate": 0.5}
+    assert ShardedSequenceDb().stats() is None
+
+def test_sharded_prefilter_stats_when_prefilters_then_summed_over_shards():
+    db = ShardedSequenceDb(prefix_length=1, prefilter_factory=lambda: BloomPrefilter(3))
+    db.insert_many(["ACATAGA", "CCCTAGA", "GGGGGGG"])
+
+    assert db.find("TAGA") == ["A-1", "C-1"]
+    stats = db.prefilter_stats()
+    assert (stats.queries, stats.checked, stats.filters) == (4, 3, 3)
+    assert stats.rejected == 1
+    assert db.is_indexed("TAGA")
+    assert not db.is_indexed("TA")
+    assert ShardedSequenceDb().prefilter_stats() is None
+    assert ShardedSequenceDb().cache_stats() is None
+
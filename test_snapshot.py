@@ -0,0 +1,251 @@
+#
+# Unit tests for "snapshot.py"
+#
+
+import random
+
+import pytest
+
+from bloom_filter import BloomPrefilter
+from sequence_db import (
+    InsertResult,
+    SequenceDb
+)
+from snapshot import (
+    InvalidSnapshot,
+    MappedStorage,
+    write_snapshot
+)
+from sequence_storage import StringStorage
+from exceptions.invalid_sequence_id_ex import InvalidSequenceId
+
+#
+# Test cases for "write_snapshot" and "MappedStorage"
+#
+@pytest.mark.parametrize("packed", [False, True])
+def test_mapped_storage_when_snapshot_written_then_same_sequences(tmp_path, packed):
+    path = tmp_path / "db.snapshot"
+    items = [("1", "ACGTA"), ("2", "TTT"), ("10", "GGGGCCCCA")]
+
+    write_snapshot(path, items, 10, packed)
+    storage = MappedStorage(path)
+
+    assert storage.packed == packed
+    assert storage.last_id == 10
+    assert len(storage) == 3
+    assert list(storage.items()) == items
+    assert storage["10"] == "GGGGCCCCA"
+    assert "3" not in storage
+    assert storage.prefix("10", 3) == "GGG"
+    assert storage.suffix("10", 3) == "CCA"
+    with pytest.raises(KeyError):
+        storage["3"]
+    storage.close()
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_mapped_storage_find_when_random_sequences_then_same_as_scan(tmp_path, packed):
+    generator = random.Random(23)
+    path = tmp_path / "db.snapshot"
+    items = [
+        (str(id), "".join(generator.choices("ACGT", k=generator.randint(1, 30))))
+        for id in range(200)
+    ]
+    write_snapshot(path, items, 200, packed)
+    storage = MappedStorage(path)
+
+    for _ in range(100):
+        sample = "".join(generator.choices("ACGT", k=generator.randint(1, 8)))
+        expected = [id for (id, sequence) in items if sample in sequence]
+        assert storage.find(sample) == expected
+        assert storage.find_count(sample) == len(expected)
+        occurrences = StringStorage(items).find_occurrences(sample)
+        assert storage.find_occurrences(sample) == occurrences
+        assert storage.count_occurrences(sample) == sum(len(offsets) for (_, offsets) in occurrences)
+    storage.close()
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_mapped_storage_find_both_when_random_sequences_then_same_as_string_storage(tmp_path, packed):
+    generator = random.Random(29)
+    path = tmp_path / "db.snapshot"
+    items = [
+        (str(id), "".join(generator.choices("ACGT", k=generator.randint(1, 30))))
+        for id in range(200)
+    ]
+    write_snapshot(path, items, 200, packed)
+    storage = MappedStorage(path)
+    storage["200"] = "ACGTACGT"
+    strings = StringStorage(items + [("200", "ACGTACGT")])
+
+    for _ in range(100):
+        sample = "".join(generator.choices("ACGT", k=generator.randint(1, 8)))
+        assert storage.find_both(sample, sample[::-1]) == strings.find_both(sample, sample[::-1])
+        assert storage.find_both(sample, sample[::-1], ["3", "200"]) == strings.find_both(
+            sample, sample[::-1], ["3", "200"]
+        )
+    storage.close()
+
+def test_mapped_storage_when_empty_snapshot_then_empty(tmp_path):
+    path = tmp_path / "db.snapshot"
+
+    write_snapshot(path, [], 0)
+    storage = MappedStorage(path)
+
+    assert len(storage) == 0
+    assert storage.find("ACG") == []
+    storage.close()
+
+def test_mapped_storage_when_not_a_snapshot_then_exception(tmp_path):
+    path = tmp_path / "db.snapshot"
+    path.write_bytes(b"not a snapshot" * 10)
+
+    with pytest.raises(InvalidSnapshot):
+        MappedStorage(path)
+
+def test_mapped_storage_when_truncated_snapshot_then_exception(tmp_path):
+    path = tmp_path / "db.snapshot"
+    write_snapshot(path, [("1", "ACGT")], 1)
+    path.write_bytes(path.read_bytes()[:-1])
+
+    with pytest.raises(InvalidSnapshot):
+        MappedStorage(path)
+
+#
+# Test cases for "SequenceDb.save" and "SequenceDb.open"
+#
+@pytest.mark.parametrize("packed", [False, True])
+def test_open_when_saved_database_then_same_sequences_and_next_id(tmp_path, packed):
+    path = tmp_path / "db.snapshot"
+    db = SequenceDb()
+    (result1, sequence_id1) = db.insert("ACATAGA")
+    (result2, sequence_id2) = db.insert("CCCTAGA")
+    db.save(path, packed)
+
+    opened_db = SequenceDb.open(path)
+    (result3, sequence_id3) = opened_db.insert("CCCTAGA")
+    (result4, sequence_id4) = opened_db.insert("GGGTAGA")
+
+    assert opened_db.get(sequence_id1) == "ACATAGA"
+    assert result3 == InsertResult.ALREADY_PRESENT
+    assert sequence_id3 == sequence_id2
+    assert result4 == InsertResult.INSERTED
+    assert sequence_id4 not in (sequence_id1, sequence_id2)
+    assert opened_db.find("TAGA") == [sequence_id1, sequence_id2, sequence_id4]
+    assert opened_db.overlap("TTACA", sequence_id1)
+    with pytest.raises(InvalidSequenceId):
+        opened_db.get("99")
+
+def test_open_when_saved_again_then_new_sequences_persisted(tmp_path):
+    path = tmp_path / "db.snapshot"
+    db = SequenceDb()
+    db.insert("ACATAGA")
+    db.save(path)
+    opened_db = SequenceDb.open(path)
+    (result, sequence_id) = opened_db.insert("GGGTAGA")
+    opened_db.save(path)
+
+    reopened_db = SequenceDb.open(path, kmer_size=3)
+
+    assert len(reopened_db) == 2
+    assert reopened_db.find("GGGT") == [sequence_id]
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_mapped_storage_when_deleted_and_replaced_then_live_sequences(tmp_path, packed):
+    path = tmp_path / "db.snapshot"
+    write_snapshot(path, [("1", "ACATAGA"), ("2", "CCCTAGA"), ("3", "GGGTAGA")], 3, packed)
+    storage = MappedStorage(path)
+    storage["4"] = "TTTTAGA"
+    del storage["2"]
+    del storage["4"]
+    storage["3"] = "GGGCCCC"
+
+    assert len(storage) == 2
+    assert "2" not in storage and "4" not in storage
+    assert list(storage.items()) == [("1", "ACATAGA"), ("3", "GGGCCCC")]
+    assert storage.find("TAGA") == ["1"]
+    assert storage.find("GGGC") == ["3"]
+    assert storage.find_count("A") == 1
+    assert storage.prefix("3", 4) == "GGGC"
+    assert storage.suffix("3", 2) == "CC"
+    assert storage.compacted() is None
+    with pytest.raises(KeyError):
+        storage["2"]
+    storage.close()
+
+def test_mapped_storage_view_when_changed_afterwards_then_view_unchanged(tmp_path):
+    path = tmp_path / "db.snapshot"
+    write_snapshot(path, [("1", "ACATAGA"), ("2", "CCCTAGA")], 2)
+    storage = MappedStorage(path)
+    storage["3"] = "GGGTAGA"
+
+    view = storage.view()
+    del storage["1"]
+    storage["2"] = "TTTTAGA"
+    storage["4"] = "AAAAAAA"
+
+    assert list(view.items()) == [("1", "ACATAGA"), ("2", "CCCTAGA"), ("3", "GGGTAGA")]
+    assert list(storage.items()) == [("2", "TTTTAGA"), ("3", "GGGTAGA"), ("4", "AAAAAAA")]
+    storage.close()
+
+def test_open_when_deleted_then_deleted_sequences_not_saved(tmp_path):
+    path = tmp_path / "db.snapshot"
+    db = SequenceDb()
+    db.insert_many(["ACATAGA", "CCCTAGA", "GGGTAGA"])
+    db.save(path)
+    opened_db = SequenceDb.open(path)
+    opened_db.delete("3")
+    opened_db.save(tmp_path / "db2.snapshot")
+
+    reopened_db = SequenceDb.open(tmp_path / "db2.snapshot")
+    (result, sequence_id) = reopened_db.insert("TTTTTT")
+
+    assert reopened_db.find("TAGA") == ["1", "2"]
+    assert sequence_id == "4"
+
+def test_close_when_opened_snapshot_then_mapped_file_released(tmp_path):
+    path = tmp_path / "db.snapshot"
+    write_snapshot(path, [("1", "ACATAGA")], 1)
+    db = SequenceDb.open(path)
+    storage = db.database
+
+    db.close()
+
+    assert storage._map.closed
+    # A database without a mapped file has nothing to release.
+    SequenceDb().close()
+
+def test_close_when_view_open_then_mapped_file_released_with_view(tmp_path):
+    path = tmp_path / "db.snapshot"
+    write_snapshot(path, [("1", "ACATAGA"), ("2", "CCCTTTT")], 2)
+    storage = MappedStorage(path)
+    view = storage.view()
+
+    storage.close()
+    storage.close()
+
+    assert not view._map.closed
+    assert view.find("TTT") == ["2"]
+    view.close()
+    assert storage._map.closed
+
+def test_compact_when_opened_snapshot_then_view_closed(tmp_path):
+    path = tmp_path / "db.snapshot"
+    write_snapshot(path, [("1", "ACATAGA"), ("2", "CCCTAGA")], 2)
+    db = SequenceDb.open(path)
+    storage = db.database
+    db.delete("1")
+
+    db.compact()
+    db.close()
+
+    assert storage._map.closed
+
+def test_open_when_prefilter_then_filters_built_from_snapshot(tmp_path):
+    path = tmp_path / "db.snapshot"
+    db = SequenceDb()
+    db.insert_many(["ACGTTGCAACGT", "TTTTTTTTTTTT"])
+    db.save(path)
+
+    opened_db = SequenceDb.open(path, prefilter=BloomPrefilter(4))
+
+    assert opened_db.find("TGCAAC") == ["1"]
+    assert opened_db.prefilter_stats().filters == 2
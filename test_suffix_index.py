@@ -0,0 +1,80 @@
+#
+# Unit tests for "suffix_index.py"
+#
+
+import random
+
+from suffix_index import (
+    SuffixArrayIndex,
+    build_suffix_array
+)
+
+#
+# Test cases for "build_suffix_array"
+#
+def test_build_suffix_array_when_empty_text_then_empty():
+    assert build_suffix_array("") == []
+
+def test_build_suffix_array_when_text_then_sorted_suffixes():
+    text = "ACGTACGAAC$TTA$"
+
+    suffix_array = build_suffix_array(text)
+
+    assert suffix_array == sorted(range(len(text)), key=lambda i: text[i:])
+
+def test_build_suffix_array_when_repetitive_text_then_sorted_suffixes():
+    text = "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA$"
+
+    suffix_array = build_suffix_array(text)
+
+    assert suffix_array == sorted(range(len(text)), key=lambda i: text[i:])
+
+#
+# Test cases for "SuffixArrayIndex"
+#
+def test_suffix_array_index_when_no_sequence_then_no_match():
+    index = SuffixArrayIndex([])
+
+    assert len(index) == 0
+    assert index.find("ACG") == []
+
+def test_suffix_array_index_find_when_sample_across_sequences_then_no_match():
+    index = SuffixArrayIndex([("1", "AAAC"), ("2", "GTTT")])
+
+    assert index.find("CG") == []
+    assert index.find("AC") == ["1"]
+    assert index.find("T") == ["2"]
+
+def test_suffix_array_index_find_when_random_sequences_then_same_as_scan():
+    generator = random.Random(3)
+    items = [
+        (str(id), "".join(generator.choices("ACGT", k=generator.randint(1, 30))))
+        for id in range(200)
+    ]
+    index = SuffixArrayIndex(items)
+
+    for _ in range(200):
+        sample = "".join(generator.choices("ACGT", k=generator.randint(1, 10)))
+        assert index.find(sample) == [id for (id, sequence) in items if sample in sequence]
+
+def test_suffix_array_index_memory_size_then_positive():
+    index = SuffixArrayIndex([("1", "ACGT")])
+
+    assert index.memory_size() > 0
+
+def test_suffix_array_index_find_occurrences_when_random_sequences_then_same_as_scan():
+    generator = random.Random(5)
+    items = [
+        (str(id), "".join(generator.choices("AC", k=generator.randint(1, 30))))
+        for id in range(100)
+    ]
+    index = SuffixArrayIndex(items)
+
+    for _ in range(100):
+        sample = "".join(generator.choices("AC", k=generator.randint(1, 5)))
+        expected = [
+            (id, [start for start in range(len(sequence)) if sequence.startswith(sample, start)])
+            for (id, sequence) in items if sample in sequence
+        ]
+        assert index.find_occurrences(sample) == expected
+        assert index.count_occurrences(sample) == sum(len(offsets) for (_, offsets) in expected)
@@ -0,0 +1,113 @@
+#
+# Unit tests for "write_ahead_log.py"
+#
+
+import time
+
+import pytest
+
+import write_ahead_log
+from write_ahead_log import (
+    FsyncPolicy,
+    LogOperation,
+    WriteAheadLog,
+    encode_record,
+    read_log
+)
+
+#
+# Test cases for "WriteAheadLog" and "read_log"
+#
+def test_write_ahead_log_when_invalid_group_size_then_exception(tmp_path):
+    with pytest.raises(ValueError):
+        WriteAheadLog(tmp_path / "db.wal", group_size=0)
+    with pytest.raises(ValueError):
+        WriteAheadLog(tmp_path / "db.wal", max_delay=0)
+
+def test_write_ahead_log_when_group_incomplete_then_synced_after_max_delay(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(write_ahead_log.os, "fsync", lambda descriptor: synced.append(time.monotonic()))
+    wal = WriteAheadLog(tmp_path / "db.wal", FsyncPolicy.GROUP, group_size=1000, max_delay=0.05)
+    start = time.monotonic()
+    wal.append(LogOperation.INSERT, "1", "ACGT")
+    wal.append(LogOperation.INSERT, "2", "TTAG")
+
+    deadline = start + 5
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # A single "fsync" for both records, once the first one waited for the maximum delay.
+    assert len(synced) == 1
+    assert synced[0] - start >= 0.05
+    assert wal._unsynced == 0
+    wal.append(LogOperation.INSERT, "3", "GGGG")
+    wal.close()
+    assert len(synced) == 2
+    assert wal._timer is None
+
+@pytest.mark.parametrize("fsync_policy", list(FsyncPolicy))
+def test_read_log_when_records_appended_then_same_records(tmp_path, fsync_policy):
+    path = tmp_path / "db.wal"
+    wal = WriteAheadLog(path, fsync_policy, group_size=2)
+    wal.append(LogOperation.INSERT, "1", "ACGT")
+    wal.append(LogOperation.INSERT, "2", "TTAG")
+    wal.append(LogOperation.INSERT, "3", "G")
+    wal.append(LogOperation.DELETE, "1", "")
+    wal.append(LogOperation.REPLACE, "2", "CCAG")
+    wal.close()
+
+    (records, valid_length) = read_log(path)
+
+    assert records == [
+        (LogOperation.INSERT, "1", "ACGT"),
+        (LogOperation.INSERT, "2", "TTAG"),
+        (LogOperation.INSERT, "3", "G"),
+        (LogOperation.DELETE, "1", ""),
+        (LogOperation.REPLACE, "2", "CCAG"),
+    ]
+    assert valid_length == path.stat().st_size
+
+def test_read_log_when_torn_record_then_ignored(tmp_path):
+    path = tmp_path / "db.wal"
+    record = encode_record(LogOperation.INSERT, "1", "ACGT")
+    path.write_bytes(record + encode_record(LogOperation.INSERT, "2", "TTAG")[:-2])
+
+    (records, valid_length) = read_log(path)
+
+    assert records == [(LogOperation.INSERT, "1", "ACGT")]
+    assert valid_length == len(record)
+
+def test_read_log_when_corrupted_record_then_ignored(tmp_path):
+    path = tmp_path / "db.wal"
+    record = bytearray(encode_record(LogOperation.INSERT, "1", "ACGT"))
+    record[-1] = ord("C")
+    path.write_bytes(bytes(record))
+
+    (records, valid_length) = read_log(path)
+
+    assert records == []
+    assert valid_length == 0
+
+def test_write_ahead_log_when_reopened_after_torn_record_then_torn_record_removed(tmp_path):
+    path = tmp_path / "db.wal"
+    path.write_bytes(encode_record(LogOperation.INSERT, "1", "ACGT") + b"\x05\x00")
+
+    wal = WriteAheadLog(path)
+    wal.append(LogOperation.INSERT, "2", "TTAG")
+    wal.close()
+
+    (records, _) = read_log(path)
+    assert [sequence_id for (_, sequence_id, _) in records] == ["1", "2"]
+
+def test_write_ahead_log_when_rotated_then_new_empty_log(tmp_path):
+    path = tmp_path / "db.wal"
+    rotated_path = tmp_path / "db.wal.old"
+    wal = WriteAheadLog(path)
+    wal.append(LogOperation.INSERT, "1", "ACGT")
+
+    wal.rotate(rotated_path)
+    wal.append(LogOperation.INSERT, "2", "TTAG")
+    wal.close()
+
+    assert read_log(rotated_path)[0] == [(LogOperation.INSERT, "1", "ACGT")]
+    assert read_log(path)[0] == [(LogOperation.INSERT, "2", "TTAG")]
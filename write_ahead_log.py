@@ -0,0 +1,174 @@
+#
+# Append-only write-ahead log (WAL) of the DNA sequence database.
+#
+# Every change of the database is appended to the log before being applied, so the database can be rebuilt
+# after a crash by replaying the log on top of the last snapshot.
+#
+# Record layout (all integers are unsigned little-endian):
+# - header: payload length (4 bytes) and CRC-32 of the payload (4 bytes)
+# - payload: operation (1 byte), sequence ID length (2 bytes), sequence ID (UTF-8), sequence (ASCII, empty for
+#   a deletion)
+#
+# A crash can leave a partially written record at the end of the log (a "torn" record). Such a record fails the
+# length or CRC check: it is ignored when the log is read, and removed when the log is reopened.
+#
+
+import os
+import struct
+import threading
+import zlib
+from enum import Enum
+
+HEADER_FORMAT = "<II"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+PAYLOAD_FORMAT = "<BH"
+PAYLOAD_HEADER_SIZE = struct.calcsize(PAYLOAD_FORMAT)
+
+# The default number of records written between two "fsync" with the GROUP policy.
+DEFAULT_GROUP_SIZE = 64
+
+# The default number of seconds a record can wait for its "fsync" with the GROUP policy.
+DEFAULT_MAX_DELAY = 1.0
+
+
+# The logged operations. A deletion is logged with an empty sequence.
+class LogOperation(Enum):
+    INSERT = 1
+    DELETE = 2
+    REPLACE = 3
+
+
+# When the log is forced to the disk with "fsync":
+# - ALWAYS: after every record. A committed change survives a power failure.
+# - GROUP: once every "group_size" records (group commit), or "max_delay" seconds after the first record
+#   not forced yet. Up to "group_size" changes, from the last "max_delay" seconds, can be lost on a power failure,
+#   but never on a process crash.
+# - NEVER: left to the operating system. Changes survive a process crash, not a power failure.
+class FsyncPolicy(Enum):
+    ALWAYS = "Always"
+    GROUP = "Group"
+    NEVER = "Never"
+
+
+# Encode a log record.
+#
+# Params:
+# - operation: the LogOperation
+# - sequence_id: the ID of the sequence
+# - sequence: the uppercase sequence
+# Returns the encoded record.
+def encode_record(operation, sequence_id, sequence):
+    encoded_id = sequence_id.encode()
+    payload = struct.pack(PAYLOAD_FORMAT, operation.value, len(encoded_id)) + encoded_id + sequence.encode()
+    return struct.pack(HEADER_FORMAT, len(payload), zlib.crc32(payload)) + payload
+
+
+# Read the records of a log file.
+# Reading stops at the first incomplete or corrupted record.
+#
+# Params:
+# - path: the path of the log
+# Returns a tuple (<list of (LogOperation, sequence ID, sequence) tuples>, <length of the valid part of the log>).
+def read_log(path):
+    records = []
+    with open(path, "rb") as file:
+        data = file.read()
+
+    offset = 0
+    while offset + HEADER_SIZE <= len(data):
+        (length, checksum) = struct.unpack_from(HEADER_FORMAT, data, offset)
+        payload = data[offset + HEADER_SIZE:offset + HEADER_SIZE + length]
+        if len(payload) != length or length < PAYLOAD_HEADER_SIZE or zlib.crc32(payload) != checksum:
+            break
+        (operation, id_length) = struct.unpack_from(PAYLOAD_FORMAT, payload)
+        sequence_id = payload[PAYLOAD_HEADER_SIZE:PAYLOAD_HEADER_SIZE + id_length].decode()
+        sequence = payload[PAYLOAD_HEADER_SIZE + id_length:].decode()
+        records.append((LogOperation(operation), sequence_id, sequence))
+        offset += HEADER_SIZE + length
+    return (records, offset)
+
+
+class WriteAheadLog:
+
+    # Open (or create) a log for appending.
+    # A torn record at the end of an existing log is removed.
+    #
+    # Params:
+    # - path: the path of the log
+    # - fsync_policy: the FsyncPolicy of the log
+    # - group_size: the number of records written between two "fsync" with the GROUP policy
+    # - max_delay: the number of seconds a record can wait for its "fsync" with the GROUP policy
+    def __init__(self, path, fsync_policy=FsyncPolicy.GROUP, group_size=DEFAULT_GROUP_SIZE,
+                 max_delay=DEFAULT_MAX_DELAY):
+        if group_size < 1:
+            raise ValueError(f"Invalid group size: [{group_size}]")
+        if max_delay <= 0:
+            raise ValueError(f"Invalid maximum delay: [{max_delay}]")
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.group_size = group_size
+        self.max_delay = max_delay
+        # Serializes the appends with the changes of the database and the checkpoints (see "durability.py").
+        self.lock = threading.RLock()
+        self._unsynced = 0
+        # With the GROUP policy, the timer forcing the records of an incomplete group to the disk.
+        self._timer = None
+        self._file = self._open(path)
+
+    def _open(self, path):
+        if os.path.exists(path):
+            (_, valid_length) = read_log(path)
+            if valid_length != os.path.getsize(path):
+                os.truncate(path, valid_length)
+        return open(path, "ab", buffering=0)
+
+    # Get the size of the log, in bytes.
+    def size(self):
+        return self._file.tell()
+
+    # Append a record to the log.
+    #
+    # Params:
+    # - operation: the LogOperation
+    # - sequence_id: the ID of the sequence
+    # - sequence: the uppercase sequence
+    def append(self, operation, sequence_id, sequence):
+        with self.lock:
+            self._file.write(encode_record(operation, sequence_id, sequence))
+            self._unsynced += 1
+            if self.fsync_policy == FsyncPolicy.ALWAYS or (
+                self.fsync_policy == FsyncPolicy.GROUP and self._unsynced >= self.group_size
+            ):
+                self.sync()
+            elif self.fsync_policy == FsyncPolicy.GROUP and self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    # Force the written records to the disk.
+    def sync(self):
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._unsynced:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    # Move the current log to another path and start a new, empty log.
+    #
+    # Params:
+    # - rotated_path: the new path of the current log
+    def rotate(self, rotated_path):
+        with self.lock:
+            self.sync()
+            self._file.close()
+            os.replace(self.path, rotated_path)
+            self._file = self._open(self.path)
+
+    # Close the log, forcing the written records to the disk (unless the policy is NEVER).
+    def close(self):
+        with self.lock:
+            if self.fsync_policy != FsyncPolicy.NEVER:
+                self.sync()
+            self._file.close()